@@ -0,0 +1,121 @@
+"""
+Local Gemini stand-in for offline benchmarks.
+
+`FakeGeminiModel` implements the part of `genai.GenerativeModel` that LLMEngine uses,
+`generate_content_async(prompt, stream=False)`. Each response is either a recorded
+one or a synthetic test-case array, served after a configurable delay. A configurable
+share of responses is damaged in the ways Gemini's output actually breaks.
+"""
+import json
+import random
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import List, Optional, AsyncIterator
+
+# Damage applied to a malformed response; all of them are recoverable by salvage_test_cases
+MALFORMATIONS = ("code_fence", "prose_prefix", "trailing_comma", "truncated")
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    """Async iterator of FakeResponse chunks, spaced out over the response latency."""
+
+    def __init__(self, text: str, chunk_chars: int, delay: float):
+        self.pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        self.delay = delay / len(self.pieces)
+
+    async def __aiter__(self) -> AsyncIterator[FakeResponse]:
+        for piece in self.pieces:
+            await asyncio.sleep(self.delay)
+            yield FakeResponse(piece)
+
+
+class FakeGeminiModel:
+    """
+    Args:
+        latency_ms / jitter_ms: per-call delay, uniformly jittered.
+        malformation_rate: share of responses damaged with one of MALFORMATIONS.
+        cases_per_response: size of synthetic arrays.
+        recorded: raw response texts to serve round-robin instead of synthetic ones
+            (see `load_recorded`).
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        jitter_ms: float = 200.0,
+        malformation_rate: float = 0.1,
+        cases_per_response: int = 8,
+        recorded: Optional[List[str]] = None,
+        stream_chunk_chars: int = 256,
+        seed: int = 7,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.malformation_rate = malformation_rate
+        self.cases_per_response = cases_per_response
+        self.recorded = recorded or []
+        self.stream_chunk_chars = stream_chunk_chars
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.malformed = 0
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        text = self._response_text(prompt)
+        if self.rng.random() < self.malformation_rate:
+            self.malformed += 1
+            text = self._malform(text)
+        delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if stream:
+            return FakeStream(text, self.stream_chunk_chars, delay)
+        await asyncio.sleep(delay)
+        return FakeResponse(text)
+
+    def _response_text(self, prompt: str) -> str:
+        if self.recorded:
+            return self.recorded[(self.calls - 1) % len(self.recorded)]
+        # Deterministic per prompt (own rng seeded from its hash), so identical prompts get identical
+        # responses; latency and malformation still vary per call through self.rng
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        rng = random.Random(f"{self.seed}:{digest}")
+        cases = [synthetic_case(i, digest[:6], rng) for i in range(1, self.cases_per_response + 1)]
+        return json.dumps(cases, indent=2)
+
+    def _malform(self, text: str) -> str:
+        kind = self.rng.choice(MALFORMATIONS)
+        if kind == "code_fence":
+            return f"```json\n{text}\n```"
+        if kind == "prose_prefix":
+            return f"Sure! Here are the test cases you asked for:\n{text}\nLet me know if you need more."
+        if kind == "trailing_comma":
+            return text.replace("\n  }", ",\n  }", 1)
+        # Cut inside the last object, as a max_output_tokens stop does
+        last = text.rfind("{")
+        return text[:last + (len(text) - last) // 2]
+
+
+def synthetic_case(index: int, tag: str, rng: random.Random) -> dict:
+    steps = rng.randint(2, 6)
+    return {
+        "id": f"TC_{index:03d}",
+        "title": f"Scenario {tag}-{index}: verify login flow variant {rng.randint(1, 99)}",
+        "preconditions": "User account exists and the login page is reachable",
+        "steps": [f"Step {s}: enter value {rng.randint(0, 999)} and submit" for s in range(1, steps + 1)],
+        "expected_result": "The user must see the dashboard, and an error must not be shown",
+        "priority": rng.choice(["High", "Medium", "Low"]),
+    }
+
+
+def load_recorded(path: str) -> List[str]:
+    """Recorded responses: a JSON array of raw texts, or JSONL with one {"text": ...} per line."""
+    raw = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix == ".jsonl":
+        return [json.loads(line)["text"] for line in raw.splitlines() if line.strip()]
+    return list(json.loads(raw))
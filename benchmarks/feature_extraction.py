@@ -0,0 +1,79 @@
+"""
+Feature extraction benchmark: legacy per-requirement loop vs FeatureEngine.
+
+    python -m benchmarks.feature_extraction
+"""
+import random
+import time
+import numpy as np
+from typing import List
+from src.ml.features import FeatureEngine
+
+VOCAB = (
+    "navigate to login page enter valid username password click button verify dashboard "
+    "displays welcome message session token expires after minutes redirect field validation "
+    "email format account created profile settings update save cancel"
+).split()
+KEYWORDS = ["must", "user", "error", "and", "Must", "User"]
+
+
+def synthetic_requirements(n: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = rng.choices(VOCAB, k=rng.randint(20, 80))
+        for i in range(len(words)):
+            if rng.random() < 0.03:
+                words[i] = rng.choice(KEYWORDS)
+            if rng.random() < 0.05:
+                words[i] += ","
+        texts.append(" ".join(words))
+    return texts
+
+
+def legacy_extract(texts: List[str]) -> np.ndarray:
+    """The pre-FeatureEngine implementation, kept verbatim as the baseline."""
+    features = []
+    for text in texts:
+        features.append([
+            len(text),
+            text.count(",") + text.count("and"),
+            1 if "must" in text.lower() else 0,
+            1 if "user" in text.lower() else 0,
+            1 if "error" in text.lower() else 0
+        ])
+    return np.array(features, dtype=float)
+
+
+def best_of(fn, texts, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(texts)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(sizes=(1_000, 10_000, 100_000)) -> List[dict]:
+    engine = FeatureEngine()
+    results = []
+    for n in sizes:
+        texts = synthetic_requirements(n)
+        assert np.array_equal(engine.transform(texts), legacy_extract(texts)), "feature mismatch"
+        legacy = best_of(legacy_extract, texts)
+        batch = best_of(engine.transform, texts)
+        results.append({
+            "requirements": n,
+            "legacy_ms": round(legacy * 1000, 2),
+            "engine_ms": round(batch * 1000, 2),
+            "speedup": round(legacy / batch, 2),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for row in run():
+        print(
+            f"{row['requirements']:>7} reqs | legacy {row['legacy_ms']:>9.2f} ms"
+            f" | engine {row['engine_ms']:>9.2f} ms | x{row['speedup']}"
+        )
@@ -0,0 +1,147 @@
+"""
+Shared helpers: timing, percentiles, result files and run-to-run comparison.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Tuple
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Metrics where a bigger number is better
+HIGHER_IS_BETTER = ("throughput_rps", "speedup", "hit_ratio")
+# Costs; any other number (sizes, call counts) describes the workload and is never a regression
+COSTS = ("errors", "dropped_cases")
+COST_SUFFIXES = ("_ms", "_us", "_s")
+
+
+def _tracked(key: str) -> bool:
+    parts = key.split(".")
+    return (
+        parts[-1] in HIGHER_IS_BETTER
+        or parts[-1] in COSTS
+        or parts[-1].endswith(COST_SUFFIXES)
+        or (len(parts) > 1 and parts[-2].endswith(COST_SUFFIXES) and parts[-1] != "n")
+    )
+
+
+def offline_environment() -> None:
+    """Benchmarks never touch Gemini, the on-disk caches, the suite store or the Sentinel snapshot."""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("ZETA_LLM_CACHE", "0")
+    os.environ.setdefault("ZETA_GEMINI_RPM", "0")
+    os.environ.setdefault("ZETA_GEMINI_TPM", "0")
+    os.environ.setdefault("ZETA_ANOMALY_ONLINE", "0")
+    os.environ.setdefault("ZETA_SUITE_DB", ":memory:")
+
+
+def summarize_ms(samples_s: Iterable[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds: p50/p90/p95/p99, mean and max."""
+    arr = np.asarray(list(samples_s), dtype=np.float64) * 1000
+    if arr.size == 0:
+        return {}
+    p50, p90, p95, p99 = np.percentile(arr, [50, 90, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(arr.mean()), 3),
+        "max": round(float(arr.max()), 3),
+        "n": int(arr.size),
+    }
+
+
+def best_of_ms(fn, *args, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 3)
+
+
+def run_metadata(config: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+    }
+
+
+def save_results(results: Dict[str, Any], path: str = None) -> Path:
+    target = Path(path) if path else RESULTS_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(results, indent=2))
+    return target
+
+
+def flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    """{"load": {"latency_ms": {"p95": 1}}} -> {"load.latency_ms.p95": 1}; lists are keyed by their 'name'."""
+    out: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == "meta":
+                continue
+            out.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, list):
+        for position, value in enumerate(data):
+            label = value.get("name", position) if isinstance(value, dict) else position
+            out.update(flatten(value, f"{prefix}{label}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        out[prefix[:-1]] = float(data)
+    return out
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Relative change of every shared numeric metric. A metric regresses when it
+    moves the wrong way by more than `threshold` (costs up, throughput down).
+    Error counts are costs too, so new failures surface as regressions.
+    """
+    old, new = flatten(baseline), flatten(current)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if before == after:
+            change = 0.0
+        elif before == 0:
+            change = float("inf")
+        else:
+            change = (after - before) / abs(before)
+        higher_is_better = key.rsplit(".", 1)[-1] in HIGHER_IS_BETTER
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": key,
+            "baseline": before,
+            "current": after,
+            "change": round(change, 4) if change != float("inf") else None,
+            "regression": _tracked(key) and worse > threshold,
+        })
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]], only_changes: bool = True) -> Tuple[str, int]:
+    lines, regressions = [], 0
+    for row in rows:
+        regressions += row["regression"]
+        if only_changes and not row["regression"] and (row["change"] or 0) == 0:
+            continue
+        change = "from 0" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['metric']:<60} {row['baseline']:>12.3f} -> {row['current']:>12.3f} {change:>8}{flag}")
+    return "\n".join(lines), regressions
@@ -0,0 +1,134 @@
+"""
+Micro-benchmarks of the CPU-bound pieces at scale: feature extraction,
+Sentinel anomaly detection, edge-case scoring, JSON salvage and code generation.
+"""
+import json
+import random
+import asyncio
+import numpy as np
+from typing import Dict, Any, List, Sequence
+from benchmarks.harness import offline_environment, best_of_ms
+from benchmarks.fake_llm import synthetic_case
+from benchmarks.feature_extraction import synthetic_requirements, run as feature_extraction
+
+offline_environment()
+
+
+def anomaly_detection(sizes: Sequence[int]) -> List[Dict[str, Any]]:
+    from src.ml.anomaly_detection import AnomalyDetector
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in sizes:
+        values = rng.normal(500, 120, n).tolist()
+        batch = AnomalyDetector(log_interval=3600)
+        online = AnomalyDetector(online=True, log_interval=3600)
+        requests = [values[i:i + 10] for i in range(0, min(n, 10_000), 10)]
+        rows.append({
+            "name": f"anomaly_{n}",
+            "values": n,
+            "batch_ms": best_of_ms(batch.detect, values),
+            # Online mode per request: many small calls against the running baseline
+            "online_per_call_us": round(best_of_ms(lambda: [online.detect(r) for r in requests]) * 1000 / len(requests), 3),
+        })
+    return rows
+
+
+def edge_case_scoring(batch_sizes: Sequence[int]) -> List[Dict[str, Any]]:
+    from src.ml.edge_case_detector import EdgeCaseDetector
+    detector = EdgeCaseDetector()
+    history = [{"text": text} for text in synthetic_requirements(2_000, seed=1)]
+    model = detector.fit(history)
+    fitting = EdgeCaseDetector()
+    detector.load_model(model, "bench")
+    rows = []
+    for n in batch_sizes:
+        cases = [{"id": f"TC_{i}", "text": text} for i, text in enumerate(synthetic_requirements(n, seed=n))]
+        rows.append({
+            "name": f"edge_case_{n}",
+            "cases": n,
+            "pretrained_ms": best_of_ms(detector._analyze_sync, cases),
+            "fit_per_request_ms": best_of_ms(fitting._analyze_sync, cases, repeats=3),
+        })
+    return rows
+
+
+def concurrent_scoring(caller_counts: Sequence[int], cases_per_call: int = 5) -> List[Dict[str, Any]]:
+    """Many small concurrent analyze_complexity() calls: one scoring pass per call vs micro-batched."""
+    from src.ml.edge_case_detector import EdgeCaseDetector
+    from src.ml.anomaly_detection import AnomalyDetector
+    detector = EdgeCaseDetector(physics_engine=AnomalyDetector(log_interval=3600))
+    detector.load_model(detector.fit([{"text": text} for text in synthetic_requirements(2_000, seed=1)]), "bench")
+    rows = []
+    try:
+        for n in caller_counts:
+            calls = [
+                [{"id": f"TC_{i}_{j}", "text": text} for j, text in enumerate(synthetic_requirements(cases_per_call, seed=i))]
+                for i in range(n)
+            ]
+
+            async def batched():
+                await asyncio.gather(*(detector.analyze_complexity(call) for call in calls))
+
+            async def per_call():
+                loop = asyncio.get_running_loop()
+                await asyncio.gather(*(loop.run_in_executor(detector.executor, detector._analyze_sync, call) for call in calls))
+
+            rows.append({
+                "name": f"concurrent_scoring_{n}x{cases_per_call}",
+                "callers": n,
+                "per_call_ms": best_of_ms(lambda: asyncio.run(per_call())),
+                "batched_ms": best_of_ms(lambda: asyncio.run(batched())),
+            })
+    finally:
+        detector.close()
+    return rows
+
+
+def json_salvage(case_counts: Sequence[int]) -> List[Dict[str, Any]]:
+    from src.core.json_stream import salvage_test_cases
+    rng = random.Random(3)
+    rows = []
+    for n in case_counts:
+        clean = json.dumps([synthetic_case(i, "bench", rng) for i in range(1, n + 1)], indent=2)
+        damaged = "Here you go:\n" + clean.replace("\n  }", ",\n  }")[:-40]
+        rows.append({
+            "name": f"salvage_{n}",
+            "cases": n,
+            "clean_ms": best_of_ms(salvage_test_cases, clean),
+            "malformed_ms": best_of_ms(salvage_test_cases, damaged),
+        })
+    return rows
+
+
+def codegen(suite_sizes: Sequence[int]) -> List[Dict[str, Any]]:
+    from src.core.code_generator import SeleniumGenerator, FormatCache, shutdown_codegen_pool
+    rng = random.Random(5)
+    rows = []
+    try:
+        for n in suite_sizes:
+            cases = [synthetic_case(i, f"s{n}", rng) for i in range(1, n + 1)]
+            generator = SeleniumGenerator()
+
+            def cold():
+                generator.cache = FormatCache()
+                asyncio.run(generator.generate_suite(cases))
+
+            cold()  # starts the process pool outside the timed runs
+            cold_ms = best_of_ms(cold, repeats=3)
+            warm_ms = best_of_ms(lambda: asyncio.run(generator.generate_suite(cases)))
+            rows.append({"name": f"codegen_{n}", "cases": n, "cold_ms": cold_ms, "cached_ms": warm_ms})
+    finally:
+        shutdown_codegen_pool()
+    return rows
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    scale = (1_000, 10_000) if quick else (1_000, 10_000, 100_000)
+    return {
+        "feature_extraction": [{"name": f"features_{row['requirements']}", **row} for row in feature_extraction(scale)],
+        "anomaly_detection": anomaly_detection((10_000, 100_000) if quick else (10_000, 100_000, 1_000_000)),
+        "edge_case_scoring": edge_case_scoring((10, 100) if quick else (10, 100, 1_000)),
+        "concurrent_scoring": concurrent_scoring((100,) if quick else (100, 1_000)),
+        "json_salvage": json_salvage((10, 100) if quick else (10, 100, 1_000)),
+        "codegen": codegen((10,) if quick else (10, 30, 100)),
+    }
@@ -0,0 +1,183 @@
+"""
+End-to-end pipeline benchmarks against the fake Gemini backend.
+
+* `run_stages`: parse -> generate -> analyze_complexity -> merge -> codegen, timed per stage.
+* `run_load`: concurrent /generate requests through the real FastAPI app (httpx ASGITransport).
+"""
+import time
+import random
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from benchmarks.harness import offline_environment, summarize_ms
+from benchmarks.fake_llm import FakeGeminiModel
+from benchmarks.feature_extraction import synthetic_requirements
+
+offline_environment()
+
+
+def synthetic_document(sections: int, seed: int = 42) -> str:
+    """Markdown requirements document, ~1.5k chars per section."""
+    rng = random.Random(seed)
+    texts = synthetic_requirements(sections * 4, seed=seed)
+    parts = []
+    for s in range(sections):
+        parts.append(f"## {s + 1}. Requirement area {rng.randint(100, 999)}")
+        parts.extend(f"- The system must {text}." for text in texts[s * 4:(s + 1) * 4])
+    return "\n\n".join(parts)
+
+
+def _merge(raw_tests: List[Dict[str, Any]], analyses) -> List[Dict[str, Any]]:
+    """Same merge as src.api.main._analyze_and_merge."""
+    merged = []
+    for original, analysis in zip(raw_tests, analyses):
+        case = original.copy()
+        case["risk_analysis"] = analysis.model_dump()
+        merged.append(case)
+    return merged
+
+
+def _offline_engine(model: FakeGeminiModel):
+    from src.core.llm_engine import LLMEngine
+    from src.core.rate_limiter import RateLimiter
+    engine = LLMEngine(cache=None)
+    engine.model = model
+    engine.rate_limiter = RateLimiter()
+    return engine
+
+
+def _trained_detector(detector=None):
+    """EdgeCaseDetector scoring with a pre-trained (compiled) model, as in production."""
+    from src.ml.edge_case_detector import EdgeCaseDetector
+    detector = detector if detector is not None else EdgeCaseDetector()
+    history = [{"text": text} for text in synthetic_requirements(2_000, seed=1)]
+    detector.load_model(detector.fit(history), "bench")
+    return detector
+
+
+async def run_stages(
+    iterations: int = 5,
+    sections: int = 40,
+    fake: Optional[Dict[str, Any]] = None,
+    pooled_codegen: bool = True,
+) -> Dict[str, Any]:
+    from src.core.requirement_parser import RequirementParser
+    from src.core.code_generator import SeleniumGenerator, shutdown_codegen_pool
+    from src.api.main import _add_analysis_text
+
+    engine = _offline_engine(FakeGeminiModel(**(fake or {})))
+    detector = _trained_detector()
+    generator = SeleniumGenerator()
+    timings: Dict[str, List[float]] = {name: [] for name in ("parse", "generate", "analyze", "merge", "codegen", "total")}
+    cases_per_run = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "requirements.md"
+        source = synthetic_document(sections)
+        path.write_text(source, encoding="utf-8")
+        try:
+            # Iteration 0 is an untimed warm-up (codegen process pool, first imports)
+            for iteration in range(iterations + 1):
+                started = time.perf_counter()
+                mark = started
+                laps: Dict[str, float] = {}
+
+                def lap(stage: str) -> None:
+                    nonlocal mark
+                    now = time.perf_counter()
+                    laps[stage] = now - mark
+                    mark = now
+
+                document = await RequirementParser.parse(str(path))
+                lap("parse")
+                raw_tests = await engine.generate_for_document(document, use_cache=False)
+                lap("generate")
+                _add_analysis_text(raw_tests)
+                analyses = await detector.analyze_complexity(raw_tests)
+                lap("analyze")
+                merged = _merge(raw_tests, analyses)
+                lap("merge")
+                # Fresh cache each run, otherwise every iteration after the first only measures cache hits
+                generator.cache = type(generator.cache)()
+                await generator.generate_suite(merged, pooled=pooled_codegen)
+                lap("codegen")
+                laps["total"] = time.perf_counter() - started
+                if iteration > 0:
+                    for stage, seconds in laps.items():
+                        timings[stage].append(seconds)
+                    cases_per_run.append(len(merged))
+        finally:
+            shutdown_codegen_pool()
+
+    return {
+        "iterations": iterations,
+        "document_chars": len(source),
+        "chunks": len(engine.chunker.chunk(source)),
+        "cases": cases_per_run[-1] if cases_per_run else 0,
+        "llm_calls": engine.model.calls,
+        "malformed_responses": engine.model.malformed,
+        "dropped_cases": engine.parse_stats["dropped_cases"],
+        "stages": [{"name": name, "latency_ms": summarize_ms(samples)} for name, samples in timings.items()],
+    }
+
+
+async def run_load(
+    requests: int = 200,
+    concurrency: int = 20,
+    fake: Optional[Dict[str, Any]] = None,
+    endpoint: str = "/generate",
+    pretrained: bool = True,
+) -> Dict[str, Any]:
+    """
+    `pretrained` scores with a synthetic pre-trained model when the registry has none,
+    as production does; without one every request refits the IsolationForest.
+    """
+    import httpx
+    from src.api import main
+    from src.core.rate_limiter import RateLimiter
+
+    texts = [synthetic_document(3, seed=seed) for seed in range(requests)]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async with main.app.router.lifespan_context(main.app):
+        for name in main.engines.states:
+            await main.engines.wait(name, timeout=120)
+        llm = main.ml_resources["llm"]
+        llm.model = FakeGeminiModel(**(fake or {}))
+        llm.rate_limiter = RateLimiter()
+        llm.cache = None
+        detector = main.ml_resources["ml"]
+        if pretrained and detector.model_version is None:
+            await asyncio.to_thread(_trained_detector, detector)
+        model_version = detector.model_version
+
+        semaphore = asyncio.Semaphore(concurrency)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+            async def one(text: str) -> None:
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post(endpoint, json={"requirements_text": text, "bypass_cache": True})
+                    if endpoint.endswith("/stream"):
+                        await response.aread()
+                    latencies.append(time.perf_counter() - started)
+                    statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(text) for text in texts))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "edge_case_model": model_version or "fit-per-request",
+        "errors": sum(count for status, count in statuses.items() if status != "200"),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms": summarize_ms(latencies),
+    }
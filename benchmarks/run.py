@@ -0,0 +1,95 @@
+"""
+Offline benchmark suite. No Gemini key or network needed: LLM calls go to FakeGeminiModel.
+
+    python -m benchmarks.run                       # full run, saved to benchmarks/results/
+    python -m benchmarks.run --quick --out new.json
+    python -m benchmarks.run --only micro --baseline benchmarks/results/bench-....json
+    python -m benchmarks.run --compare old.json new.json
+
+With a baseline, exits 1 if any metric regressed by more than --threshold.
+"""
+import sys
+import json
+import asyncio
+import argparse
+from typing import Dict, Any
+from benchmarks.harness import run_metadata, save_results, compare, format_comparison
+
+
+def _fake_config(args) -> Dict[str, Any]:
+    recorded = None
+    if args.recorded:
+        from benchmarks.fake_llm import load_recorded
+        recorded = load_recorded(args.recorded)
+    return {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "malformation_rate": args.malformation_rate,
+        "recorded": recorded,
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    fake = _fake_config(args)
+    config = {k: v for k, v in vars(args).items() if k not in ("compare", "out", "baseline")}
+    results: Dict[str, Any] = {"meta": run_metadata(config)}
+    sections = set(args.only or ["pipeline", "load", "micro"])
+
+    if "pipeline" in sections:
+        from benchmarks.pipeline import run_stages
+        print("• pipeline stages ...", file=sys.stderr)
+        results["pipeline"] = asyncio.run(run_stages(
+            iterations=3 if args.quick else 10, sections=20 if args.quick else 60, fake=fake,
+        ))
+    if "load" in sections:
+        from benchmarks.pipeline import run_load
+        print("• load test ...", file=sys.stderr)
+        results["load"] = asyncio.run(run_load(
+            requests=args.requests or (50 if args.quick else 500), concurrency=args.concurrency, fake=fake,
+        ))
+    if "micro" in sections:
+        from benchmarks.micro import run as micro
+        print("• micro-benchmarks ...", file=sys.stderr)
+        results["micro"] = micro(quick=args.quick)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Zeta offline benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for CI smoke runs")
+    parser.add_argument("--only", nargs="+", choices=["pipeline", "load", "micro"])
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Fake Gemini latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    parser.add_argument("--malformation-rate", type=float, default=0.1)
+    parser.add_argument("--recorded", help="JSON/JSONL file of recorded raw Gemini responses to replay")
+    parser.add_argument("--requests", type=int, help="Load test: total requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="Load test: requests in flight")
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--baseline", help="Compare this run against an earlier result file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Only compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+    else:
+        current = run(args)
+        path = save_results(current, args.out)
+        print(f"Results written to {path}", file=sys.stderr)
+        if not args.baseline:
+            print(json.dumps({k: v for k, v in current.items() if k != "meta"}, indent=2))
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report, regressions = format_comparison(compare(baseline, current, args.threshold))
+    print(report or "No changes.")
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,5 @@
+import time
 
+# Taken when the package is first imported, before src.api.main pulls in FastAPI;
+# /health/startup reports main's import time from it
+IMPORT_STARTED = time.perf_counter()
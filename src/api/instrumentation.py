@@ -0,0 +1,47 @@
+import os
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+from src.core.metrics import IN_FLIGHT, REQUEST_SECONDS, begin_request, end_request
+
+SERVER_TIMING = os.getenv("ZETA_SERVER_TIMING", "1") == "1"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware body buffering, streams stay streams).
+    Tracks in-flight requests and latency per route template, and attaches a
+    Server-Timing header built from the stages recorded while handling the request.
+    For streaming responses the header only covers work done before the first byte.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = begin_request()
+        status = {"code": 500}
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            # Route templates, not raw paths, so job ids don't explode label cardinality
+            path = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route=path, method=scope["method"], status=status["code"])
+            end_request(token)
@@ -1,76 +1,630 @@
 
-from fastapi import FastAPI, HTTPException
+from src.api import IMPORT_STARTED
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response, JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-from typing import Dict, Any
-from src.core.llm_engine import LLMEngine
-from src.ml.edge_case_detector import EdgeCaseDetector
-from src.core.code_generator import SeleniumGenerator
-from src.api.models import GenerateRequest, TestSuiteResponse, CodeGenRequest, CodeResponse
+from typing import Dict, Any, List, AsyncIterator, Callable, Optional, Tuple
+from src.core.engine_registry import EngineRegistry
+from src.core.metrics import REGISTRY, stage, track_tokens
+from src.api.instrumentation import MetricsMiddleware
+from src.core.suite_store import SuiteStore, SUITE_PAGE_SIZE, SUITE_MAX_PAGE_SIZE
+from src.core.job_queue import BatchJobQueue, BatchJob
+from src.core.incremental import GenerationResult
+from src.ml.batch_scheduler import SchedulerSaturated
+from src.api.uploads import receive_upload, discard_upload, UploadError
+from python_multipart.exceptions import MultipartParseError
+from src.api.models import (
+    GenerateRequest, BatchGenerateRequest, TestSuiteResponse, CodeGenRequest, CodeResponse,
+    ModelReloadRequest, SuiteCodeGenRequest, SuiteCodeResponse, PROJECT_PATTERN, REQUIREMENTS_MAX_CHARS,
+)
 import uvicorn
+import zipfile
+import io
 import uuid
+import asyncio
+import time
 import os
+import json
 from loguru import logger
 
+# Heavy engines (Gemini, sklearn, black, pypdf) are imported by their factories below,
+# in the background, so the process accepts traffic before they are loaded.
 ml_resources: Dict[str, Any] = {}
+engines: Optional[EngineRegistry] = None
+startup_timings: Dict[str, Any] = {}
+_shutdown_hooks: List[Callable[[], None]] = []
+
+# Risk analysis is attached to streamed cases in micro-batches of this size
+STREAM_BATCH_SIZE = int(os.getenv("ZETA_STREAM_BATCH_SIZE", 5))
+BATCH_CONCURRENCY = int(os.getenv("ZETA_BATCH_CONCURRENCY", 4))
+# Opt-in: Sentinel keeps a running Z-Score baseline across requests, snapshotted next to the models.
+# Off, each request's cases are scored against their own mean/std.
+ANOMALY_ONLINE = os.getenv("ZETA_ANOMALY_ONLINE", "0") == "1"
+ANOMALY_DECAY = float(os.getenv("ZETA_ANOMALY_DECAY", 0)) or None
+ANOMALY_SNAPSHOT = os.getenv("ZETA_ANOMALY_SNAPSHOT")  # default: next to the model registry
+
+def _build_llm():
+    from src.core.llm_engine import LLMEngine
+    return LLMEngine()
+
+def _build_model_registry():
+    from src.ml.model_registry import ModelRegistry, MODEL_DIR
+    return ModelRegistry(str(MODEL_DIR))
+
+def _build_ml():
+    from src.ml.edge_case_detector import EdgeCaseDetector
+    from src.ml.anomaly_detection import AnomalyDetector
+    snapshot = ANOMALY_SNAPSHOT or str(ml_resources["models"].root.parent / "anomaly_baseline.json")
+    physics = AnomalyDetector(threshold=2.5, online=ANOMALY_ONLINE, decay=ANOMALY_DECAY, snapshot_path=snapshot)
+    if ANOMALY_ONLINE:
+        physics.load()
+    detector = EdgeCaseDetector(physics_engine=physics)
+    try:
+        detector.load_model(*_load_model_version(None))
+    except FileNotFoundError:
+        logger.warning("No pre-trained model found; falling back to per-request fitting")
+        detector.warm()
+    _shutdown_hooks.append(detector.close)
+    if ANOMALY_ONLINE:
+        _shutdown_hooks.append(physics.save)
+    return detector
+
+def _build_codegen():
+    from src.core.code_generator import SeleniumGenerator, warm_codegen_pool, shutdown_codegen_pool
+    generator = SeleniumGenerator()
+    warm_codegen_pool()
+    _shutdown_hooks.append(shutdown_codegen_pool)
+    return generator
+
+def _build_parser():
+    from src.core.requirement_parser import RequirementParser, shutdown_parser_pool
+    _shutdown_hooks.append(shutdown_parser_pool)
+    return RequirementParser
+
+def _build_dedup():
+    from src.core.dedup import Deduplicator, DEDUP_ENABLED
+    return Deduplicator() if DEDUP_ENABLED else None
+
+def _build_registry() -> EngineRegistry:
+    registry = EngineRegistry(ml_resources)
+    registry.register("llm", _build_llm)
+    registry.register("models", _build_model_registry)
+    registry.register("ml", _build_ml, depends_on=["models"])
+    registry.register("parser", _build_parser)
+    registry.register("codegen", _build_codegen)
+    registry.register("dedup", _build_dedup)
+    return registry
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global engines
     logger.info("⚡ Zeta System Startup...")
-    try:
-        ml_resources["llm"] = LLMEngine()
-        ml_resources["ml"] = EdgeCaseDetector()
-        ml_resources["codegen"] = SeleniumGenerator()
-        logger.info("✅ Engines Online.")
-    except Exception as e:
-        logger.critical(f"❌ Startup Failed: {e}")
+    started = time.perf_counter()
+    ml_resources["suites"] = SuiteStore()
+    ml_resources["batch"] = BatchJobQueue(_run_batch_item, concurrency=BATCH_CONCURRENCY)
+    ml_resources["batch"].start()
+    engines = _build_registry()
+    engines.start()
+    startup_timings["lifespan_seconds"] = round(time.perf_counter() - started, 4)
+    logger.info("✅ Accepting traffic; engines warming up in the background.")
     yield
+    await engines.stop()
+    await ml_resources["batch"].stop()
+    ml_resources["suites"].close()
+    for hook in reversed(_shutdown_hooks):
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Shutdown hook failed: {e}")
+    _shutdown_hooks.clear()
     ml_resources.clear()
     logger.info("🛑 System Shutdown.")
 
 app = FastAPI(title="Zeta API", version="1.0.0", lifespan=lifespan)
+startup_timings["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(MetricsMiddleware)
+
+def _collect_runtime_metrics():
+    """Scrape-time view of state that lives in the engines themselves."""
+    llm = ml_resources.get("llm")
+    if llm is not None and llm.cache is not None:
+        stats = llm.cache.stats()
+        yield "zeta_llm_cache_lookups_total", "counter", "LLM response cache lookups by result", [
+            ({"result": "memory_hit"}, stats["memory_hits"]),
+            ({"result": "disk_hit"}, stats["disk_hits"]),
+            ({"result": "miss"}, stats["misses"]),
+        ]
+        yield "zeta_llm_cache_hit_ratio", "gauge", "LLM response cache hit ratio since start", [({}, stats["hit_ratio"])]
+        if "disk_bytes" in stats:
+            yield "zeta_llm_cache_disk_bytes", "gauge", "Size of the on-disk LLM response cache", [({}, stats["disk_bytes"])]
+    if llm is not None:
+        parsed = llm.parse_stats
+        yield "zeta_llm_responses_parsed_total", "counter", "LLM responses parsed, by whether they needed repair", [
+            ({"result": "clean"}, parsed["responses"] - parsed["repaired_responses"]),
+            ({"result": "repaired"}, parsed["repaired_responses"]),
+        ]
+        yield "zeta_llm_cases_recovered_total", "counter", "Test cases salvaged from or dropped out of damaged responses", [
+            ({"result": "salvaged"}, parsed["salvaged_cases"]),
+            ({"result": "dropped"}, parsed["dropped_cases"]),
+        ]
+    codegen = ml_resources.get("codegen")
+    if codegen is not None:
+        lookups = codegen.cache.hits + codegen.cache.misses
+        yield "zeta_codegen_cache_lookups_total", "counter", "Codegen format cache lookups by result", [
+            ({"result": "hit"}, codegen.cache.hits),
+            ({"result": "miss"}, codegen.cache.misses),
+        ]
+        yield "zeta_codegen_cache_hit_ratio", "gauge", "Codegen format cache hit ratio since start", [
+            ({}, codegen.cache.hits / lookups if lookups else 0.0)
+        ]
+    detector = ml_resources.get("ml")
+    if detector is not None:
+        yield "zeta_scoring_batch_target_rows", "gauge", "Current adaptive micro-batch size of the EdgeCaseDetector", [
+            ({}, detector.batcher.batch_size)
+        ]
+    batch = ml_resources.get("batch")
+    if batch is not None:
+        yield "zeta_batch_queue_depth", "gauge", "Batch items waiting for a worker", [({}, batch.queue_depth)]
+        yield "zeta_batch_items_in_flight", "gauge", "Batch items being generated", [({}, batch.in_flight)]
+    if engines is not None:
+        yield "zeta_engine_ready", "gauge", "1 when the engine is built", [
+            ({"engine": name}, 1.0 if engines.is_ready(name) else 0.0) for name in engines.states
+        ]
+
+REGISTRY.register_collector(_collect_runtime_metrics)
+
+def _require(*names: str) -> None:
+    if not all(name in ml_resources for name in names):
+        raise HTTPException(503, "Engines not ready", headers={"Retry-After": "5"})
+
+def _saturated() -> HTTPException:
+    return HTTPException(503, "Scoring queue is full", headers={"Retry-After": "1"})
+
+def _add_analysis_text(test_cases: List[Dict[str, Any]]) -> None:
+    from src.ml.edge_case_detector import requirement_text
+
+    for test in test_cases:
+        if "text" not in test:
+            test["text"] = requirement_text(test)
+
+def _load_model_version(version):
+    model, meta = ml_resources["models"].load(version)
+    return model, meta.version
+
+async def _analyze_and_merge(raw_tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Cases carried over from a base suite keep their risk analysis; only new ones are scored
+    fresh = [test for test in raw_tests if "risk_analysis" not in test]
+    _add_analysis_text(fresh)
+    analyses = await ml_resources["ml"].analyze_complexity(fresh) if fresh else []
+    if len(analyses) != len(fresh):
+        raise RuntimeError(f"Risk analysis returned {len(analyses)} result(s) for {len(fresh)} test case(s)")
+    analysis_objects = iter(analyses)
+
+    # Merge logic
+    with stage("merge"):
+        final_test_cases = []
+        for original in raw_tests:
+            merged = original.copy()
+            if "risk_analysis" not in original:
+                merged["risk_analysis"] = next(analysis_objects).model_dump()
+            final_test_cases.append(merged)
+    return final_test_cases
+
+async def _base_suite(suite_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    if suite_id is None:
+        return None
+    base = await asyncio.to_thread(ml_resources["suites"].get, suite_id)
+    if base is None:
+        raise HTTPException(404, f"Base suite {suite_id} not found")
+    return base
+
+async def _deduplicate(result, project: Optional[str] = None, base_suite_id: Optional[str] = None):
+    """Drops near-duplicate cases before they are scored. None when dedup is disabled."""
+    dedup = ml_resources.get("dedup")
+    if dedup is None:
+        return None
+    with stage("dedup"):
+        # MinHash is CPU work, and a project's first use loads its index from disk
+        deduped = await asyncio.to_thread(dedup.run, result.test_cases, project, base_suite_id)
+    result.test_cases = deduped.test_cases
+    return deduped
+
+async def _remember_project(
+    suite: TestSuiteResponse, deduped, project: Optional[str], base_suite_id: Optional[str] = None
+) -> None:
+    # The new suite supersedes its base in the project index
+    if deduped is not None and project is not None:
+        await asyncio.to_thread(
+            ml_resources["dedup"].remember, project, suite.suite_id, suite.test_cases, deduped.signatures, base_suite_id
+        )
+
+def _with_merges(case: Dict[str, Any], survivor: Dict[str, Any]) -> Dict[str, Any]:
+    return {**case, **{key: survivor[key] for key in ("merged_from", "provenance") if key in survivor}}
+
+def _generation_meta(result, base_suite_id: Optional[str], deduped=None, project: Optional[str] = None) -> Dict[str, Any]:
+    meta = {"sections": result.sections}
+    if base_suite_id is not None:
+        meta["incremental"] = {
+            "base_suite_id": base_suite_id,
+            "total_sections": len(result.sections),
+            "generated_sections": result.generated_sections,
+            "reused_cases": result.reused_cases,
+        }
+    if deduped is not None:
+        meta["dedup"] = {"project": project, "kept": len(deduped.test_cases), "removed": deduped.removed}
+    return meta
+
+async def _run_batch_item(suite_id: str, request: GenerateRequest) -> List[Dict[str, Any]]:
+    """One batch document through the /generate pipeline, stored under the item's advertised suite_id."""
+    # Jobs accepted during warm-up wait for the engines instead of failing
+    assert engines is not None, "batch jobs only run once the lifespan has started"
+    for name in ("llm", "ml", "dedup"):
+        await engines.wait(name)
+    base = await _base_suite(request.base_suite_id)
+    with track_tokens() as usage:
+        result = await ml_resources["llm"].generate_suite(
+            request.requirements_text, use_cache=not request.bypass_cache, base=base
+        )
+    deduped = await _deduplicate(result, request.project, request.base_suite_id)
+    final_test_cases = await _analyze_and_merge(result.test_cases)
+    suite = await _remember_suite(TestSuiteResponse(
+        suite_id=suite_id,
+        test_cases=final_test_cases,
+        meta={
+            "source": "Gemini 2.5",
+            "ml_validation": True,
+            "tokens": usage.as_dict(),
+            **_generation_meta(result, request.base_suite_id, deduped, request.project),
+        },
+    ))
+    await _remember_project(suite, deduped, request.project, request.base_suite_id)
+    return suite.test_cases
+
+async def _remember_suite(suite: TestSuiteResponse) -> TestSuiteResponse:
+    # Serializing and writing a large suite to SQLite would stall the event loop
+    if "suites" in ml_resources:
+        await asyncio.to_thread(ml_resources["suites"].put, suite.suite_id, suite.test_cases, suite.meta)
+    return suite
+
+def _risk_events(merged: List[Dict[str, Any]]) -> List[str]:
+    return [
+        _ndjson({"event": "risk_analysis", "id": case.get("id"), "data": case["risk_analysis"]})
+        for case in merged
+    ]
+
+def _ndjson(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload) + "\n"
 
 @app.get("/health")
 async def health_check():
-    return {"status": "active", "engines": list(ml_resources.keys())}
+    if engines is None:
+        return {"status": "stopped", "engines": []}
+    failed = [s.name for s in engines.states.values() if s.status == "failed"]
+    status = "active" if engines.ready else "degraded" if failed else "starting"
+    return {"status": status, "engines": [name for name in engines.states if engines.is_ready(name)], "failed": failed}
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the event loop answers. Never depends on engine state."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: 200 once every engine is built, 503 while warming up or after a failure."""
+    states = [s.model_dump() for s in engines.states.values()] if engines is not None else []
+    ready = engines is not None and engines.ready
+    return JSONResponse({"ready": ready, "engines": states}, status_code=200 if ready else 503)
+
+@app.get("/health/startup")
+async def startup_report():
+    """Where cold start went: module import, lifespan, and per-engine build (imports included)."""
+    warm_up = None
+    if engines is not None and engines.finished_at is not None:
+        warm_up = round(engines.finished_at - engines.started_at, 4)
+    return {
+        **startup_timings,
+        "warm_up_seconds": warm_up,
+        "engines": [s.model_dump() for s in engines.states.values()] if engines is not None else [],
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    llm = ml_resources.get("llm")
+    if llm is None or llm.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm.cache.stats()}
 
 @app.post("/generate", response_model=TestSuiteResponse)
 async def generate_tests(request: GenerateRequest):
-    if "llm" not in ml_resources:
-        raise HTTPException(503, "Engines not ready")
+    _require("llm", "ml", "suites", "dedup")
+    base = await _base_suite(request.base_suite_id)
     
     try:
-        raw_tests = await ml_resources["llm"].generate_test_cases(request.requirements_text)
-        for test in raw_tests:
-            if "text" not in test:
-                test["text"] = f"{test.get('title', '')} {' '.join(test.get('steps', []))}"
-            
-        analysis_objects = await ml_resources["ml"].analyze_complexity(raw_tests)
-        
-        # Merge logic
-        final_test_cases = []
-        for original, analysis in zip(raw_tests, analysis_objects):
-            merged = original.copy()
-            merged["risk_analysis"] = analysis.model_dump()
-            final_test_cases.append(merged)
+        with track_tokens() as usage:
+            result = await ml_resources["llm"].generate_suite(
+                request.requirements_text, use_cache=not request.bypass_cache, base=base
+            )
+        deduped = await _deduplicate(result, request.project, request.base_suite_id)
+        final_test_cases = await _analyze_and_merge(result.test_cases)
 
-        return TestSuiteResponse(
+        suite = await _remember_suite(TestSuiteResponse(
             suite_id=str(uuid.uuid4()),
             test_cases=final_test_cases, 
-            meta={"source": "Gemini 2.5", "ml_validation": True}
-        )
+            meta={
+                "source": "Gemini 2.5",
+                "ml_validation": True,
+                "tokens": usage.as_dict(),
+                **_generation_meta(result, request.base_suite_id, deduped, request.project),
+            }
+        ))
+        await _remember_project(suite, deduped, request.project, request.base_suite_id)
+        return suite
+    except SchedulerSaturated:
+        raise _saturated()
     except Exception as e:
         logger.error(f"Error: {e}")
         raise HTTPException(500, str(e))
 
+@app.post("/generate/stream")
+async def generate_tests_stream(request: GenerateRequest):
+    """
+    NDJSON stream: a `suite` header, one `test_case` event per case as soon as
+    the model closes its object (or a `duplicate` event when it repeats an earlier
+    case), `risk_analysis` events per micro-batch, then `done`.
+    """
+    _require("llm", "ml", "dedup")
+    if request.base_suite_id is not None:
+        _require("suites")
+    plan = ml_resources["llm"].plan(request.requirements_text, await _base_suite(request.base_suite_id))
+
+    suite_id = str(uuid.uuid4())
+    meta = {"source": "Gemini 2.5", "ml_validation": True}
+    dedup = ml_resources.get("dedup")
+    session = None
+    if dedup is not None:
+        # Opening a project loads its index from disk
+        session = await asyncio.to_thread(dedup.session, request.project, request.base_suite_id)
+
+    async def events() -> AsyncIterator[str]:
+        yield _ndjson({"event": "suite", "suite_id": suite_id, "meta": meta})
+        batch: List[Dict[str, Any]] = []
+        merged: List[Dict[str, Any]] = []
+        count = 0
+        # Spans the whole body: the generator runs in the response task's context
+        with track_tokens() as usage:
+            try:
+                async for case in ml_resources["llm"].stream_for_document(
+                    request.requirements_text, use_cache=not request.bypass_cache, plan=plan
+                ):
+                    if session is not None:
+                        kept = await asyncio.to_thread(session.add, case)
+                        if kept is None:
+                            yield _ndjson({"event": "duplicate", "data": session.removed[-1]})
+                            continue
+                        case = kept
+                    count += 1
+                    yield _ndjson({"event": "test_case", "data": case})
+                    batch.append(case)
+                    if len(batch) >= STREAM_BATCH_SIZE:
+                        merged.extend(await _analyze_and_merge(batch))
+                        for line in _risk_events(merged[-len(batch):]):
+                            yield line
+                        batch = []
+                if batch:
+                    merged.extend(await _analyze_and_merge(batch))
+                    for line in _risk_events(merged[-len(batch):]):
+                        yield line
+                tokens = usage.as_dict()
+                deduped = None
+                if session is not None:
+                    # Duplicates that arrived after their survivor was scored are merged into the stored copy
+                    merged = [_with_merges(case, survivor) for case, survivor in zip(merged, session.test_cases)]
+                    deduped = session.result()
+                result = GenerationResult(
+                    test_cases=merged,
+                    sections=[section.hash for section in plan.sections],
+                    generated_sections=len(plan.changed),
+                    reused_cases=len(plan.reused),
+                )
+                stored = {
+                    **meta,
+                    "tokens": tokens,
+                    **_generation_meta(result, request.base_suite_id, deduped, request.project),
+                }
+                suite = await _remember_suite(TestSuiteResponse(suite_id=suite_id, test_cases=merged, meta=stored))
+                await _remember_project(suite, deduped, request.project, request.base_suite_id)
+                yield _ndjson({"event": "done", "suite_id": suite_id, "count": count, "tokens": tokens})
+            except Exception as e:
+                logger.error(f"Stream Error: {e}")
+                yield _ndjson({"event": "error", "detail": str(e)})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/upload", response_model=TestSuiteResponse)
+async def upload_document(
+    request: Request,
+    bypass_cache: bool = False,
+    base_suite_id: Optional[str] = None,
+    project: Optional[str] = Query(None, pattern=PROJECT_PATTERN),
+):
+    """
+    Multipart upload (`file` field) of a PDF/DOCX/TXT/MD document.
+    The body is streamed to a temp file, parsed, and run through the same pipeline as /generate.
+    With `base_suite_id` (the suite of the previous version), only changed sections are regenerated.
+    With `project`, cases already covered by another suite of the project are dropped.
+    """
+    _require("llm", "ml", "parser", "suites", "dedup")
+    parser = ml_resources["parser"]
+    base = await _base_suite(base_suite_id)
+
+    try:
+        path, size = await receive_upload(request, parser.SUPPORTED_EXTENSIONS)
+    except UploadError as e:
+        raise HTTPException(e.status_code, str(e))
+    except MultipartParseError as e:
+        raise HTTPException(400, f"Malformed multipart body: {e}")
+
+    try:
+        with stage("parse_document"):
+            document = await parser.parse(str(path))
+        if not document.content.strip():
+            raise HTTPException(422, "No text could be extracted from the document")
+        if len(document.content) > REQUIREMENTS_MAX_CHARS:
+            raise HTTPException(
+                413, f"Document holds {len(document.content)} characters of text; the limit is {REQUIREMENTS_MAX_CHARS}"
+            )
+        with track_tokens() as usage:
+            result = await ml_resources["llm"].generate_suite(document, use_cache=not bypass_cache, base=base)
+        deduped = await _deduplicate(result, project, base_suite_id)
+        final_test_cases = await _analyze_and_merge(result.test_cases)
+
+        suite = await _remember_suite(TestSuiteResponse(
+            suite_id=str(uuid.uuid4()),
+            test_cases=final_test_cases,
+            meta={
+                "source": "Gemini 2.5",
+                "ml_validation": True,
+                "tokens": usage.as_dict(),
+                **_generation_meta(result, base_suite_id, deduped, project),
+                "document": {"filename": document.filename, "bytes": size, "char_count": document.char_count, **document.metadata},
+            }
+        ))
+        await _remember_project(suite, deduped, project, base_suite_id)
+        return suite
+    except HTTPException:
+        raise
+    except SchedulerSaturated:
+        raise _saturated()
+    except Exception as e:
+        logger.error(f"Upload Error: {e}")
+        raise HTTPException(500, str(e))
+    finally:
+        discard_upload(path)
+
+@app.get("/suites")
+async def list_suites(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(SUITE_PAGE_SIZE, ge=1, le=SUITE_MAX_PAGE_SIZE),
+):
+    """Stored suites, most recent first."""
+    _require("suites")
+    total, suites = await asyncio.to_thread(ml_resources["suites"].recent, offset, limit)
+    return {"total": total, "offset": offset, "limit": limit, "suites": suites}
+
+@app.get("/suites/{suite_id}")
+async def get_suite(
+    suite_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(SUITE_PAGE_SIZE, ge=1, le=SUITE_MAX_PAGE_SIZE),
+    risk_level: Optional[str] = None,
+    case_type: Optional[str] = Query(None, alias="type"),
+    priority: Optional[str] = None,
+):
+    """A page of a stored suite's cases, filtered by risk level, type and priority. Served from SQLite as stored."""
+    _require("suites")
+    body = await asyncio.to_thread(
+        ml_resources["suites"].page_json,
+        suite_id, offset, limit, risk_level=risk_level, type=case_type, priority=priority,
+    )
+    if body is None:
+        raise HTTPException(404, "Suite not found")
+    return Response(body, media_type="application/json")
+
+@app.post("/generate/batch", response_model=BatchJob, status_code=202)
+async def generate_batch(request: BatchGenerateRequest):
+    _require("batch", "suites")
+    # Fail fast on unknown bases instead of failing their items later
+    for base_suite_id in {doc.base_suite_id for doc in request.documents if doc.base_suite_id is not None}:
+        await _base_suite(base_suite_id)
+    return ml_resources["batch"].submit(request.documents)
+
+@app.get("/generate/batch/{job_id}", response_model=BatchJob)
+async def batch_status(job_id: str):
+    job = ml_resources["batch"].get(job_id) if "batch" in ml_resources else None
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+@app.delete("/generate/batch/{job_id}", response_model=BatchJob)
+async def cancel_batch(job_id: str):
+    job = ml_resources["batch"].cancel(job_id) if "batch" in ml_resources else None
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+@app.get("/models")
+async def list_models():
+    _require("models", "ml")
+    return {
+        "active": ml_resources["ml"].model_version,
+        "versions": [v.model_dump() for v in ml_resources["models"].versions()],
+    }
+
+@app.post("/models/reload")
+async def reload_model(request: ModelReloadRequest):
+    _require("models", "ml")
+    try:
+        # Load and compile off the event loop; requests keep scoring on the old model meanwhile
+        model, version = await asyncio.to_thread(_load_model_version, request.version)
+    except FileNotFoundError as e:
+        raise HTTPException(404, str(e))
+    await asyncio.to_thread(ml_resources["ml"].load_model, model, version)
+    return {"active": version}
+
 @app.post("/codegen", response_model=CodeResponse)
 async def generate_code(request: CodeGenRequest):
+    _require("codegen")
     try:
-        code = ml_resources["codegen"].generate_test_script(request.test_plan)
+        # Rendering and black formatting are CPU-bound
+        code = await asyncio.to_thread(ml_resources["codegen"].generate_test_script, request.test_plan)
         return CodeResponse(filename=f"test_{uuid.uuid4().hex[:8]}.py", python_code=code)
     except Exception as e:
         raise HTTPException(500, str(e))
 
+def _zip_files(files: List[Tuple[str, str]]) -> bytes:
+    """Deflating a large suite takes a while, so it runs in a worker thread."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, code in files:
+            archive.writestr(filename, code)
+    return buffer.getvalue()
+
+@app.post("/codegen/suite", response_model=SuiteCodeResponse)
+async def generate_suite_code(request: SuiteCodeGenRequest):
+    """One Selenium module per test case, as a multi-file JSON payload or a zip archive."""
+    _require("codegen", "suites")
+    test_cases = request.test_cases
+    if request.suite_id is not None:
+        suite = await asyncio.to_thread(ml_resources["suites"].get, request.suite_id)
+        if suite is None:
+            raise HTTPException(404, "Suite not found")
+        test_cases = suite["test_cases"]
+
+    try:
+        files = await ml_resources["codegen"].generate_suite(test_cases, pooled=request.pooled)
+    except Exception as e:
+        logger.error(f"Suite Codegen Error: {e}")
+        raise HTTPException(500, str(e))
+
+    if request.format == "zip":
+        archive = await asyncio.to_thread(_zip_files, files)
+        name = f"zeta_suite_{(request.suite_id or uuid.uuid4().hex)[:8]}.zip"
+        return Response(
+            archive,
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{name}"'},
+        )
+    return SuiteCodeResponse(
+        suite_id=request.suite_id,
+        files=[CodeResponse(filename=filename, python_code=code) for filename, code in files],
+    )
+
 if __name__ == "__main__":
     uvicorn.run("src.api.main:app", host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
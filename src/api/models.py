@@ -1,18 +1,55 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Optional, Literal
+
+# Security: limit input size to prevent DoS; applies to pasted text and to text extracted from uploads
+REQUIREMENTS_MAX_CHARS = 2_000_000
+
+# Queued batch documents stay in memory until processed, so a batch is capped as a whole too
+BATCH_MAX_CHARS = 20_000_000
+
+# Project names become index file names under ZETA_DEDUP_DIR
+PROJECT_PATTERN = r"^[A-Za-z0-9_.-]{1,64}$"
 
 # --- REQUESTS ---
 class GenerateRequest(BaseModel):
-    # Security: Limit input size to prevent context window overflow/DoS
-    requirements_text: str = Field(..., min_length=10, max_length=50000, description="Raw requirements text")
+    # Long documents are chunked, not truncated
+    requirements_text: str = Field(..., min_length=10, max_length=REQUIREMENTS_MAX_CHARS, description="Raw requirements text")
     context: Optional[str] = Field(None, max_length=5000)
+    bypass_cache: bool = Field(False, description="Skip the LLM response cache and force a fresh generation")
+    base_suite_id: Optional[str] = Field(None, description="Suite of an earlier version of this document; only changed sections are regenerated")
+    project: Optional[str] = Field(None, pattern=PROJECT_PATTERN, description="Drop cases already covered by another suite of this project")
+
+class BatchGenerateRequest(BaseModel):
+    documents: List[GenerateRequest] = Field(..., min_length=1, max_length=1000, description="One entry per requirement document")
+
+    @model_validator(mode="after")
+    def _total_size(self):
+        total = sum(len(doc.requirements_text) for doc in self.documents)
+        if total > BATCH_MAX_CHARS:
+            raise ValueError(f"Batch holds {total} characters; the limit is {BATCH_MAX_CHARS}")
+        return self
 
 class AnalyzeRequest(BaseModel):
     test_cases: List[Dict[str, Any]] = Field(..., description="Test cases to analyze")
 
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = Field(None, description="Registry version to activate (default: latest)")
+
 class CodeGenRequest(BaseModel):
     test_plan: Dict[str, Any] = Field(..., description="Single test case object")
 
+class SuiteCodeGenRequest(BaseModel):
+    suite_id: Optional[str] = Field(None, description="A suite returned by /generate or /upload")
+    test_cases: Optional[List[Dict[str, Any]]] = Field(None, min_length=1, max_length=1000, description="Inline test cases")
+    format: Literal["json", "zip"] = Field("json", description="Multi-file JSON payload or a single zip archive")
+    pooled: bool = Field(False, description="Share one browser per pytest worker via an emitted conftest.py, ordered by risk level")
+
+    @model_validator(mode="after")
+    def _one_source(self):
+        if (self.suite_id is None) == (self.test_cases is None):
+            raise ValueError("Provide exactly one of suite_id or test_cases")
+        return self
+
 # --- RESPONSES ---
 class TestSuiteResponse(BaseModel):
     suite_id: str
@@ -22,3 +59,7 @@ class TestSuiteResponse(BaseModel):
 class CodeResponse(BaseModel):
     filename: str
     python_code: str
+
+class SuiteCodeResponse(BaseModel):
+    suite_id: Optional[str]
+    files: List[CodeResponse]
@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import aiofiles
+from pathlib import Path
+from typing import Optional, Tuple, Set
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Bytes buffered in memory before each write to the temp file
+UPLOAD_CHUNK_BYTES = int(os.getenv("ZETA_UPLOAD_CHUNK_BYTES", 1024 * 1024))
+UPLOAD_MAX_BYTES = int(os.getenv("ZETA_UPLOAD_MAX_MB", 100)) * 1024 * 1024
+UPLOAD_DIR = os.getenv("ZETA_UPLOAD_DIR") or None  # None -> system temp dir
+
+
+class UploadError(ValueError):
+    """Malformed or unacceptable upload; `status_code` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _FilePart:
+    """Callback state for the multipart parser: where the current part goes and how much it held."""
+
+    def __init__(self, field_name: str, allowed_suffixes: Set[str], max_bytes: int):
+        self.field_name = field_name
+        self.allowed_suffixes = allowed_suffixes
+        self.max_bytes = max_bytes
+        self.header_field = b""
+        self.header_value = b""
+        self.disposition = b""
+        self.filename: Optional[str] = None
+        self.capturing = False
+        self.done = False
+        self.size = 0
+        self.pending = bytearray()
+
+    def on_part_begin(self) -> None:
+        self.disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self.header_field.lower() == b"content-disposition":
+            self.disposition = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self.disposition)
+        if self.done or options.get(b"name", b"").decode("latin-1") != self.field_name:
+            return
+        raw_name = options.get(b"filename")
+        if not raw_name:
+            raise UploadError(f"Form field '{self.field_name}' must be a file")
+        # Keep only the base name; clients may send full paths
+        filename = Path(raw_name.decode("utf-8", errors="replace").replace("\\", "/")).name
+        if Path(filename).suffix.lower() not in self.allowed_suffixes:
+            raise UploadError(f"Unsupported file type. Allowed: {sorted(self.allowed_suffixes)}", 415)
+        self.filename = filename
+        self.capturing = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self.capturing:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise UploadError(f"Upload exceeds {self.max_bytes} bytes", 413)
+        self.pending += data[start:end]
+
+    def on_part_end(self) -> None:
+        if self.capturing:
+            self.capturing = False
+            self.done = True
+
+
+async def receive_upload(
+    request: Request,
+    allowed_suffixes: Set[str],
+    field_name: str = "file",
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+) -> Tuple[Path, int]:
+    """
+    Streams the `field_name` file of a multipart body to <temp dir>/<original name>.
+    The body is never held in memory: parser callbacks append into a buffer that is
+    flushed to disk every `chunk_bytes`, and the size cap is enforced while streaming.
+    Returns (path, size); the caller removes the file with `discard_upload`.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError("Expected a multipart/form-data body", 415)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + 64 * 1024:
+        raise UploadError(f"Upload exceeds {max_bytes} bytes", 413)
+
+    part = _FilePart(field_name, allowed_suffixes, max_bytes)
+    parser = MultipartParser(params[b"boundary"], callbacks={
+        "on_part_begin": part.on_part_begin,
+        "on_header_field": part.on_header_field,
+        "on_header_value": part.on_header_value,
+        "on_header_end": part.on_header_end,
+        "on_headers_finished": part.on_headers_finished,
+        "on_part_data": part.on_part_data,
+        "on_part_end": part.on_part_end,
+    })
+
+    workdir = Path(tempfile.mkdtemp(prefix="zeta-upload-", dir=UPLOAD_DIR))
+    target: Optional[Path] = None
+    out = None
+    try:
+        async for body_chunk in request.stream():
+            parser.write(body_chunk)
+            if part.filename and out is None:
+                target = workdir / part.filename
+                out = await aiofiles.open(target, "wb")
+            if out is not None and len(part.pending) >= chunk_bytes:
+                await out.write(bytes(part.pending))
+                part.pending.clear()
+        parser.finalize()
+        if out is None or target is None:
+            raise UploadError(f"Missing file field '{field_name}'")
+        if part.pending:
+            await out.write(bytes(part.pending))
+            part.pending.clear()
+        await out.close()
+        out = None
+        return target, part.size
+    except Exception:
+        if out is not None:
+            await out.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+
+def discard_upload(path: Path) -> None:
+    shutil.rmtree(path.parent, ignore_errors=True)
@@ -0,0 +1,119 @@
+import re
+import hashlib
+from typing import List, Union, Tuple
+from pydantic import BaseModel, Field
+from src.core.requirement_parser import ParsedDocument, PAGE_BREAK
+
+
+def section_hash(text: str) -> str:
+    """Whitespace-insensitive, so re-flowed PDF text does not count as an edit."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+class Section(BaseModel):
+    index: int
+    hash: str
+    title: str
+    content: str
+
+
+class DocumentChunk(BaseModel):
+    index: int
+    content: str
+    token_estimate: int
+    # Hashes of the sections in this chunk; with several, the content marks them [S1], [S2], ...
+    sections: List[str] = Field(default_factory=list)
+
+
+class DocumentChunker:
+    """
+    Splits requirement documents into LLM-sized chunks.
+    Cuts on page breaks and section headings first, then paragraphs, and only
+    hard-splits text when a single paragraph exceeds the token budget.
+    """
+
+    # Markdown headings ("## Login") or numbered headings ("3.2 Password Reset")
+    HEADING_PATTERN = re.compile(r"^(?:#{1,6}\s+\S|\d+(?:\.\d+)*\.?\s+[A-Z])", re.MULTILINE)
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, max_tokens: int = 7000):
+        self.max_tokens = max_tokens
+        self.max_chars = max_tokens * self.CHARS_PER_TOKEN
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        """Cheap heuristic (~4 chars/token for English); good enough for budgeting."""
+        return (len(text) + cls.CHARS_PER_TOKEN - 1) // cls.CHARS_PER_TOKEN
+
+    def split_sections(self, text: str) -> List[str]:
+        sections = []
+        for page in text.split(PAGE_BREAK):
+            starts = [m.start() for m in self.HEADING_PATTERN.finditer(page)]
+            if not starts or starts[0] != 0:
+                starts.insert(0, 0)
+            starts.append(len(page))
+            for begin, end in zip(starts, starts[1:]):
+                section = page[begin:end].strip()
+                if section:
+                    sections.append(section)
+        return sections
+
+    def _split_oversized(self, section: str) -> List[str]:
+        pieces = []
+        for paragraph in re.split(r"\n\s*\n", section):
+            while len(paragraph) > self.max_chars:
+                cut = paragraph.rfind("\n", 0, self.max_chars)
+                if cut <= 0:
+                    cut = paragraph.rfind(" ", 0, self.max_chars)
+                if cut <= 0:
+                    cut = self.max_chars
+                pieces.append(paragraph[:cut])
+                paragraph = paragraph[cut:].lstrip()
+            if paragraph.strip():
+                pieces.append(paragraph)
+        return pieces
+
+    def sections(self, document: Union[ParsedDocument, str]) -> List[Section]:
+        text = document.content if isinstance(document, ParsedDocument) else document
+        return [
+            Section(index=i, hash=section_hash(content), title=content.split("\n", 1)[0][:80], content=content)
+            for i, content in enumerate(self.split_sections(text))
+        ]
+
+    def chunk(self, document: Union[ParsedDocument, str]) -> List[DocumentChunk]:
+        return self.pack(self.sections(document), labels=False)
+
+    def pack(self, sections: List[Section], labels: bool = True) -> List[DocumentChunk]:
+        """
+        Packs sections into chunks. With `labels`, a chunk holding more than one
+        section marks each with [S<n>] so generated cases can name their source.
+        """
+        units: List[Tuple[str, str]] = []
+        for section in sections:
+            if len(section.content) > self.max_chars:
+                units.extend((section.hash, piece) for piece in self._split_oversized(section.content))
+            else:
+                units.append((section.hash, section.content))
+
+        # Greedy packing keeps neighbouring sections together for context
+        overhead = 8 if labels else 2
+        chunks: List[DocumentChunk] = []
+        buffer: List[Tuple[str, str]] = []
+        size = 0
+        for unit in units:
+            if buffer and size + len(unit[1]) + overhead > self.max_chars:
+                chunks.append(self._make_chunk(len(chunks), buffer, labels))
+                buffer, size = [], 0
+            buffer.append(unit)
+            size += len(unit[1]) + overhead
+        if buffer:
+            chunks.append(self._make_chunk(len(chunks), buffer, labels))
+        return chunks
+
+    def _make_chunk(self, index: int, units: List[Tuple[str, str]], labels: bool) -> DocumentChunk:
+        hashes = list(dict.fromkeys(h for h, _ in units))
+        if labels and len(hashes) > 1:
+            content = "\n\n".join(f"[S{hashes.index(h) + 1}]\n{text}" for h, text in units)
+        else:
+            content = "\n\n".join(text for _, text in units)
+        return DocumentChunk(index=index, content=content, token_estimate=self.estimate_tokens(content), sections=hashes)
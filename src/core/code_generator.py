@@ -1,8 +1,96 @@
 
-from jinja2 import Template
-from typing import Dict, Any
+from jinja2 import Environment
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple, Optional
 from loguru import logger
-import black 
+from src.core.metrics import stage
+import multiprocessing
+import threading
+import hashlib
+import asyncio
+import black
+import os
+import re
+
+CODEGEN_WORKERS = int(os.getenv("ZETA_CODEGEN_WORKERS", min(4, os.cpu_count() or 1)))
+FORMAT_CACHE_SIZE = int(os.getenv("ZETA_CODEGEN_CACHE_SIZE", 1024))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs threads (asyncio, executors) is unsafe
+        _pool = ProcessPoolExecutor(max_workers=CODEGEN_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def warm_codegen_pool() -> None:
+    """Starts the workers (and their black import) in the background, off the first request's path."""
+    pool = _get_pool()
+    for _ in range(CODEGEN_WORKERS):
+        pool.submit(format_source, "")
+
+def shutdown_codegen_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def format_source(raw_code: str) -> str:
+    """Worker-side black pass; unformattable source is returned as rendered."""
+    try:
+        return black.format_str(raw_code, mode=black.Mode())
+    except Exception:
+        return raw_code
+
+def _source_key(raw_code: str) -> str:
+    return hashlib.sha256(raw_code.encode("utf-8")).hexdigest()
+
+def _comment(value: Any) -> str:
+    """LLM text rendered after '#': collapsed onto one line so it cannot end the comment."""
+    return " ".join(str(value).split())
+
+def _identifier(value: Any) -> str:
+    name = re.sub(r"\W+", "_", str(value)).strip("_") or "action"
+    return f"_{name}" if name[0].isdigit() else name
+
+def _action(action: Any) -> Dict[str, str]:
+    if not isinstance(action, dict):
+        action = {"description": action}
+    return {"func_name": _identifier(action.get("func_name")), "description": _comment(action.get("description", ""))}
+
+
+class FormatCache:
+    """Thread-safe LRU of black output keyed on the SHA-256 of the rendered source."""
+
+    def __init__(self, max_items: int = FORMAT_CACHE_SIZE):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            code = self._items.get(key)
+            if code is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return code
+
+    def set(self, key: str, code: str) -> None:
+        with self._lock:
+            self._items[key] = code
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
 
 class SeleniumGenerator:
     TEST_TEMPLATE = """
@@ -12,7 +100,7 @@ from selenium import webdriver
 class GeneratedPage:
     def __init__(self, driver):
         self.driver = driver
-        self.url = "{{ url }}"
+        self.url = {{ url }}
     def load(self):
         self.driver.get(self.url)
 
@@ -42,18 +130,234 @@ def test_scenario(driver):
     assert "Title" in driver.title
 """
 
-    def generate_test_script(self, test_plan: Dict[str, Any]) -> str:
+    # Pooled mode: modules borrow the browser from the shared conftest.py instead of launching one
+    POOLED_TEST_TEMPLATE = """
+import pytest
+
+pytestmark = pytest.mark.risk({{ risk_level }})
+
+class GeneratedPage:
+    def __init__(self, driver):
+        self.driver = driver
+        self.url = {{ url }}
+    def load(self):
+        self.driver.get(self.url)
+
+    {% for action in actions %}
+    def {{ action.func_name }}(self):
+        # {{ action.description }}
+        pass 
+    {% endfor %}
+
+def test_scenario(driver):
+    # {{ case_id }}: {{ title }}
+    page = GeneratedPage(driver)
+    page.load()
+    {% if steps %}
+    # Manual Steps from AI:
+    {% for step in steps %}
+    # - {{ step }}
+    {% endfor %}
+    {% endif %}
+    assert "Title" in driver.title
+"""
+
+    CONFTEST_TEMPLATE = """
+import os
+import pytest
+
+# Collection order: CRITICAL modules run (and fail) first
+RISK_ORDER = {{ risk_order }}
+
+
+class StubDriver:
+    \"\"\"Browser stand-in for running the suite without Chrome (ZETA_DRIVER=stub).\"\"\"
+
+    def __init__(self):
+        self.title = "Title (stub)"
+        self.current_url = "about:blank"
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(("get", url))
+        self.current_url = url
+
+    def delete_all_cookies(self):
+        self.calls.append(("delete_all_cookies",))
+
+    def execute_script(self, script, *args):
+        self.calls.append(("execute_script", script))
+
+    def quit(self):
+        self.calls.append(("quit",))
+
+
+def _launch():
+    if os.getenv("ZETA_DRIVER", "chrome") == "stub":
+        return StubDriver()
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
+
+
+class DriverPool:
+    \"\"\"One browser per pytest session (so one per xdist worker), reset between tests.\"\"\"
+
+    def __init__(self):
+        self.driver = None
+        self.launches = 0
+
+    def acquire(self):
+        if self.driver is None:
+            self.driver = _launch()
+            self.launches += 1
+        return self.driver
+
+    def reset(self):
+        if self.driver is None:
+            return
         try:
-            template = Template(self.TEST_TEMPLATE)
-            raw_code = template.render(
-                url=test_plan.get("url", "https://example.com"),
-                actions=test_plan.get("actions", []),
-                steps=test_plan.get("steps", [])
-            )
+            self.driver.delete_all_cookies()
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            self.driver.get("about:blank")
+        except Exception:
+            # A browser that cannot be cleaned is replaced on the next acquire()
+            self.close()
+
+    def close(self):
+        if self.driver is not None:
             try:
-                return black.format_str(raw_code, mode=black.Mode())
-            except Exception:
-                return raw_code
+                self.driver.quit()
+            finally:
+                self.driver = None
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "risk(level): risk_level from Zeta's risk analysis")
+
+
+def pytest_collection_modifyitems(config, items):
+    def rank(item):
+        marker = item.get_closest_marker("risk")
+        return RISK_ORDER.get(marker.args[0] if marker else None, len(RISK_ORDER))
+
+    items.sort(key=rank)
+
+
+@pytest.fixture(scope="session")
+def driver_pool():
+    pool = DriverPool()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def driver(driver_pool):
+    yield driver_pool.acquire()
+    driver_pool.reset()
+"""
+
+    RISK_ORDER = {"CRITICAL": 0, "HIGH": 1, "NORMAL": 2}
+
+    # Compiled once per process; rendering is then a plain function call
+    ENVIRONMENT = Environment(autoescape=False, keep_trailing_newline=True)
+
+    def __init__(self, cache: Optional[FormatCache] = None):
+        self.template = self.ENVIRONMENT.from_string(self.TEST_TEMPLATE)
+        self.pooled_template = self.ENVIRONMENT.from_string(self.POOLED_TEST_TEMPLATE)
+        self.conftest = format_source(
+            self.ENVIRONMENT.from_string(self.CONFTEST_TEMPLATE).render(risk_order=repr(self.RISK_ORDER))
+        )
+        self.cache = cache if cache is not None else FormatCache()
+
+    @staticmethod
+    def risk_level(test_case: Dict[str, Any]) -> str:
+        analysis = test_case.get("risk_analysis") or {}
+        level = str(analysis.get("risk_level") or "NORMAL").upper()
+        return level if level in SeleniumGenerator.RISK_ORDER else "NORMAL"
+
+    def render(self, test_plan: Dict[str, Any], pooled: bool = False) -> str:
+        # Plan fields come from the LLM: literals go in through repr(), comments and names are sanitized
+        template = self.pooled_template if pooled else self.template
+        return template.render(
+            url=repr(str(test_plan.get("url", "https://example.com"))),
+            actions=[_action(action) for action in test_plan.get("actions", [])],
+            steps=[_comment(step) for step in test_plan.get("steps", [])],
+            case_id=_comment(test_plan.get("id", "")),
+            title=_comment(test_plan.get("title", "")),
+            risk_level=repr(self.risk_level(test_plan)),
+        )
+
+    def generate_test_script(self, test_plan: Dict[str, Any]) -> str:
+        try:
+            raw_code = self.render(test_plan)
+            key = _source_key(raw_code)
+            code = self.cache.get(key)
+            if code is None:
+                code = format_source(raw_code)
+                self.cache.set(key, code)
+            return code
         except Exception as e:
             logger.error(f"Gen Error: {e}")
             return f"# Error generating code: {e}"
+
+    async def generate_suite(self, test_cases: List[Dict[str, Any]], pooled: bool = False) -> List[Tuple[str, str]]:
+        """
+        Renders every case, then formats only the distinct, uncached sources,
+        fanned out across the codegen process pool. Returns (filename, code) in input order.
+
+        With `pooled`, modules share the browser from an emitted conftest.py and are
+        ordered by risk level (CRITICAL first); conftest.py is the last file.
+        """
+        if pooled:
+            test_cases = sorted(test_cases, key=lambda case: self.RISK_ORDER.get(self.risk_level(case), len(self.RISK_ORDER)))
+        with stage("codegen_render"):
+            rendered = [self.render(case, pooled=pooled) for case in test_cases]
+            keys = [_source_key(raw) for raw in rendered]
+
+        formatted: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for key, raw in zip(keys, rendered):
+            if key in formatted or key in missing:
+                continue
+            code = self.cache.get(key)
+            if code is None:
+                missing[key] = raw
+            else:
+                formatted[key] = code
+
+        with stage("codegen_format"):
+            if len(missing) == 1:
+                # Not worth a round trip to another process
+                (key, raw), = missing.items()
+                formatted[key] = await asyncio.to_thread(format_source, raw)
+            elif missing:
+                loop = asyncio.get_running_loop()
+                pool = _get_pool()
+                results = await asyncio.gather(*(loop.run_in_executor(pool, format_source, raw) for raw in missing.values()))
+                formatted.update(zip(missing, results))
+        for key in missing:
+            self.cache.set(key, formatted[key])
+
+        files = list(zip(self.suite_filenames(test_cases), (formatted[key] for key in keys)))
+        if pooled:
+            files.append(("conftest.py", self.conftest))
+        return files
+
+    @staticmethod
+    def suite_filenames(test_cases: List[Dict[str, Any]]) -> List[str]:
+        """test_<id>.py per case (pytest-collectable, unique within the suite)."""
+        names, seen = [], set()
+        for position, case in enumerate(test_cases, start=1):
+            stem = re.sub(r"[^0-9a-zA-Z]+", "_", str(case.get("id") or f"case_{position:03d}")).strip("_").lower()
+            name = f"test_{stem or f'case_{position:03d}'}"
+            candidate, n = name, 2
+            while candidate in seen:
+                candidate, n = f"{name}_{n}", n + 1
+            seen.add(candidate)
+            names.append(f"{candidate}.py")
+        return names
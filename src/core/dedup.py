@@ -0,0 +1,380 @@
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+from loguru import logger
+from pydantic import BaseModel, Field
+from src.core.metrics import DEDUP_REMOVED
+
+BASE_PATH = Path(__file__).resolve().parent.parent.parent
+DEDUP_ENABLED = os.getenv("ZETA_DEDUP", "1") == "1"
+# Estimated Jaccard similarity (of word shingles) at which two cases count as the same test
+DEDUP_THRESHOLD = float(os.getenv("ZETA_DEDUP_THRESHOLD", 0.65))
+DEDUP_NUM_PERM = int(os.getenv("ZETA_DEDUP_NUM_PERM", 128))
+DEDUP_SHINGLE = int(os.getenv("ZETA_DEDUP_SHINGLE", 2))
+DEDUP_DIR = Path(os.getenv("ZETA_DEDUP_DIR", BASE_PATH / ".zeta_data" / "dedup"))
+# Per project; past it the oldest tenth of the entries is dropped (0 disables the cap)
+DEDUP_MAX_ENTRIES = int(os.getenv("ZETA_DEDUP_MAX_ENTRIES", 100_000))
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Signatures must stay comparable across runs for persisted indexes
+_SEED = 1
+_STOPWORDS = frozenset("a an the to of and or is are be with in on for at by as that this it its".split())
+_STEP_NUMBER = re.compile(r"^\s*(?:step\s*)?\d+[.):]\s*", re.IGNORECASE)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+PROJECT_NAME = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def normalized_tokens(case: Dict[str, Any]) -> List[str]:
+    """Title, steps and test data, lower-cased, without step numbers, punctuation or stop words."""
+    steps = case.get("steps") or []
+    if isinstance(steps, str):
+        steps = [steps]
+    test_data = case.get("test_data") or {}
+    parts = [str(case.get("title", ""))]
+    parts.extend(_STEP_NUMBER.sub("", str(step)) for step in steps)
+    parts.append(json.dumps(test_data, sort_keys=True) if isinstance(test_data, (dict, list)) else str(test_data))
+    words = _NON_WORD.sub(" ", " ".join(parts).lower()).split()
+    return [w for w in words if w not in _STOPWORDS]
+
+
+def shingles(tokens: List[str], size: int = DEDUP_SHINGLE) -> List[str]:
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def lsh_params(threshold: float, num_perm: int, fn_weight: float = 0.9) -> Tuple[int, int]:
+    """
+    (bands, rows) minimizing the weighted false positive + false negative area around
+    `threshold`. Candidates are verified against the signatures anyway, so a false
+    positive only costs a comparison; a false negative is a duplicate that survives.
+    """
+    best, best_error = (num_perm, 1), float("inf")
+    xs = np.linspace(0, 1, 201)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        p = 1 - (1 - xs ** rows) ** bands
+        below = xs < threshold
+        error = float(np.mean(np.where(below, (1 - fn_weight) * p, fn_weight * (1 - p))))
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """MinHash signatures (uint32 x num_perm) from CRC32 shingle hashes and universal hashing mod 2^61-1."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, shingle_size: int = DEDUP_SHINGLE):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        gen = np.random.RandomState(_SEED)
+        self._a = gen.randint(1, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+        self._b = gen.randint(0, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+
+    def signature(self, case: Dict[str, Any]) -> np.ndarray:
+        grams = shingles(normalized_tokens(case), self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        permuted = ((hashes[:, None] * self._a + self._b) % _MERSENNE) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def is_empty(signature: np.ndarray) -> bool:
+        """Signature of a case with no title, steps or test data; it says nothing about similarity."""
+        return bool((signature == _MAX_HASH).all())
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures: candidates share at least one band, and are
+    confirmed by the estimated Jaccard similarity (fraction of equal signature slots).
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures: List[np.ndarray] = []
+        self.entries: List[Dict[str, Any]] = []
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, signature: np.ndarray, entry: Dict[str, Any]) -> int:
+        position = len(self.signatures)
+        self.signatures.append(signature)
+        self.entries.append(entry)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band][key].append(position)
+        return position
+
+    def query(self, signature: np.ndarray) -> List[Tuple[int, float]]:
+        """(position, similarity) of indexed signatures at or above the threshold, most similar first."""
+        candidates: Set[int] = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        matches = []
+        for position in candidates:
+            similarity = float(np.mean(self.signatures[position] == signature))
+            if similarity >= self.threshold:
+                matches.append((position, similarity))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+
+class ProjectIndex(LSHIndex):
+    """
+    An LSH index of a project's kept cases, saved as .npz so later runs dedupe against it.
+    `lock` guards the in-memory index; saving happens outside it, from a `snapshot`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        max_entries: int = DEDUP_MAX_ENTRIES,
+    ):
+        # Bumped on every change, so a slow save never overwrites a newer one
+        self.version = 0
+        super().__init__(threshold, num_perm)
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._saved_version = 0
+        if path.exists():
+            self._load()
+            self.trim()
+
+    def _load(self) -> None:
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                signatures = data["signatures"]
+                entries = json.loads(str(data["entries"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable dedup index {self.path}: {e}")
+            return
+        if signatures.ndim != 2 or signatures.shape[1] != self.num_perm:
+            logger.warning(f"Dedup index {self.path} was built with other MinHash settings; starting over")
+            return
+        for signature, entry in zip(signatures, entries):
+            self.add(signature, entry)
+
+    def add(self, signature: np.ndarray, entry: Dict[str, Any]) -> int:
+        self.version += 1
+        return super().add(signature, entry)
+
+    def _keep(self, keep: List[int]) -> None:
+        signatures, entries = self.signatures, self.entries
+        self._reset()
+        for i in keep:
+            self.add(signatures[i], entries[i])
+
+    def drop_suite(self, suite_id: str) -> int:
+        """Removes a suite's entries (buckets are rebuilt); returns how many there were."""
+        keep = [i for i, entry in enumerate(self.entries) if entry["suite_id"] != suite_id]
+        dropped = len(self.entries) - len(keep)
+        if dropped:
+            self._keep(keep)
+        return dropped
+
+    def trim(self) -> int:
+        """
+        Over `max_entries`, drops the oldest entries down to 90% of it, so the
+        buckets are not rebuilt on every save of a full index. Returns how many.
+        """
+        if self.max_entries <= 0 or len(self.entries) <= self.max_entries:
+            return 0
+        dropped = len(self.entries) - int(self.max_entries * 0.9)
+        self._keep(list(range(dropped, len(self.entries))))
+        logger.info(f"Dedup index {self.path.name} over {self.max_entries} entries; dropped the oldest {dropped}")
+        return dropped
+
+    def snapshot(self) -> Tuple[int, np.ndarray, str]:
+        """What `save` writes, copied while `lock` is held."""
+        signatures = np.stack(self.signatures) if self.signatures else np.empty((0, self.num_perm), dtype=np.uint32)
+        return self.version, signatures, json.dumps(self.entries)
+
+    def save(self, snapshot: Optional[Tuple[int, np.ndarray, str]] = None) -> None:
+        version, signatures, entries = snapshot if snapshot is not None else self.snapshot()
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp.npz")
+            np.savez_compressed(tmp, signatures=signatures, entries=np.array(entries))
+            os.replace(tmp, self.path)
+            self._saved_version = version
+
+
+class DedupResult(BaseModel):
+    test_cases: List[Dict[str, Any]]
+    removed: List[Dict[str, Any]] = Field(default_factory=list)
+    # Signatures of `test_cases`, in order, for adding them to a project index
+    signatures: List[Any] = Field(default_factory=list, exclude=True)
+
+
+def _merge_into(survivor: Dict[str, Any], duplicate: Dict[str, Any], similarity: float) -> None:
+    """The survivor inherits the duplicate's source sections, so incremental runs still see them."""
+    survivor.setdefault("merged_from", []).append({
+        "id": duplicate.get("id"),
+        "title": duplicate.get("title"),
+        "similarity": round(similarity, 3),
+    })
+    sources = (duplicate.get("provenance") or {}).get("sections") or []
+    if sources and "provenance" in survivor:
+        provenance = dict(survivor["provenance"])
+        known = set(provenance.get("sections") or [])
+        extra = [h for h in sources if h not in known]
+        if extra:
+            titles = dict(zip(duplicate["provenance"]["sections"], duplicate["provenance"].get("titles") or []))
+            provenance["sections"] = list(provenance["sections"]) + extra
+            provenance["titles"] = list(provenance.get("titles") or []) + [titles.get(h, "") for h in extra]
+            survivor["provenance"] = provenance
+
+
+class DedupSession:
+    """
+    `Deduplicator.run` one case at a time, for cases that arrive as a stream.
+    `add` returns the case as kept (later duplicates are merged into that dict)
+    or None when it duplicates a kept case or one of the project's other suites.
+    """
+
+    def __init__(self, hasher: MinHasher, threshold: float, project_index: Optional[ProjectIndex], exclude_suite: Optional[str]):
+        self.hasher = hasher
+        self.project_index = project_index
+        self.exclude_suite = exclude_suite
+        self._index = LSHIndex(threshold, hasher.num_perm)
+        self.test_cases: List[Dict[str, Any]] = []
+        self.signatures: List[np.ndarray] = []
+        self.removed: List[Dict[str, Any]] = []
+
+    def add(self, case: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        signature = self.hasher.signature(case)
+        # Cases with no text would all collide on the same empty signature
+        if not MinHasher.is_empty(signature):
+            match = self._index.query(signature)
+            if match:
+                survivor = self.test_cases[self._index.entries[match[0][0]]["position"]]
+                _merge_into(survivor, case, match[0][1])
+                self.removed.append({"id": case.get("id"), "title": case.get("title"), "duplicate_of": survivor.get("id"), "similarity": round(match[0][1], 3)})
+                DEDUP_REMOVED.inc(scope="suite")
+                return None
+            if self.project_index is not None and "risk_analysis" not in case:
+                with self.project_index.lock:
+                    known = [
+                        (p, s) for p, s in self.project_index.query(signature)
+                        if self.project_index.entries[p]["suite_id"] != self.exclude_suite
+                    ]
+                    entry = self.project_index.entries[known[0][0]] if known else None
+                if entry is not None:
+                    self.removed.append({"id": case.get("id"), "title": case.get("title"), "duplicate_of": entry, "similarity": round(known[0][1], 3)})
+                    DEDUP_REMOVED.inc(scope="project")
+                    return None
+            self._index.add(signature, {"position": len(self.test_cases)})
+        survivor = dict(case)
+        self.test_cases.append(survivor)
+        self.signatures.append(signature)
+        return survivor
+
+    def result(self) -> "DedupResult":
+        return DedupResult(test_cases=self.test_cases, removed=self.removed, signatures=self.signatures)
+
+
+class Deduplicator:
+    """
+    Near-duplicate removal between generation and analysis.
+    Within a suite, the first case (cases that already carry a risk analysis first)
+    survives and records what was merged into it. With a project index, newly
+    generated cases already covered by another suite of the project are dropped too.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        root: Path = DEDUP_DIR,
+        max_entries: int = DEDUP_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self._projects: Dict[str, ProjectIndex] = {}
+        self._lock = threading.Lock()
+
+    def project(self, name: str) -> ProjectIndex:
+        if not PROJECT_NAME.match(name):
+            raise ValueError(f"Invalid project name: {name!r}")
+        with self._lock:
+            index = self._projects.get(name)
+            if index is None:
+                index = self._projects[name] = ProjectIndex(
+                    self.root / f"{name}.npz", self.threshold, self.hasher.num_perm, self.max_entries
+                )
+            return index
+
+    def session(self, project: Optional[str] = None, exclude_suite: Optional[str] = None) -> DedupSession:
+        return DedupSession(self.hasher, self.threshold, self.project(project) if project else None, exclude_suite)
+
+    def run(
+        self,
+        test_cases: List[Dict[str, Any]],
+        project: Optional[str] = None,
+        exclude_suite: Optional[str] = None,
+    ) -> DedupResult:
+        session = self.session(project, exclude_suite)
+        kept: Dict[int, int] = {}
+        # Cases that are already analysed (carried over from a base suite) win ties
+        order = sorted(range(len(test_cases)), key=lambda i: "risk_analysis" not in test_cases[i])
+        for i in order:
+            if session.add(test_cases[i]) is not None:
+                kept[i] = len(session.test_cases) - 1
+        positions = [kept[i] for i in sorted(kept)]
+        return DedupResult(
+            test_cases=[session.test_cases[p] for p in positions],
+            removed=session.removed,
+            signatures=[session.signatures[p] for p in positions],
+        )
+
+    def remember(
+        self,
+        project: str,
+        suite_id: str,
+        test_cases: List[Dict[str, Any]],
+        signatures: List[np.ndarray],
+        replaces: Optional[str] = None,
+    ) -> None:
+        """
+        Adds a stored suite's cases to the project index and saves it. A suite
+        regenerated from `replaces` supersedes it: the older suite's entries are
+        dropped, so the next version is not checked against cases of its own lineage.
+        The file is written outside the index lock, so lookups are not held up by it.
+        """
+        index = self.project(project)
+        with index.lock:
+            if replaces is not None:
+                index.drop_suite(replaces)
+            for case, signature in zip(test_cases, signatures):
+                if not MinHasher.is_empty(signature):
+                    index.add(signature, {"suite_id": suite_id, "id": case.get("id"), "title": case.get("title")})
+            index.trim()
+            snapshot = index.snapshot()
+        index.save(snapshot)
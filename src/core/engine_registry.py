@@ -0,0 +1,115 @@
+import sys
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Sequence
+from loguru import logger
+from pydantic import BaseModel
+
+
+class EngineNotReady(RuntimeError):
+    """The engine is still warming up, or failed to build."""
+
+
+class EngineState(BaseModel):
+    name: str
+    status: str = "pending"  # pending -> loading -> ready | failed
+    required: bool = True
+    error: Optional[str] = None
+    seconds: Optional[float] = None
+    modules_imported: int = 0
+
+
+class EngineRegistry:
+    """
+    Named engines built by zero-argument factories, off the request path.
+    `start()` warms them up one after another in a worker thread, in registration
+    order, so the event loop keeps serving cheap endpoints meanwhile. Each built
+    engine is published into `resources`, the dict the endpoints read from.
+    An engine whose dependency failed is marked failed without being attempted.
+    """
+
+    def __init__(self, resources: Dict[str, Any]):
+        self.resources = resources
+        self.states: "OrderedDict[str, EngineState]" = OrderedDict()
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._depends_on: Dict[str, Sequence[str]] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def register(self, name: str, factory: Callable[[], Any], depends_on: Sequence[str] = (), required: bool = True) -> None:
+        if name in self.states:
+            raise ValueError(f"Engine already registered: {name}")
+        unknown = [dep for dep in depends_on if dep not in self.states]
+        if unknown:
+            raise ValueError(f"Engine {name} depends on unregistered engines: {unknown}")
+        self.states[name] = EngineState(name=name, required=required)
+        self._factories[name] = factory
+        self._depends_on[name] = tuple(depends_on)
+
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._events = {name: asyncio.Event() for name in self.states}
+            self._task = asyncio.create_task(self.warm_up())
+        return self._task
+
+    async def warm_up(self) -> None:
+        self.started_at = time.perf_counter()
+        for name, state in self.states.items():
+            failed = [dep for dep in self._depends_on[name] if self.states[dep].status != "ready"]
+            if failed:
+                state.status, state.error = "failed", f"dependency not ready: {', '.join(failed)}"
+            else:
+                await self._build(name, state)
+            if name in self._events:
+                self._events[name].set()
+        self.finished_at = time.perf_counter()
+        logger.info(f"Engine warm-up finished in {self.finished_at - self.started_at:.2f}s ({self.summary()})")
+
+    async def _build(self, name: str, state: EngineState) -> None:
+        state.status = "loading"
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        try:
+            engine = await asyncio.to_thread(self._factories[name])
+        except Exception as e:
+            state.status, state.error = "failed", str(e)
+            logger.critical(f"❌ Engine {name} failed to start: {e}")
+        else:
+            self.resources[name] = engine
+            state.status = "ready"
+        state.seconds = round(time.perf_counter() - started, 4)
+        state.modules_imported = len(sys.modules) - modules_before
+
+    async def wait(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Waits for `name` to finish warming up; raises EngineNotReady if it failed or timed out."""
+        if name not in self.states:
+            raise KeyError(name)
+        event = self._events.get(name)
+        if event is None:
+            raise EngineNotReady(f"Engine {name} has not been started")
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise EngineNotReady(f"Engine {name} is still {self.states[name].status}")
+        if self.states[name].status != "ready":
+            raise EngineNotReady(f"Engine {name} failed: {self.states[name].error}")
+        return self.resources[name]
+
+    def is_ready(self, *names: str) -> bool:
+        return all(self.states[name].status == "ready" for name in names)
+
+    @property
+    def ready(self) -> bool:
+        """Readiness: every required engine is built."""
+        return all(state.status == "ready" for state in self.states.values() if state.required)
+
+    def summary(self) -> str:
+        return ", ".join(f"{state.name}={state.status}" for state in self.states.values())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
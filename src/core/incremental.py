@@ -0,0 +1,104 @@
+import re
+from typing import List, Dict, Any, Optional, Set
+from pydantic import BaseModel, Field
+from src.core.chunker import Section, DocumentChunk
+
+_LABEL = re.compile(r"\d+")
+
+
+class RegenerationPlan(BaseModel):
+    """What a new document version needs: cases carried over, and sections to send to the LLM."""
+    # Every section of the new version, in document order
+    sections: List[Section] = Field(default_factory=list)
+    reused: List[Dict[str, Any]] = Field(default_factory=list)
+    changed: List[Section] = Field(default_factory=list)
+    removed_cases: int = 0
+
+
+class GenerationResult(BaseModel):
+    test_cases: List[Dict[str, Any]]
+    # Section hashes in document order; stored with the suite so the next version can diff against it
+    sections: List[str]
+    generated_sections: int
+    reused_cases: int = 0
+
+
+def attach_provenance(cases: List[Dict[str, Any]], chunk: DocumentChunk, titles: Dict[str, str]) -> None:
+    """
+    Replaces the model's `section` label ("S2") with the section's hash. Cases with
+    a missing or unknown label are tied to every section of their chunk, so they
+    are only reused while all of those sections stay unchanged.
+    """
+    for case in cases:
+        label = case.pop("section", None)
+        match = _LABEL.search(str(label)) if label is not None else None
+        position = int(match.group()) - 1 if match else -1
+        if len(chunk.sections) == 1:
+            hashes = chunk.sections
+        elif 0 <= position < len(chunk.sections):
+            hashes = [chunk.sections[position]]
+        else:
+            hashes = list(chunk.sections)
+        case["provenance"] = {"sections": hashes, "titles": [titles.get(h, "") for h in hashes]}
+
+
+def plan_regeneration(
+    sections: List[Section],
+    base_cases: List[Dict[str, Any]],
+    base_sections: List[str],
+) -> RegenerationPlan:
+    """
+    A base case is reused when every section it came from is still in the document
+    (same hash). Sections that are new, or that lost cases because a sibling section
+    they were generated with changed, are regenerated.
+    """
+    current = {s.hash for s in sections}
+    # Suites stored without their section list: every section that produced a case counts as known
+    known = set(base_sections) or {h for case in base_cases for h in (case.get("provenance") or {}).get("sections") or []}
+    plan = RegenerationPlan(sections=sections)
+    tainted: Set[str] = set()
+    for case in base_cases:
+        sources = (case.get("provenance") or {}).get("sections") or []
+        if sources and all(h in current for h in sources):
+            plan.reused.append(case)
+        else:
+            plan.removed_cases += 1
+            tainted.update(sources)
+    plan.changed = [s for s in sections if s.hash not in known or s.hash in tainted]
+    return plan
+
+
+def order_cases(
+    sections: List[Section],
+    cases: List[Dict[str, Any]],
+    renumber: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Document order: by the first source section, keeping generation order within it.
+    Renumbered IDs (TC_001, ...), see `renumbered`.
+    """
+    position: Dict[str, int] = {}
+    for section in sections:
+        position.setdefault(section.hash, section.index)
+
+    def key(case: Dict[str, Any]) -> int:
+        sources = (case.get("provenance") or {}).get("sections") or []
+        return min((position[h] for h in sources if h in position), default=len(sections))
+
+    ordered = sorted(cases, key=key)
+    if not renumber:
+        return ordered
+    return [renumbered(case, number) for number, case in enumerate(ordered, 1)]
+
+
+def renumbered(case: Dict[str, Any], number: int, source_chunk: Optional[int] = None) -> Dict[str, Any]:
+    """
+    A copy of `case` with ID TC_<number>. The LLM numbers every chunk from TC_001,
+    so its own ID is kept as `source_id` (a carried-over case keeps its original one).
+    """
+    result = case.copy()
+    result.setdefault("source_id", case.get("id"))
+    if source_chunk is not None:
+        result["source_chunk"] = source_chunk
+    result["id"] = f"TC_{number:03d}"
+    return result
@@ -0,0 +1,158 @@
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Sequence
+from loguru import logger
+from pydantic import BaseModel, Field
+
+# (suite_id, document) -> merged test cases, stored under suite_id. Documents are opaque to the queue.
+ItemProcessor = Callable[[str, Any], Awaitable[List[Dict[str, Any]]]]
+
+
+class BatchItem(BaseModel):
+    index: int
+    suite_id: str
+    status: str = "queued"
+    test_cases: List[Dict[str, Any]] = Field(default_factory=list)
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class BatchJob(BaseModel):
+    job_id: str
+    status: str = "queued"
+    created_at: float
+    finished_at: Optional[float] = None
+    items: List[BatchItem] = Field(default_factory=list)
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+
+class BatchJobQueue:
+    """
+    In-process async job queue for batch generation.
+    A fixed pool of worker tasks pulls (job, item) pairs so at most `concurrency`
+    documents are in flight; upstream quota is enforced by the LLM engine's rate limiter.
+    """
+
+    def __init__(self, process_item: ItemProcessor, concurrency: int = 4, max_jobs: int = 1000):
+        self.process_item = process_item
+        self.concurrency = concurrency
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[tuple, asyncio.Task] = {}
+        self._pending: Dict[tuple, Any] = {}
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+            logger.info(f"Batch queue started with {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        for task in list(self._running.values()) + self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, documents: Sequence[Any]) -> BatchJob:
+        job = BatchJob(
+            job_id=str(uuid.uuid4()),
+            created_at=time.time(),
+            items=[BatchItem(index=i, suite_id=str(uuid.uuid4())) for i in range(len(documents))],
+        )
+        self._remember(job)
+        for i, document in enumerate(documents):
+            self._pending[(job.job_id, i)] = document
+            self._queue.put_nowait((job.job_id, i))
+        logger.info(f"Batch job {job.job_id} queued with {len(documents)} document(s)")
+        return job
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[BatchJob]:
+        job = self.jobs.get(job_id)
+        if job is None or job.is_terminal:
+            return job
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        for item in job.items:
+            if item.status in ("queued", "running"):
+                item.status = "cancelled"
+                task = self._running.get((job_id, item.index))
+                if task is not None:
+                    task.cancel()
+        logger.info(f"Batch job {job_id} cancelled")
+        return job
+
+    def _remember(self, job: BatchJob) -> None:
+        self.jobs[job.job_id] = job
+        # Evict the oldest finished jobs; unfinished ones are never dropped
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((j for j in self.jobs.values() if j.is_terminal), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest.job_id]
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job_id, index = await self._queue.get()
+            try:
+                await self._run_item(job_id, index)
+            except Exception as e:
+                logger.error(f"Batch worker {worker_id} crashed on {job_id}[{index}]: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_item(self, job_id: str, index: int) -> None:
+        document = self._pending.pop((job_id, index), None)
+        job = self.jobs.get(job_id)
+        if job is None or document is None or job.status == "cancelled":
+            return
+        item = job.items[index]
+        job.status = "running"
+        item.status = "running"
+        item.started_at = time.time()
+
+        async def process() -> List[Dict[str, Any]]:
+            return await self.process_item(item.suite_id, document)
+
+        task = asyncio.create_task(process())
+        self._running[(job_id, index)] = task
+        try:
+            item.test_cases = await task
+            item.status = "completed"
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            item.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Batch item {job_id}[{index}] failed: {e}")
+            item.status = "failed"
+            item.error = str(e)
+        finally:
+            self._running.pop((job_id, index), None)
+            item.finished_at = time.time()
+        self._finish_if_done(job)
+
+    def _finish_if_done(self, job: BatchJob) -> None:
+        if job.is_terminal or any(item.status in ("queued", "running") for item in job.items):
+            return
+        failed = all(item.status == "failed" for item in job.items)
+        job.status = "failed" if failed else "completed"
+        job.finished_at = time.time()
+        logger.info(f"Batch job {job.job_id} {job.status}")
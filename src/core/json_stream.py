@@ -0,0 +1,187 @@
+import re
+import json
+from typing import List, Dict, Any
+from loguru import logger
+from pydantic import BaseModel
+
+_ARRAY_OF_OBJECTS = re.compile(r"\[\s*\{")
+# Where a streamed array starts: "[{", or an empty "[]"
+_ARRAY_START = re.compile(r"\[\s*[{\]]")
+_OPEN_BRACKET_TAIL = re.compile(r"\[\s*$")
+
+
+def _strip_trailing_commas(raw: str) -> str:
+    """Drops commas directly before a closing brace/bracket, leaving string contents alone."""
+    out: List[str] = []
+    comma = -1  # index in `out` of a comma that may turn out to be trailing
+    in_string = escape = False
+    for ch in raw:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            comma = -1
+        elif ch == ",":
+            comma = len(out)
+        elif ch in "}]":
+            if comma >= 0:
+                del out[comma]
+                comma = -1
+        elif not ch.isspace():
+            comma = -1
+        out.append(ch)
+    return "".join(out)
+
+
+def repair_object(raw: str) -> Any:
+    """
+    Best-effort repair of a single JSON object emitted by the LLM.
+    Handles trailing commas and raw newlines/tabs inside strings.
+    Raises json.JSONDecodeError if the object is still unreadable.
+    """
+    try:
+        return json.loads(raw, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(_strip_trailing_commas(raw), strict=False)
+
+
+class IncrementalArrayParser:
+    """
+    Incremental parser for a streamed JSON array of objects.
+    Feed it text fragments as they arrive; every top-level object is returned
+    as soon as its closing brace is seen. Anything before the opening "[{"
+    (markdown fences, stray prose such as "here are [15] cases") is ignored.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._pending: List[str] = []
+        self._head = ""
+        self.skipped = 0
+        self.repaired = 0
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    @property
+    def has_partial(self) -> bool:
+        """True if an object was opened but its closing brace never arrived."""
+        return self._depth > 0
+
+    def feed(self, fragment: str) -> List[Dict[str, Any]]:
+        objects: List[Dict[str, Any]] = []
+        if self._finished:
+            return objects
+
+        i = 0
+        if not self._started:
+            # The "[" and "{" can arrive in different fragments
+            head = self._head + fragment
+            start = _ARRAY_START.search(head)
+            if start is None:
+                tail = _OPEN_BRACKET_TAIL.search(head)
+                self._head = tail.group() if tail else ""
+                return objects
+            self._started = True
+            self._head = ""
+            fragment = head
+            i = start.start() + 1
+        n = len(fragment)
+
+        obj_start = 0 if self._depth > 0 else -1
+        while i < n:
+            ch = fragment[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    obj_start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pending.append(fragment[obj_start:i + 1])
+                    self._emit("".join(self._pending), objects)
+                    self._pending = []
+                    obj_start = -1
+            elif ch == "]" and self._depth == 0:
+                self._finished = True
+                break
+            i += 1
+
+        if self._depth > 0 and obj_start >= 0:
+            self._pending.append(fragment[obj_start:])
+        return objects
+
+    def _emit(self, raw: str, objects: List[Dict[str, Any]]) -> None:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                value = repair_object(raw)
+                self.repaired += 1
+            except json.JSONDecodeError as e:
+                self.skipped += 1
+                logger.warning(f"Skipping malformed test case object: {e}")
+                return
+        if isinstance(value, dict):
+            objects.append(value)
+
+
+class SalvageResult(BaseModel):
+    test_cases: List[Dict[str, Any]]
+    salvaged: int = 0
+    dropped: int = 0
+    repaired: bool = False
+
+
+def salvage_test_cases(text: str) -> SalvageResult:
+    """
+    Tolerant parse of a complete LLM response.
+    Fast path is a strict json.loads; on failure every complete object in the
+    array is recovered (prose/fences skipped, trailing commas fixed) and a
+    truncated final object is counted as dropped instead of failing the call.
+    """
+    clean_text = text.strip()
+    if clean_text.startswith("```json"):
+        clean_text = clean_text[7:-3]
+    elif clean_text.startswith("```"):
+        clean_text = clean_text[3:-3]
+
+    try:
+        data = json.loads(clean_text)
+        if isinstance(data, dict):
+            # Some responses wrap the array: {"test_cases": [...]}
+            data = next((v for v in data.values() if isinstance(v, list)), None)
+        if isinstance(data, list):
+            cases = [case for case in data if isinstance(case, dict)]
+            return SalvageResult(test_cases=cases, dropped=len(data) - len(cases))
+    except json.JSONDecodeError:
+        pass
+
+    # Anchor on "[{" so prose like "here are [15] cases" is not mistaken for the array
+    start = _ARRAY_OF_OBJECTS.search(text)
+    parser = IncrementalArrayParser()
+    # Without an array, treat bare objects as if they were wrapped in one
+    cases = parser.feed(text[start.start():] if start else "[" + text)
+
+    dropped = parser.skipped + (1 if parser.has_partial else 0)
+    return SalvageResult(test_cases=cases, salvaged=len(cases), dropped=dropped, repaired=True)
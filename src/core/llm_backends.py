@@ -0,0 +1,407 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from datetime import timedelta
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, Deque, Optional, AsyncIterator, Awaitable, Callable, List, Tuple
+from loguru import logger
+from src.core.chunker import DocumentChunker
+from src.core.metrics import record_stage, record_tokens, HEDGED_CALLS, SINGLEFLIGHT_SHARED, BACKEND_TIMEOUTS
+from src.core.rate_limiter import RateLimiter
+
+# Primary backend: "gemini" or "stub" (offline, deterministic)
+LLM_BACKEND = os.getenv("ZETA_LLM_BACKEND", "gemini")
+LLM_TIMEOUT = float(os.getenv("ZETA_LLM_TIMEOUT", 60))
+# Hedging: a second model raced against the primary once it is slower than its recent pXX
+HEDGE_MODEL = os.getenv("ZETA_LLM_HEDGE_MODEL", "")  # empty disables hedging
+HEDGE_TIMEOUT = float(os.getenv("ZETA_LLM_HEDGE_TIMEOUT", LLM_TIMEOUT))
+HEDGE_PERCENTILE = float(os.getenv("ZETA_LLM_HEDGE_PERCENTILE", 95))
+# Used until enough latencies are recorded, and as a floor so fast minutes don't hedge every call
+HEDGE_MIN_DELAY = float(os.getenv("ZETA_LLM_HEDGE_MIN_DELAY", 2.0))
+HEDGE_INITIAL_DELAY = float(os.getenv("ZETA_LLM_HEDGE_INITIAL_DELAY", 10.0))
+# Gemini context caching of the static prompt prefix (billed storage; off by default)
+CONTEXT_CACHE = os.getenv("ZETA_GEMINI_CONTEXT_CACHE", "0") == "1"
+CONTEXT_CACHE_TTL = int(os.getenv("ZETA_GEMINI_CONTEXT_CACHE_TTL", 3600))
+# Gemini rejects cached contents below a model-dependent minimum (1024 tokens for 2.5 Flash)
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("ZETA_GEMINI_CONTEXT_CACHE_MIN_TOKENS", 1024))
+
+_genai_module = None
+
+def _genai():
+    """
+    google.generativeai takes about a second to import, so it is loaded (and
+    configured) by the first Gemini backend constructed rather than at module import.
+    """
+    global _genai_module
+    if _genai_module is None:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            logger.critical("GEMINI_API_KEY is missing")
+            raise ValueError("GEMINI_API_KEY not found in environment")
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        _genai_module = genai
+    return _genai_module
+
+
+class LLMBackend(ABC):
+    """One upstream model. `generate` returns the raw response text; `stream` yields text fragments."""
+
+    name: str = "backend"
+    timeout: float = LLM_TIMEOUT
+    # SDK model object, for backends that wrap one (Gemini); tests and benchmarks swap in fakes here
+    model: Any = None
+
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        ...
+
+    def set_prefix(self, prefix: str) -> None:
+        """Static text every prompt starts with. Backends that can cache it server-side do."""
+
+
+def _record_usage(usage: Any, prompt: str, text: str) -> None:
+    """Gemini's usage_metadata when the response has it, the chars/4 estimate otherwise."""
+    record_tokens(
+        prompt=getattr(usage, "prompt_token_count", 0) or DocumentChunker.estimate_tokens(prompt),
+        response=getattr(usage, "candidates_token_count", 0) or DocumentChunker.estimate_tokens(text),
+        cached=getattr(usage, "cached_content_token_count", 0) or 0,
+    )
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Any object with genai.GenerativeModel's `generate_content_async` works as `model`,
+    which is how tests and benchmarks plug in fakes.
+    With `context_cache`, the prompt prefix is uploaded once as a Gemini CachedContent
+    and calls whose prompt starts with it only send the remainder.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        timeout: float = LLM_TIMEOUT,
+        model: Any = None,
+        context_cache: bool = CONTEXT_CACHE,
+        cache_ttl: int = CONTEXT_CACHE_TTL,
+    ):
+        self.name = model_name
+        self.timeout = timeout
+        self.model = model if model is not None else _genai().GenerativeModel(model_name)
+        self.context_cache = context_cache
+        self.cache_ttl = cache_ttl
+        self.prefix = ""
+        self._cached_model: Any = None
+        self._cache_expires = 0.0
+        # A thread lock, not an asyncio one: creation runs in a worker thread
+        self._cache_lock = threading.Lock()
+
+    def set_prefix(self, prefix: str) -> None:
+        with self._cache_lock:
+            if prefix == self.prefix:
+                return
+            # The old CachedContent is left to expire on its TTL
+            self.prefix = prefix
+            self._cached_model = None
+            self._cache_expires = 0.0
+
+    def _create_cached_model(self) -> Any:
+        with self._cache_lock:
+            if self._cached_model is not None and time.time() < self._cache_expires - 60:
+                return self._cached_model
+            if DocumentChunker.estimate_tokens(self.prefix) < CONTEXT_CACHE_MIN_TOKENS:
+                logger.info(f"Prompt prefix below {CONTEXT_CACHE_MIN_TOKENS} tokens; context caching skipped")
+                self.context_cache = False
+                return None
+            genai = _genai()
+            try:
+                from google.generativeai import caching
+                cached = caching.CachedContent.create(
+                    model=self.name,
+                    display_name="zeta-prompt-prefix",
+                    contents=[self.prefix],
+                    ttl=timedelta(seconds=self.cache_ttl),
+                )
+            except Exception as e:
+                logger.warning(f"Gemini context caching unavailable, sending full prompts: {e}")
+                self.context_cache = False
+                return None
+            self._cache_expires = time.time() + self.cache_ttl
+            self._cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            logger.info(f"Cached the prompt prefix on {self.name} for {self.cache_ttl}s")
+            return self._cached_model
+
+    async def _model_for(self, prompt: str) -> Tuple[Any, str]:
+        if not (self.context_cache and self.prefix and prompt.startswith(self.prefix)):
+            return self.model, prompt
+        model = self._cached_model
+        if model is None or time.time() >= self._cache_expires - 60:
+            model = await asyncio.to_thread(self._create_cached_model)
+        if model is None:
+            return self.model, prompt
+        return model, prompt[len(self.prefix):]
+
+    async def generate(self, prompt: str) -> str:
+        model, contents = await self._model_for(prompt)
+        response = await model.generate_content_async(contents)
+        _record_usage(getattr(response, "usage_metadata", None), prompt, response.text)
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        model, contents = await self._model_for(prompt)
+        response = await model.generate_content_async(contents, stream=True)
+        parts: List[str] = []
+        usage = None
+        async for chunk in response:
+            # The final chunk carries the usage totals
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            parts.append(chunk.text)
+            yield chunk.text
+        _record_usage(usage, prompt, "".join(parts))
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline backend: a fixed delay, then `respond(prompt)` or a deterministic
+    one-case array derived from the prompt. Used for local runs (ZETA_LLM_BACKEND=stub) and tests.
+    """
+
+    def __init__(
+        self,
+        name: str = "stub",
+        latency: float = 0.0,
+        timeout: float = LLM_TIMEOUT,
+        respond: Optional[Callable[[str], str]] = None,
+        stream_chunk_chars: int = 64,
+    ):
+        self.name = name
+        self.latency = latency
+        self.timeout = timeout
+        self.respond = respond or self._default_response
+        self.stream_chunk_chars = stream_chunk_chars
+        self.calls = 0
+
+    @staticmethod
+    def _default_response(prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return json.dumps([{
+            "id": "TC_001",
+            "title": f"Stub scenario {digest}",
+            "preconditions": "None",
+            "steps": ["Open the application", "Perform the described action"],
+            "expected_result": "The system behaves as specified",
+            "priority": "Medium",
+        }])
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        text = self.respond(prompt)
+        _record_usage(None, prompt, text)
+        return text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        text = await self.generate(prompt)
+        for i in range(0, len(text), self.stream_chunk_chars):
+            yield text[i:i + self.stream_chunk_chars]
+
+
+class LatencyWindow:
+    """Latencies of the last `size` successful calls; percentiles over that window."""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of `fn` (Go's singleflight)."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        while future is not None:
+            SINGLEFLIGHT_SHARED.inc()
+            try:
+                # shield: a cancelled follower must not cancel the leader's call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not future.cancelled() or (task is not None and task.cancelling()):
+                    raise
+            # The leader was cancelled (its client went away); the next caller takes over
+            future = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # mark retrieved; followers (if any) re-raise it
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class BackendRouter:
+    """
+    Primary backend with per-backend timeouts and optional hedging.
+    When the primary has not answered by its recent `hedge_percentile` latency
+    (never earlier than `min_delay`), the same prompt is sent to `hedge` and the
+    first successful answer wins; the slower call is cancelled. The hedge is a
+    request of its own, so it takes a `rate_limiter` token like any other call.
+    Response tokens of every call that answers are charged to `rate_limiter` here.
+    """
+
+    def __init__(
+        self,
+        primary: LLMBackend,
+        hedge: Optional[LLMBackend] = None,
+        hedge_percentile: float = HEDGE_PERCENTILE,
+        min_delay: float = HEDGE_MIN_DELAY,
+        initial_delay: float = HEDGE_INITIAL_DELAY,
+        min_samples: int = 20,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.primary = primary
+        self.hedge = hedge
+        self.rate_limiter = rate_limiter
+        self.hedge_percentile = hedge_percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.latency: Dict[str, LatencyWindow] = {primary.name: LatencyWindow()}
+        if hedge is not None:
+            self.latency.setdefault(hedge.name, LatencyWindow())
+
+    @property
+    def name(self) -> str:
+        return self.primary.name if self.hedge is None else f"{self.primary.name}+{self.hedge.name}"
+
+    def set_prefix(self, prefix: str) -> None:
+        self.primary.set_prefix(prefix)
+        if self.hedge is not None:
+            self.hedge.set_prefix(prefix)
+
+    def hedge_delay(self) -> float:
+        window = self.latency[self.primary.name]
+        percentile = window.percentile(self.hedge_percentile)
+        if len(window.samples) < self.min_samples or percentile is None:
+            return max(self.min_delay, self.initial_delay)
+        return max(self.min_delay, percentile)
+
+    async def _call(self, backend: LLMBackend, prompt: str) -> str:
+        started = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(backend.generate(prompt), backend.timeout)
+        except asyncio.TimeoutError:
+            BACKEND_TIMEOUTS.inc(backend=backend.name)
+            raise TimeoutError(f"{backend.name} did not answer within {backend.timeout:.0f}s")
+        elapsed = time.perf_counter() - started
+        self.latency[backend.name].add(elapsed)
+        record_stage("llm_call", elapsed)
+        if self.rate_limiter is not None:
+            # Gemini's TPM quota counts output tokens too, for every call that answered
+            self.rate_limiter.record(DocumentChunker.estimate_tokens(text))
+        return text
+
+    async def generate(self, prompt: str) -> str:
+        if self.hedge is None:
+            return await self._call(self.primary, prompt)
+
+        started = time.perf_counter()
+        tasks: List[asyncio.Task] = []
+        # Everything from the first task on sits in the try: a cancelled caller cancels both calls
+        try:
+            primary = asyncio.create_task(self._call(self.primary, prompt))
+            tasks.append(primary)
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+            if done:
+                return primary.result()
+
+            HEDGED_CALLS.inc(result="started")
+            tasks.append(asyncio.create_task(self._call_hedge(self.hedge, prompt)))
+            pending = set(tasks)
+            errors: List[BaseException] = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        HEDGED_CALLS.inc(result="primary_won" if task is primary else "hedge_won")
+                        return task.result()
+                    errors.append(error)
+            # Both failed: surface the primary's error, it is the one tenacity knows how to judge
+            HEDGED_CALLS.inc(result="both_failed")
+            raise primary.exception() or errors[0]
+        finally:
+            if len(tasks) > 1 and not tasks[0].done():
+                # Censored sample: the primary took at least this long. Without it a slow
+                # primary that always loses would never raise its own hedge delay.
+                self.latency[self.primary.name].add(time.perf_counter() - started)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call_hedge(self, backend: LLMBackend, prompt: str) -> str:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(DocumentChunker.estimate_tokens(prompt))
+        return await self._call(backend, prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Primary only: once fragments are yielded there is nothing to race. The timeout applies per fragment."""
+        started = time.perf_counter()
+        iterator = self.primary.stream(prompt).__aiter__()
+        first = True
+        while True:
+            try:
+                fragment = await asyncio.wait_for(iterator.__anext__(), self.primary.timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                BACKEND_TIMEOUTS.inc(backend=self.primary.name)
+                raise TimeoutError(f"{self.primary.name} stalled for {self.primary.timeout:.0f}s mid-stream")
+            if first:
+                record_stage("llm_first_chunk", time.perf_counter() - started)
+                first = False
+            yield fragment
+
+
+def build_backend(model_name: str) -> BackendRouter:
+    """Backend stack from ZETA_LLM_* settings."""
+    if LLM_BACKEND == "stub":
+        primary: LLMBackend = StubBackend(timeout=LLM_TIMEOUT)
+    else:
+        primary = GeminiBackend(model_name, timeout=LLM_TIMEOUT)
+    hedge = None
+    if HEDGE_MODEL:
+        hedge = StubBackend(name="stub-hedge", timeout=HEDGE_TIMEOUT) if HEDGE_MODEL == "stub" else GeminiBackend(HEDGE_MODEL, timeout=HEDGE_TIMEOUT)
+    return BackendRouter(primary, hedge)
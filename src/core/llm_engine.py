@@ -1,106 +1,376 @@
 import os
-import json
-import yaml
+import time
+import asyncio
 from pathlib import Path
-from typing import List, Dict, Any
-import google.generativeai as genai
+from typing import List, Dict, Any, Optional, Union, AsyncIterator
 from loguru import logger
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from dotenv import load_dotenv
+from src.core.response_cache import ResponseCache
+from src.core.metrics import stage, record_stage, LLM_CALLS, LLM_RETRIES
+from src.core.llm_backends import BackendRouter, SingleFlight, build_backend
+from src.core.prompts import PromptLoader, PromptTemplate, PROMPT_INPUT_TOKENS
+from src.core.rate_limiter import RateLimiter
+from src.core.requirement_parser import ParsedDocument
+from src.core.chunker import DocumentChunker
+from src.core.incremental import (
+    GenerationResult, RegenerationPlan, attach_provenance, plan_regeneration, order_cases, renumbered,
+)
+from src.core.json_stream import IncrementalArrayParser, SalvageResult, salvage_test_cases
+from google.api_core import exceptions as google_exceptions
 
 # Load Env
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    logger.critical("GEMINI_API_KEY is missing")
-    raise ValueError("GEMINI_API_KEY not found in environment")
+BASE_PATH = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = Path(os.getenv("ZETA_CACHE_DIR", BASE_PATH / ".zeta_cache"))
+CHUNK_TOKENS = int(os.getenv("ZETA_CHUNK_TOKENS", 7000))
+# A chunk larger than the prompt's input budget would be cut short and its tail never generated
+if PROMPT_INPUT_TOKENS > 0 and CHUNK_TOKENS > PROMPT_INPUT_TOKENS:
+    raise ValueError(
+        f"ZETA_CHUNK_TOKENS ({CHUNK_TOKENS}) exceeds ZETA_PROMPT_INPUT_TOKENS ({PROMPT_INPUT_TOKENS}); "
+        "lower the chunk size or raise the prompt budget"
+    )
+LLM_CONCURRENCY = int(os.getenv("ZETA_LLM_CONCURRENCY", 8))
+# Gemini quota (0 disables the bucket). Shared by every call made through one engine.
+GEMINI_RPM = float(os.getenv("ZETA_GEMINI_RPM", 60))
+GEMINI_TPM = float(os.getenv("ZETA_GEMINI_TPM", 1_000_000))
+RATE_LIMIT_PAUSE_SECONDS = 10
+
+# Only transport/quota failures are worth another full LLM call; bad JSON is salvaged instead
+TRANSIENT_ERRORS = (
+    google_exceptions.ServerError,
+    google_exceptions.TooManyRequests,
+    ConnectionError,
+    TimeoutError,
+)
 
-genai.configure(api_key=API_KEY)
+def _count_retry(retry_state) -> None:
+    LLM_RETRIES.inc(reason=type(retry_state.outcome.exception()).__name__)
 
 class LLMEngine:
     """
     LLM Engine with Externalized Configuration.
-    Loads prompts from config/prompts.yaml to ensure code/data separation.
+    Loads prompts from config/prompts.yaml to ensure code/data separation;
+    edits to the file are picked up without a restart.
+    Upstream calls go through a BackendRouter (timeouts, hedging); identical
+    prompts in flight at the same time share one call.
     """
 
-    def __init__(self, model_name: str = "gemini-2.5-flash"):
+    def __init__(
+        self,
+        model_name: str = "gemini-2.5-flash",
+        cache: Optional[ResponseCache] = None,
+        backend: Optional[BackendRouter] = None,
+    ):
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
-        self.prompts = self._load_prompts()
-        logger.info(f"LLM Engine initialized with {model_name}")
-
-    def _load_prompts(self) -> Dict[str, Any]:
-        """Loads prompt templates from the config directory."""
-        # Resolves path relative to this file: src/core/../../config/prompts.yaml
-        base_path = Path(__file__).resolve().parent.parent.parent
-        config_path = base_path / "config" / "prompts.yaml"
-        
-        if not config_path.exists():
-            raise FileNotFoundError(f"Configuration file not found at: {config_path}")
-            
-        with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+        self.backend = backend if backend is not None else build_backend(model_name)
+        self.singleflight = SingleFlight()
+        self.prompt_loader = PromptLoader(on_reload=self._on_prompts_reload)
+        self.backend.set_prefix(self.prompt_loader.template.prefix)
+        self.cache = cache if cache is not None else self._build_cache()
+        self.chunker = DocumentChunker(max_tokens=CHUNK_TOKENS)
+        self.rate_limiter = RateLimiter(requests_per_minute=GEMINI_RPM, tokens_per_minute=GEMINI_TPM)
+        # Hedged calls count against the same quota as the primary ones
+        self.backend.rate_limiter = self.rate_limiter
+        self.parse_stats = {"responses": 0, "repaired_responses": 0, "salvaged_cases": 0, "dropped_cases": 0}
+        logger.info(
+            f"LLM Engine initialized with {self.backend.name} "
+            f"(prompts v{self.prompts_version}, ~{self.prompt_loader.template.static_tokens} static tokens)"
+        )
+
+    @property
+    def model(self) -> Any:
+        """The primary backend's model object; assignable so tests and benchmarks can swap in fakes."""
+        return self.backend.primary.model
+
+    @model.setter
+    def model(self, model: Any) -> None:
+        self.backend.primary.model = model
+
+    @property
+    def prompts(self) -> Dict[str, Any]:
+        return self.prompt_loader.prompts
+
+    @property
+    def prompts_version(self) -> str:
+        return self.prompt_loader.template.version
+
+    def _on_prompts_reload(self, template: PromptTemplate) -> None:
+        # New version -> new response cache keys; the new prefix replaces the cached one
+        self.backend.set_prefix(template.prefix)
+
+    @staticmethod
+    def _build_cache() -> Optional[ResponseCache]:
+        """Cache settings come from the environment so CI and prod can tune them independently."""
+        if os.getenv("ZETA_LLM_CACHE", "1") == "0":
+            logger.info("LLM response cache disabled (ZETA_LLM_CACHE=0)")
+            return None
+        return ResponseCache(
+            db_path=str(CACHE_DIR / "llm_responses.sqlite"),
+            max_memory_items=int(os.getenv("ZETA_LLM_CACHE_MEMORY_ITEMS", 256)),
+            max_disk_bytes=int(os.getenv("ZETA_LLM_CACHE_MAX_MB", 256)) * 1024 * 1024,
+            ttl_seconds=int(os.getenv("ZETA_LLM_CACHE_TTL", 7 * 24 * 3600)),
+        )
+
+    def _build_prompt(self, requirements_text: str) -> str:
+        """Static prefix + requirements (trimmed to the input budget) + static suffix."""
+        return self.prompt_loader.current().render(requirements_text)
 
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(Exception),
+        retry=retry_if_exception_type(TRANSIENT_ERRORS),
+        before_sleep=_count_retry,
         reraise=True
     )
-    async def generate_test_cases(self, requirements_text: str) -> List[Dict[str, Any]]:
-        logger.debug("Constructing prompt from configuration...")
-        
+    async def generate_test_cases(self, requirements_text: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Generates test cases for the given requirements.
+        `use_cache=False` skips the cache lookup but still refreshes the stored entry.
+        """
         try:
-            # Load config sections
-            config = self.prompts["test_generation"]
-            
-            # 1. System Role & Context
-            system_role = config.get("system_role", "")
-            
-            # 2. Main Instruction (Injecting the dynamic text)
-            instruction = config.get("instruction", "").format(
-                requirements_text=requirements_text[:30000]
-            )
-            
-            # 3. Few-Shot Examples (NEW: Capturing your expanded section)
-            examples = config.get("few_shot_examples", "")
-            
-            # 4. Output Schema
-            fmt = config.get("output_format", "")
-            
-            # Construct the Full Context Window
-            # Order matters: Role -> Task -> Examples -> Strict JSON Format
-            full_prompt = (
-                f"{system_role}\n\n"
-                f"{instruction}\n\n"
-                f"### REFERENCE EXAMPLES:\n{examples}\n\n"
-                f"### REQUIRED OUTPUT FORMAT:\n{fmt}"
-            )
+            with stage("prompt_build"):
+                full_prompt = self._build_prompt(requirements_text)
 
-            # Async call
-            response = await self.model.generate_content_async(full_prompt)
-            return self._parse_json_response(response.text)
-            
-        except KeyError as e:
-            logger.error(f"Missing configuration key in prompts.yaml: {e}")
-            raise e
+            cache_key = None
+            if self.cache is not None:
+                with stage("cache_lookup"):
+                    cache_key = ResponseCache.make_key(full_prompt, self.model_name, self.prompts_version)
+                    # SQLite lookups run off the event loop
+                    cached = await asyncio.to_thread(self.cache.get, cache_key) if use_cache else None
+                if cached is not None:
+                    logger.info(f"LLM cache hit ({len(cached)} test cases)")
+                    LLM_CALLS.inc(outcome="cached")
+                    return cached
+
+            flight_key = cache_key or ResponseCache.make_key(full_prompt, self.model_name, self.prompts_version)
+            result = await self.singleflight.do(flight_key, lambda: self._call_llm(full_prompt, cache_key))
+            # Callers sharing one flight must not share (and mutate) the same dicts
+            return [dict(case) for case in result.test_cases]
+
+        except KeyError:
+            raise
         except Exception as e:
+            LLM_CALLS.inc(outcome=type(e).__name__)
+            if isinstance(e, google_exceptions.TooManyRequests):
+                self.rate_limiter.pause(RATE_LIMIT_PAUSE_SECONDS)
             logger.error(f"LLM Generation Failed: {e}")
             raise e
 
-    def _parse_json_response(self, text: str) -> List[Dict[str, Any]]:
-        clean_text = text.strip()
-        if clean_text.startswith("```json"):
-            clean_text = clean_text[7:-3]
-        elif clean_text.startswith("```"):
-            clean_text = clean_text[3:-3]
-            
+    async def _call_llm(self, full_prompt: str, cache_key: Optional[str]) -> SalvageResult:
+        with stage("rate_limit_wait"):
+            await self.rate_limiter.acquire(DocumentChunker.estimate_tokens(full_prompt))
+        # The backend charges the response tokens of whichever call answers, hedge included
+        text = await self.backend.generate(full_prompt)
+        with stage("llm_parse"):
+            result = self._salvage_response(text)
+        LLM_CALLS.inc(outcome="ok")
+
+        # Damaged responses are served but not cached, so the next run can get a clean one
+        if self.cache is not None and cache_key is not None and not result.dropped:
+            await asyncio.to_thread(self.cache.set, cache_key, result.test_cases)
+        return result
+
+    async def generate_for_document(
+        self,
+        document: Union[ParsedDocument, str],
+        max_concurrency: int = LLM_CONCURRENCY,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        result = await self.generate_suite(document, max_concurrency=max_concurrency, use_cache=use_cache)
+        return result.test_cases
+
+    async def generate_suite(
+        self,
+        document: Union[ParsedDocument, str],
+        max_concurrency: int = LLM_CONCURRENCY,
+        use_cache: bool = True,
+        base: Optional[Dict[str, Any]] = None,
+    ) -> GenerationResult:
+        """
+        Map-Reduce generation for documents larger than one prompt.
+        Map: sections are packed into chunks, each sent to the LLM concurrently (bounded by a semaphore).
+        Reduce: per-chunk lists are merged in document order with renumbered IDs.
+        Every case records the section(s) it came from. With `base` (a stored suite of an
+        earlier version), only added or changed sections are generated; cases of unchanged
+        sections are carried over as they are, risk analysis included.
+        """
+        with stage("chunking"):
+            plan = self.plan(document, base)
+            chunks = self.chunker.pack(plan.changed)
+        sections = plan.sections
+        titles = {section.hash: section.title for section in sections}
+        logger.info(f"Generating over {len(chunks)} chunk(s) (concurrency={max_concurrency})")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_chunk(chunk) -> List[Dict[str, Any]]:
+            async with semaphore:
+                cases = await self.generate_test_cases(chunk.content, use_cache=use_cache)
+            attach_provenance(cases, chunk, titles)
+            return cases
+
+        results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        generated = [case for cases in results for case in cases]
+        return GenerationResult(
+            # A single fresh chunk keeps the model's own IDs, as before
+            test_cases=order_cases(sections, plan.reused + generated, renumber=len(chunks) > 1 or bool(plan.reused)),
+            sections=[section.hash for section in sections],
+            generated_sections=len(plan.changed),
+            reused_cases=len(plan.reused),
+        )
+
+    def plan(self, document: Union[ParsedDocument, str], base: Optional[Dict[str, Any]] = None) -> RegenerationPlan:
+        """Splits `document` into sections and, against `base`, picks the ones to regenerate (all without one)."""
+        sections = self.chunker.sections(document)
+        if base is None:
+            return RegenerationPlan(sections=sections, changed=sections)
+        plan = plan_regeneration(sections, base["test_cases"], base["meta"].get("sections") or [])
+        logger.info(
+            f"Incremental run: {len(plan.changed)}/{len(sections)} section(s) changed, "
+            f"{len(plan.reused)} case(s) reused, {plan.removed_cases} dropped"
+        )
+        return plan
+
+    async def stream_test_cases(self, requirements_text: str, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams test cases one by one as Gemini produces them.
+        Not retried: once a case has been yielded the caller already has partial output.
+        """
+        with stage("prompt_build"):
+            full_prompt = self._build_prompt(requirements_text)
+        cache_key = None
+        if self.cache is not None:
+            with stage("cache_lookup"):
+                cache_key = ResponseCache.make_key(full_prompt, self.model_name, self.prompts_version)
+                cached = await asyncio.to_thread(self.cache.get, cache_key) if use_cache else None
+            if cached is not None:
+                logger.info(f"LLM cache hit ({len(cached)} test cases, streamed)")
+                LLM_CALLS.inc(outcome="cached")
+                for case in cached:
+                    yield case
+                return
+
+        parser = IncrementalArrayParser()
+        collected: List[Dict[str, Any]] = []
+        with stage("rate_limit_wait"):
+            await self.rate_limiter.acquire(DocumentChunker.estimate_tokens(full_prompt))
+        fragments: List[str] = []
+        started = time.perf_counter()
         try:
-            data = json.loads(clean_text)
-            if not isinstance(data, list):
-                raise ValueError("Output is not a list of test cases")
-            return data
-        except json.JSONDecodeError as e:
+            async for fragment in self.backend.stream(full_prompt):
+                fragments.append(fragment)
+                for case in parser.feed(fragment):
+                    collected.append(case)
+                    yield case
+        except Exception as e:
+            LLM_CALLS.inc(outcome=type(e).__name__)
+            if isinstance(e, google_exceptions.TooManyRequests):
+                self.rate_limiter.pause(RATE_LIMIT_PAUSE_SECONDS)
+            raise
+        finally:
+            # Charged even when the stream breaks off: whatever arrived counts against TPM
+            self.rate_limiter.record(DocumentChunker.estimate_tokens("".join(fragments)))
+        # Includes time the consumer spent between cases; the stream is pull-based
+        record_stage("llm_stream", time.perf_counter() - started)
+        LLM_CALLS.inc(outcome="ok")
+
+        dropped = parser.skipped + (1 if parser.has_partial else 0)
+        self.parse_stats["responses"] += 1
+        self.parse_stats["dropped_cases"] += dropped
+        if parser.repaired or dropped:
+            # Same accounting as _salvage_response: every case of a repaired response was salvaged
+            self.parse_stats["repaired_responses"] += 1
+            self.parse_stats["salvaged_cases"] += len(collected)
+            logger.warning(
+                f"Repaired streamed LLM output: salvaged {len(collected)} test case(s) "
+                f"({parser.repaired} repaired), dropped {dropped}"
+            )
+
+        # Only complete, clean streams are worth caching
+        if self.cache is not None and cache_key is not None and parser.finished and not parser.skipped:
+            await asyncio.to_thread(self.cache.set, cache_key, collected)
+
+    async def stream_for_document(
+        self,
+        document: Union[ParsedDocument, str],
+        max_concurrency: int = LLM_CONCURRENCY,
+        use_cache: bool = True,
+        plan: Optional[RegenerationPlan] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of `generate_for_document`.
+        Chunks are streamed concurrently; cases are yielded in arrival order and
+        numbered as they arrive, so IDs are unique but not stable across runs.
+        With an incremental `plan` (see `plan`), the reused cases come first and
+        only the changed sections are streamed.
+        """
+        if plan is None:
+            plan = self.plan(document)
+        titles = {section.hash: section.title for section in plan.sections}
+        chunks = self.chunker.pack(plan.changed)
+        if len(chunks) <= 1 and not plan.reused:
+            if not chunks:
+                return
+            async for case in self.stream_test_cases(chunks[0].content, use_cache=use_cache):
+                attach_provenance([case], chunks[0], titles)
+                yield case
+            return
+
+        count = 0
+        for case in plan.reused:
+            count += 1
+            yield renumbered(case, count)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        done = object()
+
+        async def pump(chunk) -> None:
+            index = chunk.index
+            try:
+                async with semaphore:
+                    async for case in self.stream_test_cases(chunk.content, use_cache=use_cache):
+                        attach_provenance([case], chunk, titles)
+                        await queue.put((index, case))
+            except Exception as e:
+                await queue.put((index, e))
+            finally:
+                await queue.put((index, done))
+
+        tasks = [asyncio.create_task(pump(chunk)) for chunk in chunks]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                index, item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                count += 1
+                yield renumbered(item, count, source_chunk=index)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _salvage_response(self, text: str) -> SalvageResult:
+        result = salvage_test_cases(text)
+        self.parse_stats["responses"] += 1
+        if result.repaired:
+            self.parse_stats["repaired_responses"] += 1
+            self.parse_stats["salvaged_cases"] += result.salvaged
+        self.parse_stats["dropped_cases"] += result.dropped
+
+        if result.repaired or result.dropped:
+            logger.warning(
+                f"Repaired malformed LLM output: salvaged {result.salvaged} test case(s), dropped {result.dropped}"
+            )
+        if result.repaired and not result.test_cases:
             logger.error("Failed to decode JSON response")
-            raise ValueError(f"Malformed JSON from LLM: {e}")
+            raise ValueError("Malformed JSON from LLM: no test cases could be recovered")
+        return result
+
+    def _parse_json_response(self, text: str) -> List[Dict[str, Any]]:
+        return self._salvage_response(text).test_cases
@@ -0,0 +1,285 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, List, Tuple, Optional, Callable, Iterable, ContextManager
+
+# Latency buckets in seconds: sub-millisecond ML stages up to minute-long Gemini calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# (labels, value) pairs yielded by scrape-time collectors
+Sample = Tuple[Dict[str, str], float]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def count(self, **labels) -> float:
+        row = self._values.get(_label_key(labels))
+        return row[-1] if row else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(row)) for key, row in self._values.items()]
+        lines = []
+        for key, row in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(row[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format (0.0.4) registry.
+    Metrics are updated in place; collectors are callables run at scrape time for
+    values that already live elsewhere (cache stats, queue sizes).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def _add(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._add(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """`collector()` yields (name, type, help, [(labels, value), ...])."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(_label_key(labels))} {_format_value(v)}" for labels, v in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram("zeta_stage_seconds", "Time spent per pipeline stage")
+LLM_CALLS = REGISTRY.counter("zeta_llm_calls_total", "Gemini calls by outcome")
+LLM_RETRIES = REGISTRY.counter("zeta_llm_retries_total", "Gemini calls retried by tenacity, by exception type")
+EXECUTOR_QUEUE = REGISTRY.gauge("zeta_executor_queue_depth", "Tasks submitted to an executor and not yet started")
+IN_FLIGHT = REGISTRY.gauge("zeta_http_requests_in_flight", "HTTP requests currently being served")
+REQUEST_SECONDS = REGISTRY.histogram("zeta_http_request_seconds", "HTTP request latency by route")
+HEDGED_CALLS = REGISTRY.counter("zeta_llm_hedged_total", "Hedged LLM calls: started, and which backend won")
+SINGLEFLIGHT_SHARED = REGISTRY.counter("zeta_llm_singleflight_shared_total", "Callers served by an identical in-flight LLM call")
+BACKEND_TIMEOUTS = REGISTRY.counter("zeta_llm_backend_timeouts_total", "LLM calls abandoned at the backend timeout")
+LLM_TOKENS = REGISTRY.counter("zeta_llm_tokens_total", "Tokens sent to and received from the LLM, by kind")
+DEDUP_REMOVED = REGISTRY.counter("zeta_dedup_removed_total", "Near-duplicate test cases removed, by scope (suite or project)")
+SCORING_BATCH_ROWS = REGISTRY.histogram(
+    "zeta_scoring_batch_rows", "Test cases per micro-batch scored by the EdgeCaseDetector",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+SCORING_REJECTED = REGISTRY.counter("zeta_scoring_rejected_total", "Scoring calls rejected because the batch queue was full")
+PROMPT_TRIMMED = REGISTRY.counter("zeta_prompt_input_trimmed_total", "Requirements texts cut to the prompt input budget")
+
+
+class RequestTimings:
+    """Stage durations of one request, for the Server-Timing header."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self) -> str:
+        """Stages seen more than once (e.g. one llm_call per chunk) are summed."""
+        with self._lock:
+            parts = [f'{name};dur={total * 1000:.1f}' + (f';desc="x{n}"' if n > 1 else "") for name, (total, n) in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+class TokenUsage:
+    """LLM tokens spent on behalf of one suite. `cached` is the part of `prompt` served from a context cache."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt = 0
+        self.response = 0
+        self.cached = 0
+
+    def add(self, prompt: int, response: int, cached: int = 0) -> None:
+        self.calls += 1
+        self.prompt += prompt
+        self.response += response
+        self.cached += cached
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"llm_calls": self.calls, "prompt": self.prompt, "response": self.response, "cached": self.cached}
+
+
+_request_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("zeta_request_timings", default=None)
+
+_token_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar("zeta_token_usage", default=None)
+
+# Tracing hook: a callable(name) -> context manager, e.g. an OpenTelemetry tracer's start_as_current_span
+_span_hook: Optional[Callable[[str], ContextManager]] = None
+
+
+def set_span_hook(hook: Optional[Callable[[str], ContextManager]]) -> None:
+    global _span_hook
+    _span_hook = hook
+
+
+def begin_request() -> Tuple[RequestTimings, contextvars.Token]:
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _request_timings.reset(token)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def record_tokens(prompt: int, response: int, cached: int = 0) -> None:
+    LLM_TOKENS.inc(prompt, kind="prompt")
+    LLM_TOKENS.inc(response, kind="response")
+    if cached:
+        LLM_TOKENS.inc(cached, kind="cached")
+    usage = _token_usage.get()
+    if usage is not None:
+        usage.add(prompt, response, cached)
+
+
+@contextmanager
+def track_tokens():
+    """Collects the tokens of every LLM call made inside the block (tasks it spawns included)."""
+    usage = TokenUsage()
+    token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Times a block into zeta_stage_seconds{stage=name}, the request's Server-Timing, and a tracing span."""
+    span = _span_hook(f"zeta.{name}") if _span_hook is not None else nullcontext()
+    started = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            record_stage(name, time.perf_counter() - started)
@@ -0,0 +1,104 @@
+import os
+import json
+import mmap
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any
+from loguru import logger
+
+
+def hash_file(path: str, block_size: int = 1024 * 1024) -> str:
+    """Streaming SHA-256 of a file's bytes; memory stays at one block."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Disk cache for extracted document text, keyed on content hash + parser version.
+    Layout: <root>/<key>.txt holds the UTF-8 text, <key>.json the metadata.
+    Texts above `mmap_threshold` bytes are decoded straight from a memory map,
+    skipping the intermediate bytes buffer a normal read would allocate.
+    The directory is trimmed to `max_bytes`, least recently used entries first.
+    """
+
+    def __init__(self, root: str, mmap_threshold: int = 1024 * 1024, max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.mmap_threshold = mmap_threshold
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(content_hash: str, parser_version: str) -> str:
+        return f"{content_hash}-p{parser_version}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        text_path = self.root / f"{key}.txt"
+        meta_path = self.root / f"{key}.json"
+        if not (text_path.exists() and meta_path.exists()):
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            size = text_path.stat().st_size
+            if size == 0:
+                content = ""
+            elif size >= self.mmap_threshold:
+                with open(text_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    content = str(mapped, "utf-8")
+            else:
+                content = text_path.read_text(encoding="utf-8")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {key}: {e}")
+            return None
+        try:
+            # The metadata file's mtime is the entry's last use, for LRU pruning
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return {"content": content, "metadata": meta}
+
+    def put(self, key: str, content: str, metadata: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Text first, metadata last: an entry only counts once its .json exists
+        for suffix, payload in ((".txt", content), (".json", json.dumps(metadata))):
+            # A private temp file per writer: concurrent puts of the same key never share one
+            tmp = tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.root, prefix=f"{key}{suffix}.", suffix=".tmp", delete=False
+            )
+            try:
+                with tmp:
+                    tmp.write(payload)
+                os.replace(tmp.name, self.root / f"{key}{suffix}")
+            except BaseException:
+                Path(tmp.name).unlink(missing_ok=True)
+                raise
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        total = 0
+        for meta_path in self.root.glob("*.json"):
+            text_path = meta_path.with_suffix(".txt")
+            try:
+                used = meta_path.stat().st_mtime
+                size = meta_path.stat().st_size + (text_path.stat().st_size if text_path.exists() else 0)
+            except OSError:
+                # Removed by another worker in the meantime
+                continue
+            entries.append((used, size, meta_path, text_path))
+            total += size
+        if total <= self.max_bytes:
+            return
+        for _, size, meta_path, text_path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            for path in (meta_path, text_path):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+            logger.info(f"Evicted parse cache entry {meta_path.stem}")
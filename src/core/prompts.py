@@ -0,0 +1,132 @@
+import os
+import time
+import yaml
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Tuple
+from loguru import logger
+from src.core.chunker import DocumentChunker
+from src.core.metrics import PROMPT_TRIMMED
+
+BASE_PATH = Path(__file__).resolve().parent.parent.parent
+PROMPTS_PATH = Path(os.getenv("ZETA_PROMPTS_PATH", BASE_PATH / "config" / "prompts.yaml"))
+# Requirements text beyond this many (estimated) tokens is cut before it reaches the prompt
+PROMPT_INPUT_TOKENS = int(os.getenv("ZETA_PROMPT_INPUT_TOKENS", 7500))
+# How often prompts.yaml is checked for edits; 0 disables hot reload
+PROMPTS_RELOAD_SECONDS = float(os.getenv("ZETA_PROMPTS_RELOAD_SECONDS", 2))
+
+PLACEHOLDER = "{requirements_text}"
+DEFAULT_REQUIREMENTS_BLOCK = "### REQUIREMENTS CONTEXT:\n" + PLACEHOLDER
+
+
+def trim_to_budget(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Cuts `text` to about `max_tokens`, on a line break when one is near the limit."""
+    limit = max_tokens * DocumentChunker.CHARS_PER_TOKEN
+    if max_tokens <= 0 or len(text) <= limit:
+        return text, False
+    cut = text.rfind("\n", int(limit * 0.9), limit)
+    return text[:cut if cut != -1 else limit], True
+
+
+class PromptTemplate:
+    """
+    The test-generation prompt, compiled once per prompts.yaml version.
+    Everything around `{requirements_text}` is static: `prefix` and `suffix` are
+    assembled here, so a call is two concatenations. With the requirements placed
+    last (see `requirements_block`), the prefix is the whole static prompt and is
+    what Gemini context caching stores. The text is not str.format-ed: braces are literal.
+    """
+
+    def __init__(self, prompts: Dict[str, Any], version: str, input_tokens: int = PROMPT_INPUT_TOKENS):
+        config = prompts["test_generation"]
+        instruction = config.get("instruction", "")
+        # Order matters: Role -> Task -> Examples -> Strict JSON Format
+        template = (
+            f"{config.get('system_role', '')}\n\n"
+            f"{instruction}\n\n"
+            f"### REFERENCE EXAMPLES:\n{config.get('few_shot_examples', '')}\n\n"
+            f"### REQUIRED OUTPUT FORMAT:\n{config.get('output_format', '').rstrip()}"
+        )
+        if PLACEHOLDER not in instruction:
+            template += "\n\n" + config.get("requirements_block", DEFAULT_REQUIREMENTS_BLOCK).rstrip("\n")
+        self.prefix, found, self.suffix = template.partition(PLACEHOLDER)
+        if not found:
+            raise ValueError(f"prompts.yaml: no {PLACEHOLDER} placeholder in the test_generation prompt")
+        self.version = version
+        self.input_tokens = input_tokens
+        self.static_tokens = DocumentChunker.estimate_tokens(self.prefix + self.suffix)
+
+    def render(self, requirements_text: str) -> str:
+        text, trimmed = trim_to_budget(requirements_text, self.input_tokens)
+        if trimmed:
+            PROMPT_TRIMMED.inc()
+            logger.warning(
+                f"Requirements text trimmed to the {self.input_tokens}-token input budget "
+                f"({len(requirements_text)} -> {len(text)} chars)"
+            )
+        return self.prefix + text + self.suffix
+
+
+class PromptLoader:
+    """
+    Loads config/prompts.yaml and reloads it when the file changes.
+    `current()` stats the file at most every `reload_seconds`; an edit that fails
+    to parse is logged and the previous template stays in use.
+    """
+
+    def __init__(
+        self,
+        path: Path = PROMPTS_PATH,
+        reload_seconds: float = PROMPTS_RELOAD_SECONDS,
+        on_reload: Optional[Callable[[PromptTemplate], None]] = None,
+    ):
+        self.path = Path(path)
+        self.reload_seconds = reload_seconds
+        self.on_reload = on_reload
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._signature = self._stat()
+        self.prompts, self.template = self._load()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> Tuple[Dict[str, Any], PromptTemplate]:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Configuration file not found at: {self.path}")
+        raw = self.path.read_bytes()
+        prompts = yaml.safe_load(raw)
+        # Explicit `version` wins; otherwise any edit to the file invalidates cached responses
+        version = str(prompts.get("version") or hashlib.sha256(raw).hexdigest()[:12])
+        return prompts, PromptTemplate(prompts, version)
+
+    def current(self) -> PromptTemplate:
+        if self.reload_seconds > 0 and time.monotonic() - self._checked_at >= self.reload_seconds:
+            self.check()
+        return self.template
+
+    def check(self) -> bool:
+        """Reloads if the file changed since the last load. Returns True when a new template is in use."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return False
+            self._signature = signature
+            try:
+                prompts, template = self._load()
+            except (OSError, yaml.YAMLError, KeyError, ValueError, AttributeError) as e:
+                logger.error(f"Ignoring invalid prompts.yaml edit, keeping v{self.template.version}: {e}")
+                return False
+            self.prompts, self.template = prompts, template
+            self.reloads += 1
+        logger.info(f"Reloaded prompts.yaml (v{template.version}, ~{template.static_tokens} static tokens)")
+        if self.on_reload is not None:
+            self.on_reload(template)
+        return True
@@ -0,0 +1,64 @@
+import time
+import asyncio
+from typing import Optional
+from loguru import logger
+
+
+class TokenBucket:
+    """
+    Reservation-style token bucket.
+    Callers deduct immediately (the balance may go negative) and sleep off the
+    deficit, so waiters are served in arrival order without a lock.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` tokens and returns how many seconds the caller must wait."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # A single request larger than the bucket would otherwise wait forever
+        self._tokens -= min(amount, self.capacity)
+        return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimiter:
+    """
+    Gemini quota guard: requests-per-minute and tokens-per-minute buckets,
+    plus a shared pause so one 429 backs off every caller instead of a storm.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+
+    async def acquire(self, tokens: int = 0) -> float:
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record(self, tokens: int) -> None:
+        """
+        Charges tokens only known once a call has finished (the response) to the
+        TPM bucket without waiting; the next callers sleep off the deficit.
+        """
+        if self.tokens is not None and tokens:
+            self.tokens.reserve(tokens)
+
+    def pause(self, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            logger.warning(f"Rate limited upstream; pausing all LLM calls for {seconds:.1f}s")
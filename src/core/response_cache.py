@@ -0,0 +1,155 @@
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from loguru import logger
+
+
+class ResponseCache:
+    """
+    Content-Addressed Cache for LLM Responses.
+    Tier 1: In-process LRU (hot specs, microsecond lookups).
+    Tier 2: SQLite file on disk (survives restarts, shared by workers).
+    Entries expire after `ttl_seconds`; the disk tier is trimmed to `max_disk_bytes`.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_items: int = 256,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: int = 7 * 24 * 3600,
+    ):
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats_counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_created ON responses(created_at)")
+            # Covering index: summing sizes scans it instead of the payload pages
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_size ON responses(size)")
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, prompts_version: str) -> str:
+        """SHA-256 over everything that can change the model's answer."""
+        digest = hashlib.sha256()
+        for part in (model_name, prompts_version, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats_counters["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    payload, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._remember(key, created_at, payload)
+                        self.stats_counters["disk_hits"] += 1
+                        return json.loads(payload)
+                    self._delete(self._db, key)
+
+            self.stats_counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        # Stored serialized so callers can never mutate a cached entry in place
+        payload = json.dumps(value, separators=(",", ":"))
+        size = len(payload.encode("utf-8"))
+        with self._lock:
+            self._remember(key, now, payload)
+            if self._db is not None:
+                self._delete(self._db, key)
+                self._db.execute(
+                    "INSERT INTO responses (key, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, now, now),
+                )
+                self._evict_disk(self._db, now)
+            self.stats_counters["writes"] += 1
+
+    def _remember(self, key: str, created_at: float, payload: str) -> None:
+        self._memory[key] = (created_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.stats_counters["evictions"] += 1
+
+    @staticmethod
+    def _delete(db: sqlite3.Connection, key: str) -> bool:
+        return db.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount > 0
+
+    @staticmethod
+    def _disk_bytes(db: sqlite3.Connection) -> int:
+        # Read from the table every time: the disk tier is shared by all workers
+        return db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict_disk(self, db: sqlite3.Connection, now: float) -> None:
+        cutoff = now - self.ttl_seconds
+        expired = db.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,)).rowcount
+        self.stats_counters["evictions"] += max(expired, 0)
+
+        disk_bytes = self._disk_bytes(db)
+        if disk_bytes <= self.max_disk_bytes:
+            return
+        # Drop least-recently-used rows until we are back under budget
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            if disk_bytes <= self.max_disk_bytes:
+                break
+            if self._delete(db, key):
+                disk_bytes -= size
+                self.stats_counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters: Dict[str, Any] = dict(self.stats_counters)
+            counters["memory_items"] = len(self._memory)
+            if self._db is not None:
+                counters["disk_items"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                counters["disk_bytes"] = self._disk_bytes(self._db)
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        counters["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return counters
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+        logger.info("LLM response cache cleared")
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+BASE_PATH = Path(__file__).resolve().parent.parent.parent
+# ":memory:" keeps suites for the life of the process only
+SUITE_DB = os.getenv("ZETA_SUITE_DB", str(BASE_PATH / ".zeta_data" / "suites.sqlite"))
+SUITE_STORE_SIZE = int(os.getenv("ZETA_SUITE_STORE_SIZE", 10000))
+SUITE_PAGE_SIZE = 50
+SUITE_MAX_PAGE_SIZE = 500
+
+# Filterable case columns -> where the value lives in a merged test case
+FILTERS = {
+    "risk_level": lambda case: (case.get("risk_analysis") or {}).get("risk_level"),
+    "type": lambda case: case.get("type"),
+    "priority": lambda case: case.get("priority"),
+}
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _case_row(suite_id: str, position: int, case: Dict[str, Any]) -> tuple:
+    columns = []
+    for get in FILTERS.values():
+        value = get(case)
+        columns.append(None if value is None else str(value))
+    return (suite_id, position, case.get("id"), *columns, _compact(case))
+
+
+class SuiteStore:
+    """
+    Generated suites by `suite_id`, persisted in SQLite so a refresh or a second
+    viewer reads them back instead of regenerating through Gemini.
+    Each case is stored once as compact JSON next to its indexed filter columns;
+    pages are spliced together from the stored text without decoding it.
+    The oldest suites beyond `max_suites` are dropped.
+    """
+
+    def __init__(self, db_path: str = SUITE_DB, max_suites: int = SUITE_STORE_SIZE):
+        self.db_path = db_path
+        self.max_suites = max_suites
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS suites ("
+            " suite_id TEXT PRIMARY KEY,"
+            " created_at REAL NOT NULL,"
+            " case_count INTEGER NOT NULL,"
+            " meta TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cases ("
+            " suite_id TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " case_id TEXT,"
+            " risk_level TEXT COLLATE NOCASE,"
+            " type TEXT COLLATE NOCASE,"
+            " priority TEXT COLLATE NOCASE,"
+            " body TEXT NOT NULL,"
+            " PRIMARY KEY (suite_id, position)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_suites_created ON suites(created_at)")
+        for column in FILTERS:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_cases_{column} ON cases(suite_id, {column}, position)")
+
+    def put(self, suite_id: str, test_cases: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+        rows = [_case_row(suite_id, position, case) for position, case in enumerate(test_cases)]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM cases WHERE suite_id = ?", (suite_id,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO suites (suite_id, created_at, case_count, meta) VALUES (?, ?, ?, ?)",
+                    (suite_id, time.time(), len(rows), _compact(meta)),
+                )
+                self._db.executemany("INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._prune()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _prune(self) -> None:
+        stale = [row[0] for row in self._db.execute(
+            "SELECT suite_id FROM suites ORDER BY created_at DESC LIMIT -1 OFFSET ?", (self.max_suites,)
+        )]
+        for suite_id in stale:
+            self._db.execute("DELETE FROM cases WHERE suite_id = ?", (suite_id,))
+            self._db.execute("DELETE FROM suites WHERE suite_id = ?", (suite_id,))
+
+    def get(self, suite_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT meta FROM suites WHERE suite_id = ?", (suite_id,)).fetchone()
+            if row is None:
+                return None
+            bodies = self._db.execute(
+                "SELECT body FROM cases WHERE suite_id = ? ORDER BY position", (suite_id,)
+            ).fetchall()
+        return {
+            "suite_id": suite_id,
+            "test_cases": [json.loads(body) for (body,) in bodies],
+            "meta": json.loads(row[0]),
+        }
+
+    def page_json(
+        self,
+        suite_id: str,
+        offset: int = 0,
+        limit: int = SUITE_PAGE_SIZE,
+        **filters: Optional[str],
+    ) -> Optional[str]:
+        """
+        One page of a suite's cases as a JSON document, optionally filtered by
+        `risk_level`, `type` and `priority` (case-insensitive). `total` counts the
+        filtered cases. None if the suite does not exist.
+        """
+        clauses, params = ["suite_id = ?"], [suite_id]
+        for column, value in filters.items():
+            if column not in FILTERS:
+                raise ValueError(f"Unknown filter: {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = " AND ".join(clauses)
+        with self._lock:
+            suite = self._db.execute(
+                "SELECT created_at, case_count, meta FROM suites WHERE suite_id = ?", (suite_id,)
+            ).fetchone()
+            if suite is None:
+                return None
+            total = self._db.execute(f"SELECT COUNT(*) FROM cases WHERE {where}", params).fetchone()[0]
+            bodies = self._db.execute(
+                f"SELECT body FROM cases WHERE {where} ORDER BY position LIMIT ? OFFSET ?", (*params, limit, offset)
+            ).fetchall()
+        created_at, case_count, meta = suite
+        head = _compact({
+            "suite_id": suite_id,
+            "created_at": created_at,
+            "case_count": case_count,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+        })
+        return f'{head[:-1]},"meta":{meta},"test_cases":[{",".join(body for (body,) in bodies)}]}}'
+
+    def recent(self, offset: int = 0, limit: int = SUITE_PAGE_SIZE) -> Tuple[int, List[Dict[str, Any]]]:
+        """Most recent suites first: (total, [{suite_id, created_at, case_count}])."""
+        with self._lock:
+            total = self._db.execute("SELECT COUNT(*) FROM suites").fetchone()[0]
+            rows = self._db.execute(
+                "SELECT suite_id, created_at, case_count FROM suites ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return total, [{"suite_id": s, "created_at": c, "case_count": n} for s, c, n in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM suites").fetchone()[0]
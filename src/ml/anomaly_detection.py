@@ -1,44 +1,193 @@
+import os
+import json
+import time
+import threading
 import numpy as np
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
 from loguru import logger
 
+
+class RunningStats:
+    """
+    O(1)-memory running mean/variance (Welford, merged per batch with Chan's formula).
+    With `decay` < 1 the existing weight shrinks by decay**k before each batch of k
+    points, giving an exponentially weighted baseline (~1 / (1 - decay) points).
+    """
+
+    def __init__(self, decay: Optional[float] = None):
+        self.decay = decay
+        self.count = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count > 0 else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def update(self, values: np.ndarray) -> None:
+        k = values.size
+        if k == 0:
+            return
+        if self.decay is not None and self.count > 0:
+            factor = self.decay ** k
+            self.count *= factor
+            self.m2 *= factor
+
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + k
+        delta = batch_mean - self.mean
+        self.mean += delta * k / total
+        self.m2 += batch_m2 + delta * delta * self.count * k / total
+        self.count = total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "decay": self.decay}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls(decay=data.get("decay"))
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        return stats
+
+
 class AnomalyDetector:
     """
     The 'Sentinel' Physics Engine.
     Uses Z-Score Statistical Analysis to detect outliers in test data.
     Ported from the Sentinel MLOps project.
+
+    Batch mode (default) scores each batch against its own mean/std.
+    Online mode keeps a running baseline across calls, so even a single
+    data point can be flagged once `min_samples` points have been seen.
     """
-    
-    def __init__(self, threshold: float = 2.5):
+
+    def __init__(
+        self,
+        threshold: float = 2.5,
+        online: bool = False,
+        decay: Optional[float] = None,
+        min_samples: int = 30,
+        log_interval: float = 60.0,
+        snapshot_path: Optional[str] = None,
+        snapshot_every: int = 100,
+    ):
         self.threshold = threshold
-        # We don't use a rolling window here because we analyze a batch of requirements at once.
-        # But we keep the logic: Mean vs Standard Deviation.
+        self.online = online
+        self.min_samples = min_samples
+        self.log_interval = log_interval
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_every = snapshot_every
+        self.stats = RunningStats(decay=decay)
+        self._lock = threading.Lock()
+        self._updates = 0
+        self._last_log = 0.0
+        self._suppressed = 0
 
     def detect(self, data_points: list) -> list:
         """
         Input: A list of numbers (e.g., Requirement Complexity Scores).
         Output: A list of booleans (True = Anomaly).
         """
-        if not data_points or len(data_points) < 2:
-            return [False] * len(data_points)
+        if not data_points:
+            return []
+        arr = np.asarray(data_points, dtype=np.float64)
 
-        # 1. Calculate Physics Metrics
-        arr = np.array(data_points)
-        mean = np.mean(arr)
-        std_dev = np.std(arr)
+        if self.online:
+            with self._lock:
+                mean, std = self._baseline(arr)
+                self.stats.update(arr)
+                self._updates += 1
+                if self.snapshot_path is not None and self._updates % self.snapshot_every == 0:
+                    self.save()
+        else:
+            if len(arr) < 2:
+                return [False] * len(arr)
+            # 1. Calculate Physics Metrics
+            mean, std = float(arr.mean()), float(arr.std())
 
-        if std_dev == 0:
+        if std == 0:
             return [False] * len(arr)
 
-        # 2. Calculate Z-Scores
-        z_scores = (arr - mean) / std_dev
-        
-        # 3. Flag Anomalies
-        anomalies = []
-        for i, z in enumerate(z_scores):
-            is_anomaly = abs(z) > self.threshold
-            anomalies.append(is_anomaly)
-            
-            if is_anomaly:
-                logger.warning(f"Sentinel Alert: Data point {data_points[i]} has Z-Score {z:.2f} (Threshold: {self.threshold})")
-        
-        return anomalies
+        # 2. Calculate Z-Scores and 3. Flag Anomalies (one vectorized mask)
+        z_scores = (arr - mean) / std
+        mask = np.abs(z_scores) > self.threshold
+        if mask.any():
+            self._report(arr[mask], z_scores[mask])
+        return mask.tolist()
+
+    def detect_groups(self, data_points: list, bounds: List[Tuple[int, int]]) -> List[list]:
+        """
+        `detect()` on each `data_points[start:end]` of `bounds`, as separate calls.
+        Batch mode computes every group's mean/std in one segmented pass; online
+        mode updates the baseline group by group, in order.
+        """
+        if self.online:
+            return [self.detect(data_points[start:end]) for start, end in bounds]
+        arr = np.asarray(data_points, dtype=np.float64)
+        lengths = np.array([end - start for start, end in bounds], dtype=np.int64)
+        group = np.repeat(np.arange(len(bounds)), lengths)
+        sizes = np.maximum(lengths, 1)
+        means = np.bincount(group, weights=arr, minlength=len(bounds)) / sizes
+        deviations = arr - means[group]
+        stds = np.sqrt(np.bincount(group, weights=deviations * deviations, minlength=len(bounds)) / sizes)
+        scored = ((lengths >= 2) & (stds > 0))[group]
+        z_scores = np.divide(deviations, stds[group], out=np.zeros_like(arr), where=scored)
+        mask = scored & (np.abs(z_scores) > self.threshold)
+        if mask.any():
+            self._report(arr[mask], z_scores[mask])
+        flags = mask.tolist()
+        return [flags[start:end] for start, end in bounds]
+
+    def _baseline(self, arr: np.ndarray):
+        """Prior running stats once warmed up; before that, prior + this batch."""
+        if self.stats.count >= self.min_samples:
+            return self.stats.mean, self.stats.std
+        warmup = RunningStats.from_dict({**self.stats.to_dict(), "decay": None})
+        warmup.update(arr)
+        if warmup.count < 2:
+            return warmup.mean, 0.0
+        return warmup.mean, warmup.std
+
+    def _report(self, values: np.ndarray, z_scores: np.ndarray) -> None:
+        """One aggregated warning per call, at most one per `log_interval` seconds."""
+        now = time.monotonic()
+        # Scoring threads report concurrently; the throttle state is shared
+        with self._lock:
+            if now - self._last_log < self.log_interval:
+                self._suppressed += len(values)
+                return
+            previous, self._suppressed = self._suppressed, 0
+            self._last_log = now
+        worst = int(np.argmax(np.abs(z_scores)))
+        suppressed = f" (+{previous} suppressed since last alert)" if previous else ""
+        logger.warning(
+            f"Sentinel Alert: {len(values)} data point(s) beyond Z {self.threshold}; "
+            f"worst {values[worst]} at Z-Score {z_scores[worst]:.2f}{suppressed}"
+        )
+
+    def save(self, path: Optional[str] = None) -> None:
+        target = Path(path) if path else self.snapshot_path
+        if target is None:
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(json.dumps({"threshold": self.threshold, "stats": self.stats.to_dict()}))
+        os.replace(tmp, target)
+
+    def load(self, path: Optional[str] = None) -> bool:
+        source = Path(path) if path else self.snapshot_path
+        if source is None or not source.exists():
+            return False
+        data = json.loads(source.read_text())
+        decay = self.stats.decay
+        self.stats = RunningStats.from_dict(data["stats"])
+        # Configuration wins over whatever decay the snapshot was written with
+        self.stats.decay = decay
+        logger.info(f"Restored Sentinel baseline ({self.stats.count:.0f} points, mean {self.stats.mean:.1f})")
+        return True
@@ -0,0 +1,197 @@
+import os
+import time
+import asyncio
+import contextvars
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional
+from src.core.metrics import record_stage, EXECUTOR_QUEUE, SCORING_BATCH_ROWS, SCORING_REJECTED
+
+# "thread" scores in a thread pool; "process" runs model inference in spawned worker processes
+SCORING_BACKEND = os.getenv("ZETA_SCORING_BACKEND", "thread")
+SCORING_WORKERS = int(os.getenv("ZETA_SCORING_WORKERS", 0)) or os.cpu_count() or 4
+# How long the first request of a batch waits for others to join it
+SCORING_MAX_WAIT_MS = float(os.getenv("ZETA_SCORING_MAX_WAIT_MS", 2))
+# Batches are sized so one takes about this long to score, within [min, max] rows
+SCORING_TARGET_MS = float(os.getenv("ZETA_SCORING_TARGET_MS", 20))
+SCORING_MIN_BATCH = int(os.getenv("ZETA_SCORING_MIN_BATCH", 32))
+SCORING_MAX_BATCH = int(os.getenv("ZETA_SCORING_MAX_BATCH", 4096))
+# Callers waiting for a batch beyond this are rejected (503) instead of queueing without bound
+SCORING_QUEUE_SIZE = int(os.getenv("ZETA_SCORING_QUEUE_SIZE", 1024))
+
+
+class SchedulerSaturated(RuntimeError):
+    """The scoring queue is full; the caller should retry later."""
+
+
+class _Pending:
+    __slots__ = ("payload", "rows", "future", "context", "enqueued")
+
+    def __init__(self, payload: Any, rows: int, future: asyncio.Future):
+        self.payload = payload
+        self.rows = rows
+        self.future = future
+        # Stages of the batch are recorded into each caller's own request timings
+        self.context = contextvars.copy_context()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into batches.
+    `submit(payload, rows)` parks the caller; a dispatcher takes the first waiting
+    call, lets others join for up to `max_wait` seconds (or until the batch holds
+    `batch_size` rows), and awaits `handler(payloads, contexts)` once for all of
+    them. Its i-th result goes back to the i-th caller. At most `max_in_flight`
+    batches run at once, so under load callers pile up and batches grow.
+    `batch_size` follows the measured cost per row, aiming at `target_latency`
+    per batch. A call never gets split across batches. A result that is an
+    Exception is raised to its own caller only; if the handler raises, every
+    caller in the batch gets the error.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any], List[contextvars.Context]], Awaitable[List[Any]]],
+        max_wait: float = SCORING_MAX_WAIT_MS / 1000,
+        max_in_flight: int = SCORING_WORKERS,
+        max_pending: int = SCORING_QUEUE_SIZE,
+        target_latency: float = SCORING_TARGET_MS / 1000,
+        min_batch: int = SCORING_MIN_BATCH,
+        max_batch: int = SCORING_MAX_BATCH,
+        name: str = "edge_case",
+    ):
+        self.handler = handler
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.target_latency = target_latency
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.name = name
+        self.batch_size = min_batch
+        self.batches = 0
+        self._row_seconds: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Deque[_Pending] = deque()
+        self._pending_rows = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return loop
+        # First use, or a new event loop (e.g. successive asyncio.run calls): start over on this one
+        self._drop_pending()
+        self._loop = loop
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        # Empty context: the dispatcher must not inherit (and write into) the first caller's timings
+        self._task = contextvars.Context().run(loop.create_task, self._dispatch())
+        return loop
+
+    async def submit(self, payload: Any, rows: int) -> Any:
+        loop = self._ensure_started()
+        if len(self._pending) >= self.max_pending:
+            SCORING_REJECTED.inc(scheduler=self.name)
+            raise SchedulerSaturated(f"{self.name} queue is full ({self.max_pending} waiting)")
+        item = _Pending(payload, rows, loop.create_future())
+        self._pending.append(item)
+        self._pending_rows += rows
+        EXECUTOR_QUEUE.inc(executor=self.name)
+        self._arrived.set()
+        if self._pending_rows >= self.batch_size:
+            self._full.set()
+        return await item.future
+
+    def _take(self) -> List[_Pending]:
+        batch: List[_Pending] = []
+        rows = 0
+        while self._pending:
+            item = self._pending[0]
+            if batch and rows + item.rows > self.batch_size:
+                break
+            self._pending.popleft()
+            self._pending_rows -= item.rows
+            EXECUTOR_QUEUE.dec(executor=self.name)
+            if item.future.done():  # caller went away while waiting
+                continue
+            batch.append(item)
+            rows += item.rows
+        if not self._pending:
+            self._arrived.clear()
+        if self._pending_rows < self.batch_size:
+            self._full.clear()
+        return batch
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            await self._arrived.wait()
+            if self._pending_rows < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._take()
+            if not batch:
+                self._slots.release()
+                continue
+            loop.create_task(self._run(batch))
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        rows = sum(item.rows for item in batch)
+        for item in batch:
+            item.context.run(record_stage, "analyze_queue", started - item.enqueued)
+        SCORING_BATCH_ROWS.observe(rows, scheduler=self.name)
+        try:
+            results = await self.handler([item.payload for item in batch], [item.context for item in batch])
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        else:
+            for item, result in zip(batch, results):
+                if item.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    item.future.set_exception(result)
+                else:
+                    item.future.set_result(result)
+            self._adapt(rows, time.perf_counter() - started)
+        finally:
+            self.batches += 1
+            self._slots.release()
+
+    def _adapt(self, rows: int, seconds: float) -> None:
+        """Exponentially weighted cost per row -> rows that fit in `target_latency`."""
+        if rows <= 0:
+            return
+        per_row = seconds / rows
+        self._row_seconds = per_row if self._row_seconds is None else 0.8 * self._row_seconds + 0.2 * per_row
+        fit = int(self.target_latency / self._row_seconds) if self._row_seconds > 0 else self.max_batch
+        self.batch_size = max(self.min_batch, min(self.max_batch, fit))
+
+    def _drop_pending(self) -> None:
+        for item in self._pending:
+            EXECUTOR_QUEUE.dec(executor=self.name)
+            if not item.future.done() and not item.future.get_loop().is_closed():
+                item.future.cancel()
+        self._pending.clear()
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._drop_pending()
@@ -0,0 +1,99 @@
+import numbers
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+
+def _average_path_length(n: np.ndarray) -> np.ndarray:
+    """c(n) from the Isolation Forest paper (same definition as scikit-learn)."""
+    n = np.asarray(n, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def _max_features(model: IsolationForest) -> int:
+    """Features each tree was fitted on, derived from the public params as sklearn's bagging does."""
+    if isinstance(model.max_features, numbers.Integral):
+        count = int(model.max_features)
+    else:
+        count = int(model.max_features * model.n_features_in_)
+    return max(1, count)
+
+
+class CompiledIsolationForest:
+    """
+    Inference-only view of a fitted IsolationForest.
+    All trees are flattened into one set of node arrays and every sample walks
+    every tree at once, one depth level per numpy step. For request-sized batches
+    this skips sklearn's per-call validation and per-tree joblib dispatch, which
+    dominate its predict() latency.
+    """
+
+    def __init__(self, model: IsolationForest):
+        features, thresholds, left, right, leaf_depth, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        # With every feature in use sklearn fits on X as it is, not on X[:, estimators_features_]
+        subsample = _max_features(model) != model.n_features_in_
+        for estimator, tree_features in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            # Leaves point at themselves, so extra traversal steps are no-ops
+            tree_left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            tree_right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            feature = np.where(is_leaf, 0, tree.feature)
+            if subsample:
+                feature = np.asarray(tree_features)[feature]
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+            # Root counts as depth 1, as in sklearn's compute_node_depths()
+            depth = np.ones(n_nodes, dtype=np.float64)
+            for node in range(n_nodes):  # children always have larger ids than parents
+                if not is_leaf[node]:
+                    depth[tree.children_left[node]] = depth[node] + 1
+                    depth[tree.children_right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()) - 1)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            left.append(tree_left)
+            right.append(tree_right)
+            leaf_depth.append(depth + _average_path_length(tree.n_node_samples) - 1.0)
+            roots.append(offset)
+            offset += n_nodes
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.leaf_depth = np.concatenate(leaf_depth)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        # Trees are fitted without bootstrap, so each root holds exactly max_samples rows
+        max_samples = model.estimators_[0].tree_.n_node_samples[0]
+        self.denominator = len(model.estimators_) * float(_average_path_length(np.array([max_samples]))[0])
+        self.offset_ = float(model.offset_)
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+        node = np.repeat(self.roots[:, None], n, axis=1)
+        rows = np.arange(n)[None, :]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        depths = self.leaf_depth[node].sum(axis=0)
+        if self.denominator == 0:
+            return -np.ones(n)
+        return -(2 ** (-depths / self.denominator))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
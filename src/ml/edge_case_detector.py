@@ -1,12 +1,21 @@
 
 import numpy as np
+import time
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import contextvars
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from sklearn.ensemble import IsolationForest
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Union
 from loguru import logger
 from pydantic import BaseModel
 from src.ml.anomaly_detection import AnomalyDetector
+from src.ml.features import FeatureEngine, FeatureRegistry
+from src.ml.compiled_forest import CompiledIsolationForest
+from src.ml.batch_scheduler import MicroBatcher, SCORING_BACKEND, SCORING_WORKERS
+from src.core.metrics import record_stage
 
 class RequirementAnalysis(BaseModel):
     id: str
@@ -16,24 +25,115 @@ class RequirementAnalysis(BaseModel):
     complexity_score: float
     risk_sources: List[str]
 
+def requirement_text(case: Dict) -> str:
+    """Text the detector scores: explicit `text`, else title + steps."""
+    if "text" in case:
+        return case["text"]
+    return f"{case.get('title', '')} {' '.join(case.get('steps', []))}"
+
+def predict_groups(model: Optional[CompiledIsolationForest], X: np.ndarray, bounds: List[Tuple[int, int]], contamination: float) -> np.ndarray:
+    """
+    -1 (outlier) / 1 per row. A pre-trained model scores rows independently, so a
+    whole batch goes through it at once; without one, each caller's rows
+    (`bounds`) are fitted on themselves, as if scored alone.
+    """
+    if model is not None:
+        return model.predict(X)
+    out = np.empty(len(X), dtype=np.int64)
+    for start, end in bounds:
+        out[start:end] = IsolationForest(contamination=contamination, random_state=42).fit_predict(X[start:end])
+    return out
+
+# Process backend: each worker holds the model its pool was started with
+_worker_model: Optional[CompiledIsolationForest] = None
+
+def _init_worker(model: Optional[CompiledIsolationForest]) -> None:
+    global _worker_model
+    _worker_model = model
+
+def _predict_in_worker(X: np.ndarray, bounds: List[Tuple[int, int]], contamination: float) -> np.ndarray:
+    return predict_groups(_worker_model, X, bounds, contamination)
+
+def _ready() -> bool:
+    return True
+
 class EdgeCaseDetector:
-    def __init__(self, contamination: float = 0.1):
+    def __init__(
+        self,
+        contamination: float = 0.1,
+        feature_registry: Optional[FeatureRegistry] = None,
+        physics_engine: Optional[AnomalyDetector] = None,
+        backend: str = SCORING_BACKEND,
+        workers: int = SCORING_WORKERS,
+    ):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown scoring backend: {backend}")
+        self.contamination = contamination
         self.ml_model = IsolationForest(contamination=contamination, random_state=42)
-        self.physics_engine = AnomalyDetector(threshold=2.5)
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # (model, version) once a pre-trained model is loaded; until then each batch is fitted on itself
+        self._active: Optional[Tuple[CompiledIsolationForest, str]] = None
+        self.model_version: Optional[str] = None
+        self.physics_engine = physics_engine if physics_engine is not None else AnomalyDetector(threshold=2.5)
+        self.backend = backend
+        self.workers = workers
+        # Concurrent analyze_complexity() calls are scored together, one batch per worker at a time
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batcher = MicroBatcher(self._score_batch, max_in_flight=workers)
+        self._processes: Optional[Tuple[Optional[Tuple[CompiledIsolationForest, str]], ProcessPoolExecutor]] = None
+        self._processes_lock = threading.Lock()
+        # Column 0 must stay the text length: it feeds the Z-Score engine and complexity_score
+        self.feature_engine = FeatureEngine(feature_registry)
 
     def _extract_features(self, requirements: List[Dict]) -> np.ndarray:
-        features = []
-        for req in requirements:
-            text = req.get("text", "")
-            features.append([
-                len(text),
-                text.count(",") + text.count("and"),
-                1 if "must" in text.lower() else 0,
-                1 if "user" in text.lower() else 0,
-                1 if "error" in text.lower() else 0
-            ])
-        return np.array(features, dtype=float)
+        return self.feature_engine.transform([req.get("text", "") for req in requirements])
+
+    def fit(self, requirements: List[Dict]) -> IsolationForest:
+        """Offline training on a historical corpus; does not touch the live model."""
+        X = self._extract_features(requirements)
+        model = IsolationForest(contamination=self.contamination, random_state=42)
+        model.fit(X)
+        return model
+
+    def load_model(self, model: IsolationForest, version: str) -> None:
+        """
+        Warm swap: scoring reads `_active` (compiled model + version) once per batch and it is
+        replaced by one reference assignment, so in-flight batches keep the model they started
+        with. `ml_model` and `model_version` are only for reporting and are updated after it.
+        """
+        self._active = (CompiledIsolationForest(model), version)
+        self.ml_model, self.model_version = model, version
+        if self.backend == "process":
+            self.warm()
+        logger.info(f"EdgeCaseDetector now scoring with pre-trained model {version}")
+
+    def _worker_pool(self, active: Optional[Tuple[CompiledIsolationForest, str]]) -> ProcessPoolExecutor:
+        """Worker processes holding `active`'s model; a new model gets a new pool and the old one drains."""
+        with self._processes_lock:
+            if self._processes is None or self._processes[0] is not active:
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # spawn: forking a process that already runs threads (asyncio, executors) is unsafe
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(active[0] if active is not None else None,),
+                )
+                previous, self._processes = self._processes, (active, pool)
+                if previous is not None:
+                    previous[1].shutdown(wait=False)
+            return self._processes[1]
+
+    def warm(self) -> None:
+        """Starts the worker processes (and their imports) off the first request's path."""
+        if self.backend == "process":
+            pool = self._worker_pool(self._active)
+            for _ in range(self.workers):
+                pool.submit(_ready)
+
+    def _predict(self, X: np.ndarray, bounds: List[Tuple[int, int]], active) -> np.ndarray:
+        if self.backend == "process":
+            return self._worker_pool(active).submit(_predict_in_worker, X, bounds, self.contamination).result()
+        # Score-only path with a pre-trained model: no refit per request
+        return predict_groups(active[0] if active is not None else None, X, bounds, self.contamination)
 
     def _sanitize(self, value):
         if hasattr(value, "item"):
@@ -43,43 +143,122 @@ class EdgeCaseDetector:
         return value
 
     def _analyze_sync(self, requirements: List[Dict]) -> List[RequirementAnalysis]:
-        if not requirements:
-            return []
+        """Scores one caller's requirements on the calling thread, bypassing the batcher."""
+        return self._analyze_groups([requirements], [contextvars.copy_context()], self._active)[0]
+
+    @contextmanager
+    def _timed(self, name: str, contexts: List[contextvars.Context]):
+        """A batch stage, recorded into every caller's request timings."""
+        started = time.perf_counter()
         try:
-            X = self._extract_features(requirements)
-            ml_predictions = self.ml_model.fit_predict(X).tolist()
-            physics_anomalies = self.physics_engine.detect(X[:, 0].tolist())
-
-            results = []
-            for i, req in enumerate(requirements):
-                is_ml = (ml_predictions[i] == -1)
-                is_phys = bool(physics_anomalies[i])
-                
-                risk = "NORMAL"
-                if is_ml and is_phys:
-                    risk = "CRITICAL"
-                elif is_ml or is_phys:
-                    risk = "HIGH"
-
-                sources = []
-                if is_ml:
-                    sources.append("Statistical_Outlier")
-                if is_phys:
-                    sources.append("Physics_ZScore_Deviation")
-
-                results.append(RequirementAnalysis(
-                    id=req.get("id", f"REQ_{i}"),
-                    text=req.get("text", ""),
-                    is_edge_case=is_ml or is_phys,
-                    risk_level=risk,
-                    complexity_score=float(X[i][0]),
-                    risk_sources=sources
-                ))
-            return results
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            for context in contexts:
+                context.run(record_stage, name, seconds)
+
+    def _analyze_groups(
+        self,
+        groups: List[List[Dict]],
+        contexts: List[contextvars.Context],
+        active: Optional[Tuple[CompiledIsolationForest, str]],
+    ) -> List[List[RequirementAnalysis]]:
+        """
+        One vectorized feature extraction and model pass over every caller's rows.
+        The Z-Score engine still sees each caller's rows on their own, so results
+        are the same as scoring each call separately.
+        """
+        bounds, start = [], 0
+        for group in groups:
+            bounds.append((start, start + len(group)))
+            start += len(group)
+        if start == 0:
+            return [[] for _ in groups]
+        with self._timed("feature_extraction", contexts):
+            X = self._extract_features([req for group in groups for req in group])
+        with self._timed("ml_predict" if active is not None else "ml_fit_predict", contexts):
+            ml_predictions = self._predict(X, bounds, active).tolist()
+        with self._timed("physics", contexts):
+            physics_anomalies = self.physics_engine.detect_groups(X[:, 0].tolist(), bounds)
+
+        return [
+            self._results(group, X[a:b], ml_predictions[a:b], physics)
+            for group, (a, b), physics in zip(groups, bounds, physics_anomalies)
+        ]
+
+    def _analyze_isolated(
+        self,
+        groups: List[List[Dict]],
+        contexts: List[contextvars.Context],
+        active: Optional[Tuple[CompiledIsolationForest, str]],
+    ) -> List[Union[List[RequirementAnalysis], Exception]]:
+        """
+        `_analyze_groups` for a batch. If the batch fails, each call is retried on
+        its own, so one bad call gets its error and the others still get results.
+        """
+        try:
+            return list(self._analyze_groups(groups, contexts, active))
         except Exception as e:
-            logger.error(f"ML Error: {e}")
-            return []
+            if len(groups) == 1:
+                raise
+            logger.warning(f"Scoring batch of {len(groups)} calls failed ({e}); retrying them one by one")
+        results: List[Union[List[RequirementAnalysis], Exception]] = []
+        for group, context in zip(groups, contexts):
+            try:
+                results.append(self._analyze_groups([group], [context], active)[0])
+            except Exception as e:
+                logger.error(f"ML Error: {e}")
+                results.append(e)
+        return results
 
-    async def analyze_complexity(self, requirements: List[Dict]) -> List[RequirementAnalysis]:
+    def _results(self, requirements: List[Dict], X: np.ndarray, ml_predictions: List[int], physics_anomalies: List[bool]) -> List[RequirementAnalysis]:
+        results = []
+        for i, req in enumerate(requirements):
+            is_ml = (ml_predictions[i] == -1)
+            is_phys = bool(physics_anomalies[i])
+            
+            risk = "NORMAL"
+            if is_ml and is_phys:
+                risk = "CRITICAL"
+            elif is_ml or is_phys:
+                risk = "HIGH"
+
+            sources = []
+            if is_ml:
+                sources.append("Statistical_Outlier")
+            if is_phys:
+                sources.append("Physics_ZScore_Deviation")
+
+            results.append(RequirementAnalysis(
+                id=req.get("id", f"REQ_{i}"),
+                text=req.get("text", ""),
+                is_edge_case=is_ml or is_phys,
+                risk_level=risk,
+                complexity_score=float(X[i][0]),
+                risk_sources=sources
+            ))
+        return results
+
+    async def _score_batch(
+        self, groups: List[List[Dict]], contexts: List[contextvars.Context]
+    ) -> List[Union[List[RequirementAnalysis], Exception]]:
+        # The model is read once per batch: a reload mid-batch applies from the next one
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(self.executor, self._analyze_sync, requirements)
+        return await loop.run_in_executor(self.executor, self._analyze_isolated, groups, contexts, self._active)
+
+    async def analyze_complexity(self, requirements: List[Dict]) -> List[RequirementAnalysis]:
+        """
+        Scores `requirements` together with whatever other callers submit within
+        a few milliseconds. Raises SchedulerSaturated when the batch queue is full.
+        """
+        if not requirements:
+            return []
+        return await self.batcher.submit(requirements, len(requirements))
+
+    def close(self) -> None:
+        self.batcher.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self._processes_lock:
+            if self._processes is not None:
+                self._processes[1].shutdown(wait=False, cancel_futures=True)
+                self._processes = None
@@ -0,0 +1,113 @@
+import numpy as np
+from collections import OrderedDict
+from functools import cached_property
+from itertools import repeat
+from typing import List, Sequence, Callable, Iterable, Optional
+
+
+class Corpus:
+    """
+    The texts of one batch, with derived views computed at most once per batch.
+    Features read `texts` or `lowered`; nobody lowercases the same string twice.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = texts
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @cached_property
+    def lowered(self) -> List[str]:
+        return list(map(str.lower, self.texts))
+
+
+# A feature maps the whole corpus to one value per text
+FeatureFn = Callable[[Corpus], Iterable[float]]
+
+
+def count_of(*needles: str) -> FeatureFn:
+    """Non-overlapping, case-sensitive occurrences of each needle, summed (str.count semantics)."""
+    def feature(corpus: Corpus) -> Iterable[float]:
+        n = len(corpus)
+        total = np.zeros(n, dtype=np.float32)
+        for needle in needles:
+            total += np.fromiter(map(str.count, corpus.texts, repeat(needle)), dtype=np.float32, count=n)
+        return total
+    return feature
+
+
+def contains(keyword: str) -> FeatureFn:
+    """1.0 if the lowercased text contains `keyword`, else 0.0."""
+    keyword = keyword.lower()
+
+    def feature(corpus: Corpus) -> Iterable[float]:
+        return map(str.__contains__, corpus.lowered, repeat(keyword))
+    return feature
+
+
+def text_length(corpus: Corpus) -> Iterable[float]:
+    return map(len, corpus.texts)
+
+
+class FeatureRegistry:
+    """Ordered name -> feature mapping; column order of the matrix follows registration order."""
+
+    def __init__(self):
+        self._features: "OrderedDict[str, FeatureFn]" = OrderedDict()
+
+    def register(self, name: str, fn: Optional[FeatureFn] = None):
+        """Registers `fn` directly, or acts as a decorator when `fn` is omitted."""
+        if fn is None:
+            return lambda f: self.register(name, f)
+        if name in self._features:
+            raise ValueError(f"Feature already registered: {name}")
+        self._features[name] = fn
+        return fn
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._features)
+
+    def items(self):
+        return self._features.items()
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+
+def default_registry() -> FeatureRegistry:
+    """The original five EdgeCaseDetector features, in their original column order."""
+    registry = FeatureRegistry()
+    registry.register("length", text_length)
+    registry.register("conjunctions", count_of(",", "and"))
+    registry.register("has_must", contains("must"))
+    registry.register("has_user", contains("user"))
+    registry.register("has_error", contains("error"))
+    return registry
+
+
+class FeatureEngine:
+    """
+    Batch feature extraction over a whole corpus.
+    Each feature fills one column of a preallocated float32 matrix using C-level
+    iteration (map/str methods) instead of a per-requirement Python loop.
+    float32 is also the dtype scikit-learn's trees use internally, so no copy follows.
+    """
+
+    def __init__(self, registry: Optional[FeatureRegistry] = None):
+        self.registry = registry if registry is not None else default_registry()
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        n = len(texts)
+        out = np.empty((n, len(self.registry)), dtype=np.float32)
+        if n == 0:
+            return out
+        corpus = Corpus(texts)
+        for column, (_, fn) in enumerate(self.registry.items()):
+            values = fn(corpus)
+            if isinstance(values, np.ndarray):
+                out[:, column] = values
+            else:
+                out[:, column] = np.fromiter(values, dtype=np.float32, count=n)
+        return out
@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import joblib
+from pathlib import Path
+from typing import List, Optional, Tuple, Any
+from loguru import logger
+from pydantic import BaseModel
+
+BASE_PATH = Path(__file__).resolve().parent.parent.parent
+MODEL_DIR = Path(os.getenv("ZETA_MODEL_DIR", BASE_PATH / "models" / "edge_case"))
+
+
+class ModelVersion(BaseModel):
+    version: str
+    created_at: float
+    n_samples: int
+    features: List[str]
+    contamination: float
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk store for fitted EdgeCaseDetector models.
+    Layout: <root>/<version>/model.joblib + meta.json. Versions are immutable;
+    "latest" is simply the highest version number.
+    """
+
+    MODEL_FILE = "model.joblib"
+    META_FILE = "meta.json"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def save(self, model: Any, features: List[str], n_samples: int, contamination: float) -> ModelVersion:
+        self.root.mkdir(parents=True, exist_ok=True)
+        existing = self.versions()
+        number = int(existing[-1].version[1:]) + 1 if existing else 1
+        meta = ModelVersion(
+            version=f"v{number:04d}",
+            created_at=time.time(),
+            n_samples=n_samples,
+            features=features,
+            contamination=contamination,
+        )
+        # Write into a temp dir and rename, so readers never see a half-written version
+        tmp = self.root / f".{meta.version}.tmp"
+        tmp.mkdir()
+        joblib.dump(model, tmp / self.MODEL_FILE)
+        (tmp / self.META_FILE).write_text(meta.model_dump_json(indent=2))
+        tmp.rename(self.root / meta.version)
+        logger.info(f"Saved model {meta.version} ({n_samples} samples) to {self.root}")
+        return meta
+
+    def versions(self) -> List[ModelVersion]:
+        if not self.root.exists():
+            return []
+        found = []
+        for meta_path in sorted(self.root.glob(f"v*/{self.META_FILE}")):
+            found.append(ModelVersion(**json.loads(meta_path.read_text())))
+        return found
+
+    def latest(self) -> Optional[ModelVersion]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def load(self, version: Optional[str] = None) -> Tuple[Any, ModelVersion]:
+        meta = self.latest() if version is None else next((v for v in self.versions() if v.version == version), None)
+        if meta is None:
+            raise FileNotFoundError(f"Model version not found: {version or 'latest'}")
+        # mmap_mode keeps the tree arrays on disk and shares pages between workers
+        model = joblib.load(self.root / meta.version / self.MODEL_FILE, mmap_mode="r")
+        return model, meta
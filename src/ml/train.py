@@ -0,0 +1,57 @@
+"""
+Offline training for the EdgeCaseDetector IsolationForest.
+
+    python -m src.ml.train --corpus history.jsonl [--contamination 0.1] [--model-dir models/edge_case]
+
+The corpus is a JSON array or JSONL file of test cases / requirements
+(anything with `text`, or `title` + `steps`). Each run writes a new
+immutable version to the model registry; the API picks it up on start
+or via POST /models/reload.
+"""
+import json
+import argparse
+from pathlib import Path
+from typing import List, Dict
+from loguru import logger
+from src.ml.edge_case_detector import EdgeCaseDetector, requirement_text
+from src.ml.model_registry import ModelRegistry, MODEL_DIR
+
+
+def load_corpus(path: str) -> List[Dict]:
+    raw = Path(path).read_text(encoding="utf-8").strip()
+    if raw.startswith("["):
+        records = json.loads(raw)
+    else:
+        records = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    # Suite exports nest cases under "test_cases"
+    flat: List[Dict] = []
+    for record in records:
+        flat.extend(record["test_cases"] if "test_cases" in record else [record])
+    return [{"text": requirement_text(case)} for case in flat]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and register the edge case IsolationForest")
+    parser.add_argument("--corpus", required=True, help="JSON/JSONL file of historical test cases")
+    parser.add_argument("--contamination", type=float, default=0.1)
+    parser.add_argument("--model-dir", default=str(MODEL_DIR))
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if len(corpus) < 10:
+        raise SystemExit(f"Corpus too small to train on ({len(corpus)} records)")
+
+    detector = EdgeCaseDetector(contamination=args.contamination)
+    logger.info(f"Training IsolationForest on {len(corpus)} records...")
+    model = detector.fit(corpus)
+    meta = ModelRegistry(args.model_dir).save(
+        model,
+        features=detector.feature_engine.registry.names,
+        n_samples=len(corpus),
+        contamination=args.contamination,
+    )
+    print(meta.version)
+
+
+if __name__ == "__main__":
+    main()
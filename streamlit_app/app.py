@@ -2,23 +2,144 @@
 import streamlit as st
 import requests
 import pandas as pd
+import numpy as np
 import os
+import json
+import math
+from typing import Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import altair as alt
 
 load_dotenv()
 API_URL = os.getenv("API_URL", "http://localhost:8000")
+# (connect, read) seconds; generation streams for as long as Gemini writes, so it gets a longer read timeout
+API_TIMEOUT = (3.05, float(os.getenv("ZETA_UI_TIMEOUT", 30)))
+STREAM_TIMEOUT = (3.05, float(os.getenv("ZETA_UI_STREAM_TIMEOUT", 600)))
+# Stored suites never change, so their pages can stay cached for a long time
+CACHE_TTL = int(os.getenv("ZETA_UI_CACHE_TTL", 3600))
+PAGE_SIZES = [25, 50, 100, 250]
+RISK_LEVELS = ["CRITICAL", "HIGH", "NORMAL"]
+# The values the generation prompt allows (config/prompts.yaml)
+PRIORITIES = ["Critical", "High", "Medium", "Low"]
+FETCH_PAGE_SIZE = 500  # the API's maximum page size
+CHART_BINS = 30
 st.set_page_config(page_title="Zeta", page_icon="⚛️", layout="wide")
 
+
+@st.cache_resource
+def api() -> requests.Session:
+    """One keep-alive connection pool per server process, shared by every browser session."""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 504), allowed_methods=frozenset({"GET"}))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=256, show_spinner=False)
+def fetch_page(
+    suite_id: str,
+    offset: int,
+    limit: int,
+    risk_level: Optional[str] = None,
+    case_type: Optional[str] = None,
+    priority: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One filtered page of a stored suite; filtering and paging happen in the API."""
+    params = {"offset": offset, "limit": limit, "risk_level": risk_level, "type": case_type, "priority": priority}
+    resp = api().get(
+        f"{API_URL}/suites/{suite_id}",
+        params={k: v for k, v in params.items() if v is not None},
+        timeout=API_TIMEOUT,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def recent_suites() -> list:
+    resp = api().get(f"{API_URL}/suites", params={"limit": 20}, timeout=API_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()["suites"]
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=64, show_spinner=False)
+def complexity_summary(suite_id: str) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Complexity histogram of a whole suite, binned here so the chart gets at most
+    CHART_BINS bars per risk level however many cases there are.
+    """
+    scores, levels = [], []
+    offset, total = 0, 1
+    while offset < total:
+        resp = api().get(
+            f"{API_URL}/suites/{suite_id}", params={"offset": offset, "limit": FETCH_PAGE_SIZE}, timeout=API_TIMEOUT
+        )
+        resp.raise_for_status()
+        page = resp.json()
+        total = page["total"]
+        for case in page["test_cases"]:
+            analysis = case.get("risk_analysis") or {}
+            scores.append(float(analysis.get("complexity_score", 0.0)))
+            levels.append(analysis.get("risk_level", "NORMAL"))
+        offset += FETCH_PAGE_SIZE
+
+    scores, levels = np.asarray(scores), np.asarray(levels)
+    counts = {level: int((levels == level).sum()) for level in RISK_LEVELS}
+    if scores.size == 0:
+        return pd.DataFrame(columns=["From", "To", "Risk", "Cases"]), counts
+    edges = np.histogram_bin_edges(scores, bins=min(CHART_BINS, max(1, np.unique(scores).size)))
+    rows = []
+    for level in RISK_LEVELS:
+        binned, _ = np.histogram(scores[levels == level], bins=edges)
+        rows.extend(
+            {"From": edges[i], "To": edges[i + 1], "Risk": level, "Cases": int(n)}
+            for i, n in enumerate(binned) if n
+        )
+    return pd.DataFrame(rows), counts
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=512, show_spinner=False)
+def generate_code(suite_id: str, case_id: str, _case: Dict[str, Any]) -> str:
+    """Keyed by suite and case id only: a stored case never changes, so its script is generated once."""
+    resp = api().post(f"{API_URL}/codegen", json={"test_plan": _case}, timeout=API_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()["python_code"]
+
+
+def _error(e: requests.RequestException) -> None:
+    detail = e.response.text if getattr(e, "response", None) is not None else str(e)
+    st.error(f"API error: {detail}")
+
+
 st.title("⚛️ Zeta")
 st.markdown("**Autonomous QA Architect & Physics Engine**")
 
 tab1, tab2, tab3, tab4 = st.tabs(["📝 Generate", "🧪 Cases", "💻 Code", "📊 Analytics"])
 
-if 'test_suite' not in st.session_state:
-    st.session_state['test_suite'] = None
-if 'selected_case' not in st.session_state:
-    st.session_state['selected_case'] = None
+# Only ids live in the session; cases are fetched page by page from the API
+for key in ("suite_id", "selected_case", "code_for"):
+    st.session_state.setdefault(key, None)
+
+with st.sidebar:
+    try:
+        suites = recent_suites()
+    except requests.RequestException:
+        suites = []
+    if suites:
+        labels = {s["suite_id"]: f"{s['suite_id'][:8]} · {s['case_count']} cases" for s in suites}
+        ids = list(labels)
+        current = st.session_state["suite_id"]
+        chosen = st.selectbox(
+            "Suite", ids, index=ids.index(current) if current in ids else 0, format_func=labels.get
+        )
+        if chosen != current and st.button("Open suite"):
+            st.session_state["suite_id"] = chosen
+            st.session_state["selected_case"] = None
+            st.rerun()
 
 # TAB 1
 with tab1:
@@ -26,63 +147,122 @@ with tab1:
     if st.button("🚀 Generate"):
         with st.spinner("Zeta is calculating Z-Scores..."):
             try:
-                resp = requests.post(f"{API_URL}/generate", json={"requirements_text": req_text})
-                if resp.status_code == 200:
-                    st.session_state['test_suite'] = resp.json()
-                    st.success("Generated!")
-                else:
-                    st.error(resp.text)
+                # Streamed so cases render while Gemini is still writing the rest
+                with api().post(
+                    f"{API_URL}/generate/stream", json={"requirements_text": req_text}, stream=True, timeout=STREAM_TIMEOUT
+                ) as resp:
+                    if resp.status_code == 200:
+                        live = st.empty()
+                        received = 0
+                        for line in resp.iter_lines():
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            kind = event.get("event")
+                            if kind == "test_case":
+                                received += 1
+                                live.info(f"Received {received} test cases — latest: {event['data'].get('title', 'Untitled')}")
+                            elif kind == "done":
+                                st.session_state["suite_id"] = event["suite_id"]
+                                st.session_state["selected_case"] = None
+                                recent_suites.clear()
+                                st.success(f"Generated {event['count']} test cases!")
+                            elif kind == "error":
+                                st.error(event.get("detail"))
+                        live.empty()
+                    else:
+                        st.error(resp.text)
             except Exception as e:
                 st.error(f"Error: {e}")
 
 # TAB 2
 with tab2:
-    if st.session_state['test_suite']:
-        cases = st.session_state['test_suite'].get("test_cases", [])
-        for tc in cases:
-            title = tc.get('title') or tc.get('name') or "Untitled"
-            type_ = tc.get('type') or "Unknown"
-            
-            with st.expander(f"{title} ({type_})"):
-                st.write(tc.get('steps', []))
-                if st.button("Select", key=tc.get('id', '0')):
-                    st.session_state['selected_case'] = tc
-                    st.toast("Selected!")
+    suite_id = st.session_state["suite_id"]
+    if suite_id:
+        f1, f2, f3, f4 = st.columns(4)
+        risk = f1.selectbox("Risk level", ["All"] + RISK_LEVELS)
+        case_type = f2.text_input("Type", placeholder="e.g. Negative").strip()
+        priority = f3.selectbox("Priority", ["All"] + PRIORITIES)
+        page_size = f4.selectbox("Per page", PAGE_SIZES, index=1)
+        filters = {
+            "risk_level": None if risk == "All" else risk,
+            "case_type": case_type or None,
+            "priority": None if priority == "All" else priority,
+        }
+
+        try:
+            page_number = st.session_state.get("case_page", 1)
+            page = fetch_page(suite_id, (page_number - 1) * page_size, page_size, **filters)
+            pages = max(1, math.ceil(page["total"] / page_size))
+            if page_number > pages:  # filters narrowed the result
+                page_number = st.session_state["case_page"] = pages
+                page = fetch_page(suite_id, (page_number - 1) * page_size, page_size, **filters)
+        except requests.RequestException as e:
+            _error(e)
+        else:
+            cases = page["test_cases"]
+            table = pd.DataFrame([{
+                "ID": tc.get("id", "Unknown"),
+                "Title": tc.get("title") or tc.get("name") or "Untitled",
+                "Type": tc.get("type") or "Unknown",
+                "Priority": tc.get("priority"),
+                "Risk": (tc.get("risk_analysis") or {}).get("risk_level"),
+                "Complexity": (tc.get("risk_analysis") or {}).get("complexity_score"),
+            } for tc in cases])
+            st.caption(f"{page['total']} of {page['case_count']} cases match")
+            selection = st.dataframe(
+                table, hide_index=True, width="stretch",
+                on_select="rerun", selection_mode="single-row",
+                key=f"cases_{suite_id}_{page_number}_{page_size}_{risk}_{case_type}_{priority}",
+            )
+            st.number_input("Page", min_value=1, max_value=pages, step=1, key="case_page")
+
+            rows = selection.selection.rows
+            if rows:
+                st.session_state["selected_case"] = {"suite_id": suite_id, **cases[rows[0]]}
+            selected = st.session_state["selected_case"]
+            if selected and selected["suite_id"] == suite_id:
+                st.subheader(f"{selected.get('id')} · {selected.get('title', 'Untitled')}")
+                st.write(selected.get("steps", []))
+                if selected.get("expected_result"):
+                    st.markdown(f"**Expected:** {selected['expected_result']}")
+    else:
+        st.info("Generate a suite or open one from the sidebar.")
 
 # TAB 3
 with tab3:
-    if st.session_state['selected_case']:
+    selected = st.session_state["selected_case"]
+    if selected:
+        key = (selected["suite_id"], selected.get("id"))
         if st.button("Generate Code"):
-            resp = requests.post(f"{API_URL}/codegen", json={"test_plan": st.session_state['selected_case']})
-            if resp.status_code == 200:
-                st.code(resp.json()['python_code'], language='python')
+            st.session_state["code_for"] = key
+        if st.session_state["code_for"] == key:
+            case = {k: v for k, v in selected.items() if k != "suite_id"}
+            try:
+                st.code(generate_code(*key, case), language='python')
+            except requests.RequestException as e:
+                _error(e)
 
-# TAB 4 - Restored Analytics (Using Pandas/Altair)
+# TAB 4 - Aggregated analytics: the chart size does not grow with the suite
 with tab4:
-    if st.session_state['test_suite']:
-        cases = st.session_state['test_suite'].get("test_cases", [])
-        
-        # Metrics
-        total = len(cases)
-        edge_cases = sum(1 for c in cases if c.get('risk_analysis', {}).get('is_edge_case'))
-        
-        c1, c2 = st.columns(2)
-        c1.metric("Total Tests", total)
-        c2.metric("Critical Edge Cases", edge_cases)
-        
-        # Chart
-        data = []
-        for c in cases:
-            data.append({
-                "ID": c.get('id', 'Unknown'),
-                "Complexity": c.get('risk_analysis', {}).get('complexity_score', 0)
-            })
-        
-        if data:
-            df = pd.DataFrame(data)
-            chart = alt.Chart(df).mark_bar().encode(
-                x='ID',
-                y='Complexity',
-                tooltip=['ID', 'Complexity']
-            ).properties(title="Requirement Entropy (Z-Score)")
-            st.altair_chart(chart, use_container_width=True)
+    suite_id = st.session_state["suite_id"]
+    if suite_id:
+        try:
+            bins, counts = complexity_summary(suite_id)
+        except requests.RequestException as e:
+            _error(e)
+        else:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Total Tests", sum(counts.values()))
+            c2.metric("Edge Cases", counts["CRITICAL"] + counts["HIGH"])
+            c3.metric("Critical", counts["CRITICAL"])
+
+            if not bins.empty:
+                chart = alt.Chart(bins).mark_bar().encode(
+                    x=alt.X("From:Q", bin="binned", title="Complexity (characters)"),
+                    x2="To:Q",
+                    y=alt.Y("sum(Cases):Q", title="Test cases"),
+                    color=alt.Color("Risk:N", scale=alt.Scale(domain=RISK_LEVELS, range=["#d62728", "#ff7f0e", "#1f77b4"])),
+                    tooltip=["Risk", "Cases", alt.Tooltip("From:Q", format=".0f"), alt.Tooltip("To:Q", format=".0f")],
+                ).properties(title="Requirement Entropy (Z-Score)")
+                st.altair_chart(chart, width="stretch")
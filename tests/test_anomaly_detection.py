@@ -0,0 +1,45 @@
+import numpy as np
+from src.ml.anomaly_detection import AnomalyDetector, RunningStats
+
+
+def test_batch_mode_unchanged():
+    detector = AnomalyDetector(threshold=2.5)
+    assert detector.detect([5]) == [False]
+    assert detector.detect([10] * 20 + [500]) == [False] * 20 + [True]
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(100, 15, 1000)
+    stats = RunningStats()
+    for chunk in np.array_split(values, 37):
+        stats.update(chunk)
+    assert np.isclose(stats.mean, values.mean())
+    assert np.isclose(stats.std, values.std())
+
+
+def test_online_mode_flags_single_points_against_baseline():
+    detector = AnomalyDetector(threshold=2.5, online=True, min_samples=30)
+    rng = np.random.default_rng(1)
+    for value in rng.normal(100, 10, 200):
+        detector.detect([value])
+    assert detector.detect([101.0]) == [False]
+    assert detector.detect([400.0]) == [True]
+
+
+def test_decay_tracks_recent_values():
+    stats = RunningStats(decay=0.9)
+    for value in [10.0] * 500 + [50.0] * 100:
+        stats.update(np.array([value]))
+    # Effective window is ~1 / (1 - decay) = 10 points
+    assert stats.mean > 49.9 and stats.count < 11
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    detector = AnomalyDetector(online=True, snapshot_path=path)
+    detector.detect(list(range(100)))
+    detector.save()
+
+    restored = AnomalyDetector(online=True, snapshot_path=path)
+    assert restored.load()
+    assert restored.stats.count == 100 and np.isclose(restored.stats.mean, 49.5)
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from src.ml.anomaly_detection import AnomalyDetector
+from src.ml.batch_scheduler import MicroBatcher, SchedulerSaturated
+from src.ml.edge_case_detector import EdgeCaseDetector
+from benchmarks.feature_extraction import synthetic_requirements
+
+
+def test_concurrent_calls_share_a_batch_and_get_their_own_results():
+    seen = []
+
+    async def handler(payloads, contexts):
+        seen.append(len(payloads))
+        return [[x * 10 for x in payload] for payload in payloads]
+
+    batcher = MicroBatcher(handler, max_wait=0.05, max_in_flight=1, min_batch=100)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit([i, i + 1], rows=2) for i in range(20)))
+
+    results = asyncio.run(main())
+    assert results == [[i * 10, (i + 1) * 10] for i in range(20)]
+    assert seen == [20]
+
+
+def test_full_queue_is_rejected():
+    async def handler(payloads, contexts):
+        await asyncio.sleep(0.05)
+        return payloads
+
+    batcher = MicroBatcher(handler, max_wait=0, max_in_flight=1, max_pending=2, min_batch=1, max_batch=1)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i, rows=1) for i in range(6)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert sum(isinstance(r, SchedulerSaturated) for r in results) >= 1
+    assert [r for r in results if not isinstance(r, Exception)] == sorted(r for r in results if not isinstance(r, Exception))
+
+
+def test_batch_size_follows_cost_per_row():
+    batcher = MicroBatcher(lambda p, c: None, target_latency=0.01, min_batch=4, max_batch=1000)
+    batcher._adapt(rows=100, seconds=0.1)  # 1 ms per row
+    assert batcher.batch_size == 10
+    batcher._row_seconds = None
+    batcher._adapt(rows=100, seconds=0.0001)
+    assert batcher.batch_size == 1000
+
+
+def test_batched_scoring_matches_scoring_each_call_alone():
+    history = [{"text": text} for text in synthetic_requirements(500, seed=1)]
+    calls = [
+        [{"id": f"TC_{i}_{j}", "text": text} for j, text in enumerate(synthetic_requirements(4, seed=i))]
+        for i in range(30)
+    ]
+    # Without a pre-trained model each call is still fitted on its own rows
+    for pretrained, calls in ((True, calls), (False, calls[:4])):
+        detector = EdgeCaseDetector(physics_engine=AnomalyDetector(log_interval=3600), workers=1)
+        if pretrained:
+            detector.load_model(detector.fit(history), "test")
+        expected = [detector._analyze_sync(call) for call in calls]
+
+        async def main(calls=calls):
+            return await asyncio.gather(*(detector.analyze_complexity(call) for call in calls))
+
+        assert asyncio.run(main()) == expected
+        assert detector.batcher.batches < len(calls)
+        detector.close()
+
+
+def test_grouped_physics_matches_separate_calls():
+    engine = AnomalyDetector(threshold=1.5, log_interval=3600)
+    values = [1, 2, 3, 50, 4, 7, 7, 9, 1, 1, 1, 1, 30]
+    bounds = [(0, 5), (5, 6), (6, 8), (8, 8), (8, 13)]
+    assert engine.detect_groups(values, bounds) == [engine.detect(values[a:b]) for a, b in bounds]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        EdgeCaseDetector(backend="gpu")
+
+
+def test_a_failing_call_does_not_fail_its_batch_mates():
+    detector = EdgeCaseDetector(physics_engine=AnomalyDetector(log_interval=3600), workers=1)
+    good = [{"id": "TC_1", "text": "The user must log in."}, {"id": "TC_2", "text": "Passwords expire after 90 days."}]
+
+    async def main():
+        return await asyncio.gather(
+            detector.analyze_complexity(good), detector.analyze_complexity(["not a case"]), return_exceptions=True
+        )
+
+    ok, failed = asyncio.run(main())
+    assert [r.id for r in ok] == ["TC_1", "TC_2"]
+    assert isinstance(failed, AttributeError)
+    with pytest.raises(AttributeError):
+        detector._analyze_sync(["not a case"])
+    detector.close()
@@ -0,0 +1,24 @@
+import asyncio
+from benchmarks.fake_llm import FakeGeminiModel, MALFORMATIONS
+from benchmarks.harness import compare, summarize_ms
+from src.core.json_stream import salvage_test_cases
+
+
+def test_fake_llm_malformations_are_salvageable():
+    model = FakeGeminiModel(latency_ms=0, jitter_ms=0, malformation_rate=1.0, cases_per_response=5)
+
+    async def responses():
+        return [(await model.generate_content_async(f"prompt {i}")).text for i in range(4 * len(MALFORMATIONS))]
+
+    texts = asyncio.run(responses())
+    assert model.malformed == len(texts)
+    for text in texts:
+        result = salvage_test_cases(text)
+        assert 4 <= len(result.test_cases) <= 5
+
+
+def test_compare_flags_costs_up_and_throughput_down_only():
+    baseline = {"meta": {}, "load": {"throughput_rps": 100, "requests": 50, "latency_ms": summarize_ms([0.1, 0.2])}}
+    current = {"meta": {}, "load": {"throughput_rps": 80, "requests": 500, "latency_ms": summarize_ms([0.1, 0.21])}}
+    flagged = {row["metric"] for row in compare(baseline, current, threshold=0.10) if row["regression"]}
+    assert flagged == {"load.throughput_rps"}
@@ -0,0 +1,28 @@
+from src.core.chunker import DocumentChunker
+from src.core.requirement_parser import ParsedDocument, PAGE_BREAK
+
+
+def test_small_document_is_single_chunk():
+    chunks = DocumentChunker(max_tokens=1000).chunk("The user must log in.")
+    assert len(chunks) == 1
+    assert chunks[0].content == "The user must log in."
+
+
+def test_splits_on_pages_and_headings_within_budget():
+    pages = [f"# Section {i}\n" + ("The user must do thing. " * 40) for i in range(10)]
+    doc = ParsedDocument(filename="spec.pdf", content=PAGE_BREAK.join(pages), char_count=0)
+    chunker = DocumentChunker(max_tokens=300)
+    chunks = chunker.chunk(doc)
+
+    assert len(chunks) > 1
+    assert all(len(c.content) <= chunker.max_chars for c in chunks)
+    # Nothing is dropped and every chunk starts on a section boundary
+    assert sum(c.content.count("# Section") for c in chunks) == 10
+    assert all(c.content.startswith("# Section") for c in chunks)
+
+
+def test_oversized_paragraph_is_hard_split():
+    chunker = DocumentChunker(max_tokens=25)
+    chunks = chunker.chunk("word " * 200)
+    assert len(chunks) > 1
+    assert all(len(c.content) <= chunker.max_chars for c in chunks)
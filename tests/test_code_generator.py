@@ -0,0 +1,80 @@
+import os
+import sys
+import subprocess
+import ast
+import asyncio
+from src.core.code_generator import SeleniumGenerator, shutdown_codegen_pool
+
+
+def make_cases(n):
+    return [{"id": f"TC_{i:03d}", "steps": [f"Open page {i}", "Click submit"]} for i in range(1, n + 1)]
+
+
+def test_suite_matches_single_case_output_and_is_valid_python():
+    generator = SeleniumGenerator()
+    cases = make_cases(3)
+    try:
+        files = asyncio.run(generator.generate_suite(cases))
+    finally:
+        shutdown_codegen_pool()
+
+    assert [name for name, _ in files] == ["test_tc_001.py", "test_tc_002.py", "test_tc_003.py"]
+    for (_, code), case in zip(files, cases):
+        ast.parse(code)
+        assert code == SeleniumGenerator().generate_test_script(case)
+
+
+def test_format_cache_is_keyed_on_rendered_source():
+    generator = SeleniumGenerator()
+    case = make_cases(1)[0]
+    first = generator.generate_test_script(case)
+    # Same rendered source under a different id: served from the cache
+    files = asyncio.run(generator.generate_suite([{**case, "id": "TC_999"}, case]))
+    assert [code for _, code in files] == [first, first]
+    assert generator.cache.hits == 1 and len(generator.cache) == 1
+
+
+def test_suite_filenames_are_unique():
+    names = SeleniumGenerator.suite_filenames([{"id": "TC 1"}, {"id": "tc-1"}, {}])
+    assert names == ["test_tc_1.py", "test_tc_1_2.py", "test_case_003.py"]
+
+
+def test_pooled_suite_runs_risk_first_on_one_stub_browser(tmp_path):
+    cases = [
+        {"id": "TC_001", "steps": ["a"], "risk_analysis": {"risk_level": "NORMAL"}},
+        {"id": "TC_002", "steps": ["b"], "risk_analysis": {"risk_level": "CRITICAL"}},
+        {"id": "TC_003", "steps": ["c"], "risk_analysis": {"risk_level": "HIGH"}},
+    ]
+    files = asyncio.run(SeleniumGenerator().generate_suite(cases, pooled=True))
+    assert [name for name, _ in files] == ["test_tc_002.py", "test_tc_003.py", "test_tc_001.py", "conftest.py"]
+    for name, code in files:
+        (tmp_path / name).write_text(code)
+    (tmp_path / "test_zz_pool.py").write_text(
+        "def test_one_launch(driver_pool):\n    assert driver_pool.launches == 1\n"
+        "    assert ('delete_all_cookies',) in driver_pool.driver.calls\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-v", "-p", "no:cacheprovider", str(tmp_path)],
+        cwd=tmp_path, env={**os.environ, "ZETA_DRIVER": "stub"}, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout
+    order = [line.split("::")[0].rsplit("/", 1)[-1] for line in result.stdout.splitlines() if "PASSED" in line]
+    assert order == ["test_tc_002.py", "test_tc_003.py", "test_tc_001.py", "test_zz_pool.py"]
+
+
+def test_llm_fields_cannot_inject_code():
+    case = {
+        "id": "TC_001\nimport os; os.system('boom')",
+        "title": "t\r\nraise SystemExit",
+        "url": 'https://x.test/"); import os #',
+        "steps": ["ok\nraise SystemExit"],
+        "actions": [{"func_name": "go(self): pass\n", "description": "d\nraise SystemExit"}],
+        "risk_analysis": {"risk_level": 'HIGH")\nimport os\n#'},
+    }
+    for pooled in (False, True):
+        tree = ast.parse(SeleniumGenerator().render(case, pooled=pooled))
+        assert not any(isinstance(node, ast.Raise) for node in ast.walk(tree))
+        imported = {alias.name for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom)) for alias in node.names}
+        assert imported <= {"pytest", "webdriver"}
+    assert "pytest.mark.risk('NORMAL')" in SeleniumGenerator().render(case, pooled=True)
@@ -0,0 +1,108 @@
+import os
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy-test-key")
+
+from src.core.dedup import Deduplicator, lsh_params  # noqa: E402
+
+LOGIN = {
+    "id": "TC_001",
+    "title": "Verify login with valid credentials",
+    "steps": ["1. Open the login page", "2. Enter a valid username and password", "3. Click the login button"],
+    "test_data": {"username": "alice", "password": "secret"},
+    "provenance": {"sections": ["aaa"], "titles": ["Login"]},
+}
+LOGIN_REWORDED = {
+    "id": "TC_002",
+    "title": "Verify that login works with valid credentials",
+    "steps": ["Step 1: Open the login page", "Step 2: Enter a valid username and password", "Step 3: Click on the login button"],
+    "test_data": {"username": "alice", "password": "secret"},
+    "provenance": {"sections": ["bbb"], "titles": ["Accounts"]},
+}
+RESET = {
+    "id": "TC_003",
+    "title": "Reset a forgotten password by email",
+    "steps": ["1. Open the forgot password link", "2. Submit the registered email", "3. Follow the emailed reset link"],
+    "test_data": {"email": "alice@example.com"},
+}
+
+
+def test_reworded_case_is_merged_into_the_first():
+    result = Deduplicator(root="unused").run([LOGIN, LOGIN_REWORDED, RESET])
+
+    assert [c["id"] for c in result.test_cases] == ["TC_001", "TC_003"]
+    assert result.removed[0]["duplicate_of"] == "TC_001"
+    survivor = result.test_cases[0]
+    assert survivor["merged_from"][0]["id"] == "TC_002"
+    assert survivor["provenance"]["sections"] == ["aaa", "bbb"]
+    assert "merged_from" not in LOGIN
+
+
+def test_already_analysed_case_survives():
+    analysed = {**LOGIN_REWORDED, "risk_analysis": {"risk_level": "HIGH"}}
+    result = Deduplicator(root="unused").run([LOGIN, analysed])
+
+    assert [c["id"] for c in result.test_cases] == ["TC_002"]
+
+
+def test_project_index_persists_across_runs(tmp_path):
+    first = Deduplicator(root=tmp_path)
+    kept = first.run([LOGIN, RESET], project="shop")
+    first.remember("shop", "suite-1", kept.test_cases, kept.signatures)
+
+    second = Deduplicator(root=tmp_path)
+    result = second.run([LOGIN_REWORDED], project="shop")
+    assert result.test_cases == []
+    assert result.removed[0]["duplicate_of"]["suite_id"] == "suite-1"
+
+    # Regenerating suite-1 itself must not drop its own cases
+    assert len(second.run([LOGIN_REWORDED], project="shop", exclude_suite="suite-1").test_cases) == 1
+
+
+def test_lsh_bands_favour_recall():
+    bands, rows = lsh_params(0.65, 128)
+    assert bands * rows == 128
+    # A pair right at the threshold becomes a candidate with high probability
+    assert 1 - (1 - 0.65 ** rows) ** bands > 0.95
+
+
+def test_regenerated_versions_are_not_checked_against_their_own_lineage(tmp_path):
+    dedup = Deduplicator(root=tmp_path)
+    edited = {**LOGIN_REWORDED, "id": "TC_009"}
+    # v1 -> v2 reuses LOGIN; v2 -> v3 regenerates its section as the reworded case
+    for suite_id, base, cases in (("v1", None, [LOGIN]), ("v2", "v1", [LOGIN]), ("v3", "v2", [edited])):
+        kept = dedup.run(cases, project="shop", exclude_suite=base)
+        assert [c["id"] for c in kept.test_cases] == [c["id"] for c in cases]
+        dedup.remember("shop", suite_id, kept.test_cases, kept.signatures, replaces=base)
+    assert {e["suite_id"] for e in dedup.project("shop").entries} == {"v3"}
+
+
+def test_cases_without_text_are_never_duplicates():
+    result = Deduplicator(root="unused").run([{"id": "TC_001"}, {"id": "TC_002", "steps": []}])
+    assert [c["id"] for c in result.test_cases] == ["TC_001", "TC_002"]
+
+
+def test_session_matches_run():
+    dedup = Deduplicator(root="unused")
+    session = dedup.session()
+    kept = [session.add(case) for case in (LOGIN, LOGIN_REWORDED, RESET)]
+    assert kept[1] is None
+    assert session.result().test_cases == dedup.run([LOGIN, LOGIN_REWORDED, RESET]).test_cases
+
+
+def test_project_index_drops_its_oldest_entries_past_the_cap(tmp_path):
+    dedup = Deduplicator(root=tmp_path, max_entries=10)
+    for i in range(12):
+        words = [f"w{i}x{j}" for j in range(6)]
+        case = {"id": f"TC_{i:03d}", "title": " ".join(words)}
+        kept = dedup.run([case], project="capped")
+        dedup.remember("capped", f"suite-{i}", kept.test_cases, kept.signatures)
+
+    index = dedup.project("capped")
+    # Trimmed to 9 on the 11th suite, then one more added
+    assert len(index) == 10
+    assert index.entries[0]["suite_id"] == "suite-2"
+    assert len(Deduplicator(root=tmp_path, max_entries=10).project("capped")) == 10
+
+    # A snapshot older than the one already written never replaces it
+    index.save((1, index.snapshot()[1][:1], "[]"))
+    assert len(Deduplicator(root=tmp_path).project("capped")) == 10
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from src.core.engine_registry import EngineRegistry, EngineNotReady
+
+
+def test_engines_warm_in_background_and_publish_resources():
+    resources = {}
+    registry = EngineRegistry(resources)
+    registry.register("models", lambda: "registry")
+    registry.register("ml", lambda: f"detector({resources['models']})", depends_on=["models"])
+
+    async def scenario():
+        registry.start()
+        assert not registry.ready
+        detector = await registry.wait("ml", timeout=5)
+        return detector
+
+    assert asyncio.run(scenario()) == "detector(registry)"
+    assert registry.ready and resources == {"models": "registry", "ml": "detector(registry)"}
+    assert registry.states["ml"].seconds is not None
+
+
+def test_failure_is_reported_and_propagates_to_dependents():
+    def broken():
+        raise ValueError("GEMINI_API_KEY not found in environment")
+
+    resources = {}
+    registry = EngineRegistry(resources)
+    registry.register("llm", broken)
+    registry.register("batch", lambda: object(), depends_on=["llm"])
+    registry.register("codegen", lambda: "codegen")
+
+    async def scenario():
+        registry.start()
+        with pytest.raises(EngineNotReady, match="GEMINI_API_KEY"):
+            await registry.wait("llm", timeout=5)
+        await registry.wait("codegen", timeout=5)
+
+    asyncio.run(scenario())
+    assert registry.states["batch"].status == "failed" and "llm" in registry.states["batch"].error
+    assert not registry.ready and list(resources) == ["codegen"]
@@ -0,0 +1,28 @@
+import numpy as np
+from src.ml.features import FeatureEngine, contains, default_registry
+from benchmarks.feature_extraction import legacy_extract, synthetic_requirements
+
+
+def test_engine_matches_legacy_features():
+    texts = synthetic_requirements(500) + ["", "Must MUST, and AND", "ÉRROR error"]
+    X = FeatureEngine().transform(texts)
+    assert X.dtype == np.float32
+    assert np.array_equal(X, legacy_extract(texts))
+
+
+def test_registry_accepts_custom_features():
+    registry = default_registry()
+    registry.register("has_password", contains("Password"))
+
+    @registry.register("digits")
+    def digits(corpus):
+        return (sum(ch.isdigit() for ch in text) for text in corpus.texts)
+
+    X = FeatureEngine(registry).transform(["Enter PASSWORD 1234", "click save"])
+    assert registry.names[-2:] == ["has_password", "digits"]
+    assert X[:, -2].tolist() == [1.0, 0.0]
+    assert X[:, -1].tolist() == [4.0, 0.0]
+
+
+def test_empty_batch():
+    assert FeatureEngine().transform([]).shape == (0, 5)
@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import asyncio
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy-test-key")
+os.environ.setdefault("ZETA_LLM_CACHE", "0")
+
+from src.core.chunker import DocumentChunker  # noqa: E402
+from src.core.incremental import order_cases, plan_regeneration, renumbered  # noqa: E402
+from src.core.llm_backends import BackendRouter, StubBackend  # noqa: E402
+from src.core.llm_engine import LLMEngine  # noqa: E402
+
+SPEC = "\n\n".join(f"## Feature {i}\nThe system shall support feature {i}. " * 3 for i in range(8))
+
+
+def _respond(prompt: str) -> str:
+    """One case per [S<n>] marker (or one for an unmarked chunk), titled after the section heading."""
+    requirements = prompt.rsplit("### REQUIREMENTS CONTEXT:\n", 1)[1]
+    labels = re.findall(r"^\[S(\d+)\]\n(.*)$", requirements, re.MULTILINE)
+    if not labels:
+        labels = [("1", requirements.split("\n", 1)[0])]
+    return json.dumps([{"id": f"TC_{i:03d}", "section": f"S{n}", "title": f"Covers {heading}"} for i, (n, heading) in enumerate(labels, 1)])
+
+
+def _engine(max_tokens=120):
+    stub = StubBackend(respond=_respond)
+    engine = LLMEngine(backend=BackendRouter(stub))
+    engine.cache = None
+    engine.chunker = DocumentChunker(max_tokens=max_tokens)
+    return engine, stub
+
+
+def test_cases_carry_section_provenance():
+    engine, stub = _engine()
+    result = asyncio.run(engine.generate_suite(SPEC))
+    sections = engine.chunker.sections(SPEC)
+
+    assert stub.calls > 1
+    assert [c["id"] for c in result.test_cases] == [f"TC_{i:03d}" for i in range(1, 9)]
+    for case, section in zip(result.test_cases, sections):
+        assert case["title"] == f"Covers {section.title}"
+        assert case["provenance"] == {"sections": [section.hash], "titles": [section.title]}
+        assert "section" not in case
+    assert result.sections == [s.hash for s in sections]
+
+
+def test_only_edited_sections_are_regenerated():
+    engine, stub = _engine()
+    first = asyncio.run(engine.generate_suite(SPEC))
+    base = {"test_cases": [{**c, "risk_analysis": {"risk_level": "NORMAL"}} for c in first.test_cases], "meta": {"sections": first.sections}}
+
+    edited = SPEC.replace("feature 5. ", "feature 5, now with SSO. ") + "\n\n## Feature 8\nNew export feature."
+    calls = stub.calls
+    second = asyncio.run(engine.generate_suite(edited, base=base))
+
+    assert second.generated_sections == 2
+    assert second.reused_cases == 7
+    assert stub.calls - calls == 1
+    titles = [c["title"] for c in second.test_cases]
+    assert titles == [f"Covers ## Feature {i}" for i in range(9)]
+    # Reused cases keep their analysis; new ones still need scoring
+    assert [("risk_analysis" in c) for c in second.test_cases] == [True] * 5 + [False] + [True] * 2 + [False]
+
+
+def test_unlabelled_cases_are_tied_to_their_whole_chunk():
+    sections = DocumentChunker().sections("## A\nalpha\n\n## B\nbeta")
+    coarse = {"id": "TC_001", "provenance": {"sections": [sections[0].hash, sections[1].hash]}}
+    edited = DocumentChunker().sections("## A\nalpha\n\n## B\nbeta, changed")
+
+    plan = plan_regeneration(edited, [coarse], [s.hash for s in sections])
+    assert plan.reused == [] and plan.removed_cases == 1
+    assert [s.title for s in plan.changed] == ["## A", "## B"]
+
+
+def test_streaming_reuses_base_cases_first():
+    engine, stub = _engine()
+    first = asyncio.run(engine.generate_suite(SPEC))
+    base = {"test_cases": [{**c, "risk_analysis": {"risk_level": "NORMAL"}} for c in first.test_cases], "meta": {"sections": first.sections}}
+    edited = SPEC.replace("feature 5. ", "feature 5, now with SSO. ")
+
+    async def collect():
+        plan = engine.plan(edited, base)
+        return plan, [case async for case in engine.stream_for_document(edited, plan=plan)]
+
+    calls = stub.calls
+    plan, streamed = asyncio.run(collect())
+
+    assert len(plan.reused) == 7 and len(plan.changed) == 1
+    assert stub.calls - calls == 1
+    assert [c["id"] for c in streamed] == [f"TC_{i:03d}" for i in range(1, 9)]
+    assert [("risk_analysis" in c) for c in streamed] == [True] * 7 + [False]
+    assert streamed[-1]["title"] == "Covers ## Feature 5"
+
+
+def test_renumbering_keeps_the_model_id_as_source_id():
+    merged = order_cases([], [{"id": "TC_001", "title": "a"}, {"id": "TC_002", "title": "b"}, {"id": "TC_001", "title": "c"}])
+    assert [c["id"] for c in merged] == ["TC_001", "TC_002", "TC_003"]
+    assert [c["title"] for c in merged] == ["a", "b", "c"]
+    assert merged[2]["source_id"] == "TC_001"
+
+    streamed = renumbered({"id": "TC_001", "title": "d"}, 4, source_chunk=1)
+    assert streamed["id"] == "TC_004" and streamed["source_id"] == "TC_001" and streamed["source_chunk"] == 1
+    # A carried-over case keeps the model ID it was first generated with
+    assert renumbered(merged[2], 1)["source_id"] == "TC_001"
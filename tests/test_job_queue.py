@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from pydantic import ValidationError
+from src.api.models import BATCH_MAX_CHARS, BatchGenerateRequest
+from src.core.job_queue import BatchJobQueue
+from src.core.rate_limiter import RateLimiter, TokenBucket
+
+
+def test_token_bucket_spaces_out_bursts():
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    waits = [bucket.reserve(1) for _ in range(4)]
+    assert waits[0] == 0 and waits[1] == 0
+    assert 0.9 < waits[2] <= 1.0 and 1.9 < waits[3] <= 2.0
+
+
+def test_rate_limiter_pause_applies_to_every_caller():
+    limiter = RateLimiter()
+    limiter.pause(0.05)
+    assert asyncio.run(limiter.acquire()) > 0
+
+
+def test_batch_runs_items_with_bounded_concurrency():
+    in_flight = []
+    peak = []
+
+    async def process(suite_id, text):
+        in_flight.append(text)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(text)
+        return [{"id": "TC_001", "title": text}]
+
+    async def scenario():
+        queue = BatchJobQueue(process, concurrency=2)
+        queue.start()
+        job = queue.submit([f"doc {i}" for i in range(6)])
+        while not queue.get(job.job_id).is_terminal:
+            await asyncio.sleep(0.005)
+        await queue.stop()
+        return queue.get(job.job_id)
+
+    job = asyncio.run(scenario())
+    assert job.status == "completed"
+    assert [item.test_cases[0]["title"] for item in job.items] == [f"doc {i}" for i in range(6)]
+    assert max(peak) == 2
+
+
+def test_cancel_stops_running_and_queued_items():
+    async def process(suite_id, text):
+        await asyncio.sleep(10)
+        return []
+
+    async def scenario():
+        queue = BatchJobQueue(process, concurrency=1)
+        queue.start()
+        job = queue.submit(["a", "b"])
+        await asyncio.sleep(0.01)
+        queue.cancel(job.job_id)
+        await asyncio.sleep(0.01)
+        await queue.stop()
+        return queue.get(job.job_id)
+
+    job = asyncio.run(scenario())
+    assert job.status == "cancelled"
+    assert [item.status for item in job.items] == ["cancelled", "cancelled"]
+
+
+def test_response_tokens_are_charged_after_the_call():
+    limiter = RateLimiter(tokens_per_minute=60)
+    limiter.record(90)
+    assert asyncio.run(limiter.acquire(1)) > 0
+
+
+def test_batch_total_size_is_capped():
+    text = "x" * 2_000_000
+    with pytest.raises(ValidationError):
+        BatchGenerateRequest(documents=[{"requirements_text": text}] * (BATCH_MAX_CHARS // len(text) + 1))
@@ -0,0 +1,49 @@
+from src.core.json_stream import IncrementalArrayParser, salvage_test_cases
+
+RESPONSE = '```json\n[{"id": "TC_001", "steps": ["a {b}", "c \\" }"]}, {"id": "TC_002", "test_data": {"x": [1, 2]}}]\n```'
+
+
+def test_objects_emitted_as_they_close():
+    parser = IncrementalArrayParser()
+    seen = []
+    for i in range(0, len(RESPONSE), 7):
+        seen.extend(parser.feed(RESPONSE[i:i + 7]))
+    assert [c["id"] for c in seen] == ["TC_001", "TC_002"]
+    assert seen[0]["steps"] == ["a {b}", 'c " }']
+    assert seen[1]["test_data"] == {"x": [1, 2]}
+    assert parser.finished and not parser.has_partial
+
+
+def test_first_object_available_before_stream_ends():
+    parser = IncrementalArrayParser()
+    assert parser.feed('Sure! [{"id": "TC_001"}, {"id": "TC') == [{"id": "TC_001"}]
+    assert parser.has_partial
+    assert parser.feed('_002"}]') == [{"id": "TC_002"}]
+
+
+def test_salvage_recovers_complete_objects_from_damaged_array():
+    text = 'Here are [3] cases:\n```json\n[{"id": "TC_001", "steps": ["a",],}, {"id": "TC_002"}, {"id": "TC_0'
+    result = salvage_test_cases(text)
+    assert [c["id"] for c in result.test_cases] == ["TC_001", "TC_002"]
+    assert result.repaired and result.salvaged == 2 and result.dropped == 1
+
+
+def test_salvage_fast_path_for_clean_output():
+    result = salvage_test_cases('```json\n[{"id": "TC_001"}]\n```')
+    assert result.test_cases == [{"id": "TC_001"}]
+    assert not result.repaired and result.dropped == 0
+
+
+def test_stream_skips_bracketed_prose_before_the_array():
+    parser = IncrementalArrayParser()
+    seen = []
+    for fragment in ["Here are [15] cases: [", "\n  ", '{"id": "TC_001"}', "]"]:
+        seen.extend(parser.feed(fragment))
+    assert seen == [{"id": "TC_001"}]
+    assert parser.finished
+
+
+def test_trailing_comma_repair_leaves_strings_alone():
+    text = '[{"id": "TC_001", "steps": ["a, ]", "b",], "expected_result": "x,}",}]'
+    result = salvage_test_cases(text)
+    assert result.test_cases == [{"id": "TC_001", "steps": ["a, ]", "b"], "expected_result": "x,}"}]
@@ -0,0 +1,131 @@
+import os
+import asyncio
+import pytest
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy-test-key")
+os.environ.setdefault("ZETA_LLM_CACHE", "0")
+
+from src.core.llm_backends import BackendRouter, SingleFlight, StubBackend  # noqa: E402
+from src.core.llm_engine import LLMEngine  # noqa: E402
+from src.core.metrics import HEDGED_CALLS, SINGLEFLIGHT_SHARED, track_tokens  # noqa: E402
+from src.core.rate_limiter import RateLimiter  # noqa: E402
+
+
+def test_slow_primary_is_hedged_and_the_hedge_wins():
+    primary = StubBackend(name="slow", latency=1.0, respond=lambda p: "primary")
+    hedge = StubBackend(name="fast", latency=0.01, respond=lambda p: "hedge")
+    router = BackendRouter(primary, hedge, min_delay=0.05, initial_delay=0.05)
+    won = HEDGED_CALLS.value(result="hedge_won")
+
+    assert asyncio.run(router.generate("prompt")) == "hedge"
+    assert HEDGED_CALLS.value(result="hedge_won") == won + 1
+    assert primary.calls == hedge.calls == 1
+
+
+def test_fast_primary_is_not_hedged():
+    primary = StubBackend(name="quick", latency=0.0, respond=lambda p: "primary")
+    hedge = StubBackend(name="spare")
+    router = BackendRouter(primary, hedge, min_delay=0.5, initial_delay=0.5)
+
+    assert asyncio.run(router.generate("prompt")) == "primary"
+    assert hedge.calls == 0
+
+
+def test_backend_timeout_raises_timeout_error():
+    router = BackendRouter(StubBackend(name="stuck", latency=1.0, timeout=0.05))
+    with pytest.raises(TimeoutError):
+        asyncio.run(router.generate("prompt"))
+
+
+def test_singleflight_propagates_errors_to_followers():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("down")
+
+    async def main():
+        return await asyncio.gather(flight.do("k", boom), flight.do("k", boom), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert len(flight) == 0
+
+
+def test_identical_concurrent_prompts_share_one_upstream_call():
+    stub = StubBackend(latency=0.05)
+    engine = LLMEngine(backend=BackendRouter(stub))
+    engine.cache = None
+    shared = SINGLEFLIGHT_SHARED.value()
+
+    async def main():
+        return await asyncio.gather(*(engine.generate_test_cases("The user must log in.") for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert stub.calls == 1
+    assert SINGLEFLIGHT_SHARED.value() == shared + 4
+    assert all(r == results[0] for r in results)
+    results[0][0]["title"] = "mutated"
+    assert results[1][0]["title"] != "mutated"
+
+
+def test_engine_streams_through_the_stub_backend():
+    engine = LLMEngine(backend=BackendRouter(StubBackend(stream_chunk_chars=7)))
+    engine.cache = None
+
+    async def main():
+        return [case async for case in engine.stream_test_cases("The user must log in.")]
+
+    cases = asyncio.run(main())
+    assert [c["id"] for c in cases] == ["TC_001"]
+
+
+def test_token_usage_is_tracked_per_suite():
+    stub = StubBackend(latency=0.0)
+    engine = LLMEngine(backend=BackendRouter(stub))
+    engine.cache = None
+
+    async def main():
+        with track_tokens() as usage:
+            await engine.generate_test_cases("The user must log in.")
+            await engine.generate_test_cases("The admin must log in.")
+        return usage
+
+    usage = asyncio.run(main())
+    assert usage.calls == 2
+    assert usage.prompt >= 2 * engine.prompt_loader.template.static_tokens
+    assert usage.response > 0
+
+
+def test_losing_primary_records_a_censored_latency_and_hedge_takes_a_token():
+    primary = StubBackend(name="slow", latency=1.0, respond=lambda p: "primary")
+    hedge = StubBackend(name="fast", latency=0.01, respond=lambda p: "hedge")
+    limiter = RateLimiter(requests_per_minute=60)
+    router = BackendRouter(primary, hedge, min_delay=0.05, initial_delay=0.05, rate_limiter=limiter)
+
+    assert asyncio.run(router.generate("prompt")) == "hedge"
+    assert list(router.latency["slow"].samples) and router.latency["slow"].samples[0] >= 0.05
+    assert limiter.requests is not None and limiter.requests._tokens < limiter.requests.capacity
+
+
+def test_cancelled_caller_cancels_the_primary_and_the_winner_is_charged():
+    router = BackendRouter(StubBackend(name="stalled", latency=5.0), StubBackend(name="spare"), min_delay=1.0, initial_delay=1.0)
+
+    async def abandon():
+        call = asyncio.create_task(router.generate("prompt"))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0.01)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(abandon()) == []
+
+    charged = []
+    limiter = RateLimiter()
+    limiter.record = charged.append
+    hedge = StubBackend(name="quick", latency=0.01, respond=lambda p: "x" * 400)
+    router = BackendRouter(StubBackend(name="slow", latency=1.0), hedge, min_delay=0.05, initial_delay=0.05, rate_limiter=limiter)
+    assert asyncio.run(router.generate("prompt")) == "x" * 400
+    assert charged == [100]
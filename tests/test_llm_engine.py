@@ -0,0 +1,82 @@
+import os
+import asyncio
+import pytest
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy-test-key")
+os.environ.setdefault("ZETA_LLM_CACHE", "0")
+
+from src.core.llm_engine import LLMEngine  # noqa: E402
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+def _engine_with(responses):
+    engine = LLMEngine()
+    engine.cache = None
+    calls = []
+
+    async def fake_generate(prompt, stream=False):
+        calls.append(prompt)
+        item = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(item, Exception):
+            raise item
+        return _Response(item)
+
+    engine.model.generate_content_async = fake_generate
+    return engine, calls
+
+
+def test_truncated_response_is_salvaged_without_retry():
+    engine, calls = _engine_with(['[{"id": "TC_001"}, {"id": "TC_002", "title": "cut of'])
+    cases = asyncio.run(engine.generate_test_cases("The user must log in."))
+    assert [c["id"] for c in cases] == ["TC_001"]
+    assert len(calls) == 1
+    assert engine.parse_stats["dropped_cases"] == 1
+
+
+def test_unrecoverable_response_is_not_retried():
+    engine, calls = _engine_with(["I cannot help with that."])
+    with pytest.raises(ValueError):
+        asyncio.run(engine.generate_test_cases("The user must log in."))
+    assert len(calls) == 1
+
+
+def test_streamed_repairs_are_counted_as_salvaged():
+    engine = LLMEngine()
+    engine.cache = None
+
+    async def fake_stream(prompt):
+        for fragment in ['[{"id": "TC_001",}, {"id": "TC_002"}, ', '{"id": "TC_0']:
+            yield fragment
+
+    engine.backend.stream = fake_stream
+
+    async def main():
+        return [case async for case in engine.stream_test_cases("The user must log in.")]
+
+    assert [c["id"] for c in asyncio.run(main())] == ["TC_001", "TC_002"]
+    assert engine.parse_stats["salvaged_cases"] == 2
+    assert engine.parse_stats["dropped_cases"] == 1
+
+
+def test_mid_stream_429_pauses_the_limiter():
+    from google.api_core import exceptions as google_exceptions
+
+    engine = LLMEngine()
+    engine.cache = None
+
+    async def fake_stream(prompt):
+        yield '[{"id": "TC_001"}, '
+        raise google_exceptions.TooManyRequests("quota")
+
+    engine.backend.stream = fake_stream
+
+    async def main():
+        return [case async for case in engine.stream_test_cases("The user must log in.")]
+
+    with pytest.raises(google_exceptions.TooManyRequests):
+        asyncio.run(main())
+    assert engine.rate_limiter._paused_until > 0
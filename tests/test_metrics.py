@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api.instrumentation import MetricsMiddleware
+from src.core import metrics
+from src.core.metrics import MetricsRegistry, stage
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency", buckets=(0.1, 1.0))
+    calls = registry.counter("demo_calls_total", "Demo calls")
+    latency.observe(0.05, stage="a")
+    latency.observe(0.5, stage="a")
+    latency.observe(5.0, stage="a")
+    calls.inc(outcome='quote"d')
+    registry.register_collector(lambda: [("demo_ratio", "gauge", "Demo ratio", [({}, 0.25)])])
+
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="a"} 3' in lines
+    assert 'demo_calls_total{outcome="quote\\"d"} 1' in lines
+    assert "demo_ratio 0.25" in lines
+
+
+def test_stages_reach_histogram_server_timing_and_span_hook():
+    spans = []
+
+    @contextmanager
+    def span(name):
+        spans.append(name)
+        yield
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, server_timing=True)
+
+    @app.get("/work")
+    def work():
+        with stage("unit_test_stage"):
+            pass
+        return {"ok": True}
+
+    before = metrics.STAGE_SECONDS.count(stage="unit_test_stage")
+    metrics.set_span_hook(span)
+    try:
+        response = TestClient(app).get("/work")
+    finally:
+        metrics.set_span_hook(None)
+
+    assert response.headers["server-timing"].startswith("unit_test_stage;dur=")
+    assert "total;dur=" in response.headers["server-timing"]
+    assert spans == ["zeta.unit_test_stage"]
+    assert metrics.STAGE_SECONDS.count(stage="unit_test_stage") == before + 1
+    assert metrics.REQUEST_SECONDS.count(route="/work", method="GET", status=200) == 1
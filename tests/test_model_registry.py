@@ -0,0 +1,44 @@
+import json
+from src.ml.edge_case_detector import EdgeCaseDetector
+from src.ml.model_registry import ModelRegistry
+from src.ml.train import load_corpus
+from benchmarks.feature_extraction import synthetic_requirements
+
+
+def test_train_save_load_and_score_only(tmp_path, monkeypatch):
+    corpus = [{"text": t} for t in synthetic_requirements(300)]
+    detector = EdgeCaseDetector()
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.save(detector.fit(corpus), detector.feature_engine.registry.names, len(corpus), 0.1)
+    second = registry.save(detector.fit(corpus), detector.feature_engine.registry.names, len(corpus), 0.1)
+    assert [v.version for v in registry.versions()] == ["v0001", "v0002"]
+    assert registry.latest().version == second.version
+
+    model, meta = registry.load(first.version)
+    detector.load_model(model, meta.version)
+    monkeypatch.setattr(detector.ml_model, "fit_predict", lambda *a, **k: (_ for _ in ()).throw(AssertionError("refit")))
+
+    # A single case is scored against the historical baseline, not fitted on itself
+    huge = [{"id": "TC_001", "text": "user must " * 500}]
+    assert detector._analyze_sync(huge)[0].risk_sources == ["Statistical_Outlier"]
+
+
+def test_load_corpus_flattens_suites(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"test_cases": [{"title": "Login", "steps": ["open", "submit"]}]}),
+        json.dumps({"text": "raw requirement"}),
+    ]))
+    assert load_corpus(str(path)) == [{"text": "Login open submit"}, {"text": "raw requirement"}]
+
+
+def test_compiled_forest_matches_sklearn():
+    import numpy as np
+    from src.ml.compiled_forest import CompiledIsolationForest
+    from src.ml.features import FeatureEngine
+
+    X = FeatureEngine().transform(synthetic_requirements(1000))
+    model = EdgeCaseDetector().fit([{"text": t} for t in synthetic_requirements(1000)])
+    compiled = CompiledIsolationForest(model)
+    assert np.allclose(compiled.score_samples(X), model.score_samples(X))
+    assert (compiled.predict(X) == model.predict(X)).all()
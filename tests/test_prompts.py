@@ -0,0 +1,66 @@
+import os
+import yaml
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy-test-key")
+
+from src.core.prompts import PromptLoader, PromptTemplate, trim_to_budget  # noqa: E402
+from src.core.metrics import PROMPT_TRIMMED  # noqa: E402
+
+PROMPTS = {
+    "version": "1",
+    "test_generation": {
+        "system_role": "ROLE",
+        "instruction": "TASK",
+        "few_shot_examples": "EXAMPLES",
+        "output_format": "[{\"id\": \"TC_001\"}]",
+    },
+}
+
+
+def _write(path, prompts):
+    path.write_text(yaml.safe_dump(prompts))
+
+
+def test_requirements_go_last_so_the_static_text_is_one_prefix():
+    template = PromptTemplate(PROMPTS, "1")
+    prompt = template.render("The user must log in.")
+    assert prompt.startswith(template.prefix)
+    assert template.suffix == ""
+    assert prompt.endswith("### REQUIREMENTS CONTEXT:\nThe user must log in.")
+    assert "{requirements_text}" not in template.prefix
+
+
+def test_inline_placeholder_is_still_supported():
+    prompts = {"test_generation": {**PROMPTS["test_generation"], "instruction": "Analyze:\n{requirements_text}\nThen answer."}}
+    template = PromptTemplate(prompts, "1")
+    prompt = template.render("REQ")
+    assert "Analyze:\nREQ\nThen answer." in prompt
+    assert prompt.endswith("[{\"id\": \"TC_001\"}]")
+
+
+def test_requirements_are_trimmed_to_the_input_budget():
+    text = "\n".join(f"Line {i}: the system shall do something." for i in range(200))
+    trimmed, cut = trim_to_budget(text, 100)
+    assert cut and len(trimmed) <= 400 and trimmed.endswith("something.")
+
+    before = PROMPT_TRIMMED.value()
+    template = PromptTemplate(PROMPTS, "1", input_tokens=100)
+    assert len(template.render(text)) <= len(template.prefix) + 400
+    assert PROMPT_TRIMMED.value() == before + 1
+
+
+def test_prompts_hot_reload_and_invalid_edits_are_ignored(tmp_path):
+    path = tmp_path / "prompts.yaml"
+    _write(path, PROMPTS)
+    reloaded = []
+    loader = PromptLoader(path, reload_seconds=0, on_reload=reloaded.append)
+    assert loader.template.version == "1"
+
+    _write(path, {**PROMPTS, "version": "2"})
+    os.utime(path, ns=(0, 10**18))
+    assert loader.check()
+    assert loader.current().version == "2" and reloaded[-1].version == "2"
+
+    path.write_text("test_generation: [unclosed")
+    assert not loader.check()
+    assert loader.current().version == "2"
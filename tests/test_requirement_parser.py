@@ -0,0 +1,121 @@
+import os
+import asyncio
+import pytest
+from src.core.parse_cache import ParseCache
+from src.core.requirement_parser import RequirementParser, PAGE_BREAK, shutdown_parser_pool
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path / "parsed"), mmap_threshold=16)
+    monkeypatch.setattr(RequirementParser, "cache", cache)
+    yield cache
+    shutdown_parser_pool()
+
+
+def write_pdf(path, pages):
+    """Minimal text-only PDF, one Helvetica line per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+
+
+def test_pdf_pages_extracted_in_parallel_ranges(tmp_path):
+    pdf = tmp_path / "spec.pdf"
+    write_pdf(pdf, [f"The user must do step {i}" for i in range(7)])
+
+    async def scenario():
+        pages = [p async for p in RequirementParser.iter_pdf_pages(str(pdf), pages_per_task=3)]
+        doc = await RequirementParser.parse(str(pdf))
+        return pages, doc
+
+    pages, doc = asyncio.run(scenario())
+
+    assert [number for number, _ in pages] == list(range(7))
+    assert "step 6" in pages[6][1]
+    assert doc.content.count(PAGE_BREAK) == 6
+    assert doc.metadata["pages"] == 7
+    assert doc.metadata["page_char_counts"] == [len(text) for _, text in pages]
+    assert doc.metadata["extraction_seconds"] >= 0
+
+
+def test_cache_hit_skips_extraction(tmp_path, monkeypatch):
+    pdf = tmp_path / "spec.pdf"
+    write_pdf(pdf, ["The user must log in with a valid password"])
+    first = asyncio.run(RequirementParser.parse(str(pdf)))
+
+    async def boom(path):
+        raise AssertionError("pypdf should not run on a cache hit")
+
+    monkeypatch.setattr(RequirementParser, "_parse_pdf", boom)
+    second = asyncio.run(RequirementParser.parse(str(pdf)))
+    assert second.content == first.content
+    assert second.metadata["parse_cache"] == "hit"
+    assert second.metadata["pages"] == 1
+
+
+def test_parse_cache_prunes_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path / "lru"), max_bytes=250)
+    cache.put("old", "a" * 100, {})
+    cache.put("used", "b" * 100, {})
+    os.utime(tmp_path / "lru" / "old.json", (0, 0))
+    os.utime(tmp_path / "lru" / "used.json", (1, 1))
+    assert cache.get("used") is not None
+    cache.put("new", "c" * 100, {})
+
+    assert cache.get("old") is None
+    assert cache.get("used")["content"] == "b" * 100
+    assert cache.get("new")["content"] == "c" * 100
+    assert not list((tmp_path / "lru").glob("*.tmp"))
+
+
+def test_docx_headings_and_tables(tmp_path):
+    import docx
+
+    document = docx.Document()
+    document.add_heading("Login", level=2)
+    document.add_paragraph("The user must enter a password.")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "field"
+    table.rows[0].cells[1].text = "email"
+    path = tmp_path / "spec.docx"
+    document.save(str(path))
+
+    doc = asyncio.run(RequirementParser.parse(str(path)))
+    assert doc.content == "## Login\nThe user must enter a password.\nfield | email"
+    assert doc.metadata["tables"] == 1
+
+
+def test_docx_tables_stay_in_document_order(tmp_path):
+    import docx
+
+    document = docx.Document()
+    document.add_heading("Login", level=2)
+    document.add_table(rows=1, cols=1).rows[0].cells[0].text = "login table"
+    document.add_heading("Checkout", level=2)
+    document.add_table(rows=1, cols=1).rows[0].cells[0].text = "checkout table"
+    path = tmp_path / "spec.docx"
+    document.save(str(path))
+
+    doc = asyncio.run(RequirementParser.parse(str(path), use_cache=False))
+    assert doc.content == "## Login\nlogin table\n## Checkout\ncheckout table"
+    assert doc.metadata["tables"] == 2
@@ -0,0 +1,52 @@
+import time
+from src.core.response_cache import ResponseCache
+
+
+def test_key_depends_on_prompt_model_and_version():
+    base = ResponseCache.make_key("prompt", "gemini-2.5-flash", "1.0.0")
+    assert base == ResponseCache.make_key("prompt", "gemini-2.5-flash", "1.0.0")
+    assert base != ResponseCache.make_key("prompt!", "gemini-2.5-flash", "1.0.0")
+    assert base != ResponseCache.make_key("prompt", "gemini-2.5-pro", "1.0.0")
+    assert base != ResponseCache.make_key("prompt", "gemini-2.5-flash", "1.0.1")
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    ResponseCache(db_path=db).set("k", [{"id": "TC_001"}])
+
+    fresh = ResponseCache(db_path=db)
+    assert fresh.get("k") == [{"id": "TC_001"}]
+    assert fresh.get("k") == [{"id": "TC_001"}]
+    stats = fresh.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "cache.sqlite"), max_memory_items=1, ttl_seconds=0)
+    cache.set("a", [])
+    time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+    lru = ResponseCache(max_memory_items=1)
+    lru.set("a", [])
+    lru.set("b", [])
+    assert lru.get("a") is None
+    assert lru.get("b") == []
+
+
+def test_disk_size_budget(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "cache.sqlite"), max_disk_bytes=40)
+    cache.set("old", [{"x": "a" * 20}])
+    cache.set("new", [{"x": "b" * 20}])
+    assert cache.stats()["disk_items"] == 1
+
+
+def test_disk_budget_counts_rows_written_by_other_instances(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    first = ResponseCache(db_path=db, max_disk_bytes=40)
+    second = ResponseCache(db_path=db, max_disk_bytes=40)
+    first.set("a", [{"x": "a" * 20}])
+    second.set("b", [{"x": "b" * 20}])
+    assert first.stats()["disk_items"] == 1
+    assert first.stats()["disk_bytes"] == second.stats()["disk_bytes"] == len('[{"x":"' + "b" * 20 + '"}]')
@@ -0,0 +1,56 @@
+import json
+import pytest
+from src.core.suite_store import SuiteStore
+
+
+def _case(i, risk, case_type="Negative", priority="High"):
+    return {
+        "id": f"TC_{i:03d}",
+        "title": f"Case {i} — ünïcode",
+        "type": case_type,
+        "priority": priority,
+        "risk_analysis": {"risk_level": risk, "complexity_score": float(i)},
+    }
+
+
+def test_suites_survive_a_restart(tmp_path):
+    path = str(tmp_path / "suites.sqlite")
+    store = SuiteStore(path)
+    cases = [_case(i, "HIGH") for i in range(3)]
+    store.put("s1", cases, {"source": "Gemini 2.5"})
+    store.close()
+
+    reopened = SuiteStore(path)
+    assert reopened.get("s1") == {"suite_id": "s1", "test_cases": cases, "meta": {"source": "Gemini 2.5"}}
+    assert reopened.get("missing") is None
+    assert len(reopened) == 1
+
+
+def test_page_filters_and_paginates():
+    store = SuiteStore(":memory:")
+    cases = [_case(i, "CRITICAL" if i % 3 == 0 else "NORMAL", priority="Critical" if i < 5 else "Low") for i in range(20)]
+    store.put("s1", cases, {"tokens": {"prompt": 10}})
+
+    page = json.loads(store.page_json("s1", offset=2, limit=3, risk_level="critical"))
+    assert page["total"] == 7 and page["case_count"] == 20
+    assert [c["id"] for c in page["test_cases"]] == ["TC_006", "TC_009", "TC_012"]
+    assert page["meta"] == {"tokens": {"prompt": 10}}
+
+    page = json.loads(store.page_json("s1", limit=50, risk_level="CRITICAL", priority="Critical"))
+    assert [c["id"] for c in page["test_cases"]] == ["TC_000", "TC_003"]
+    assert store.page_json("missing") is None
+    with pytest.raises(ValueError):
+        store.page_json("s1", title="x")
+
+
+def test_put_replaces_and_oldest_suites_are_pruned():
+    store = SuiteStore(":memory:", max_suites=2)
+    store.put("a", [_case(0, "HIGH")], {})
+    store.put("a", [_case(1, "HIGH"), _case(2, "HIGH")], {})
+    assert [c["id"] for c in store.get("a")["test_cases"]] == ["TC_001", "TC_002"]
+
+    store.put("b", [], {})
+    store.put("c", [], {})
+    assert store.get("a") is None
+    total, suites = store.recent()
+    assert total == 2 and {s["suite_id"] for s in suites} == {"b", "c"}
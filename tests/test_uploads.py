@@ -0,0 +1,45 @@
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from src.api.uploads import receive_upload, discard_upload, UploadError
+
+
+def make_client(max_bytes=1024, chunk_bytes=16):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        try:
+            path, size = await receive_upload(request, {".txt", ".pdf"}, max_bytes=max_bytes, chunk_bytes=chunk_bytes)
+        except UploadError as e:
+            raise HTTPException(e.status_code, str(e))
+        try:
+            return {"name": path.name, "size": size, "content": path.read_text()}
+        finally:
+            discard_upload(path)
+            assert not path.parent.exists()
+
+    return TestClient(app)
+
+
+def test_upload_streams_file_field_to_disk():
+    client = make_client()
+    body = "The user must log in.\n" * 20
+    response = client.post(
+        "/upload",
+        data={"note": "ignored"},
+        files={"file": ("../../specs/login.txt", body.encode(), "text/plain")},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"name": "login.txt", "size": len(body), "content": body}
+
+
+def test_upload_rejects_oversized_and_unsupported_files():
+    client = make_client(max_bytes=100)
+    too_big = client.post("/upload", files={"file": ("spec.txt", b"x" * 101, "text/plain")})
+    assert too_big.status_code == 413
+
+    wrong_type = client.post("/upload", files={"file": ("spec.exe", b"MZ", "application/octet-stream")})
+    assert wrong_type.status_code == 415
+
+    missing = client.post("/upload", data={"other": "value"}, files={"attachment": ("spec.txt", b"x", "text/plain")})
+    assert missing.status_code == 400